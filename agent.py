@@ -1,623 +1,380 @@
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
-import google.generativeai as genai
-from datetime import datetime
-import os
+"""Sales agent core: prompt building and generation on top of Gemini
+
+SalesAgent has blocking methods for threads and scripts; AsyncSalesAgent has
+the same methods as coroutines for asyncio code such as the API server.
+
+Usage:
+    python agent.py                      start the desktop app
+    python -m agent <command> [options]  run headless, see cli.py
+
+Importing this module is cheap; tkinter and the Gemini SDK are only loaded
+when the GUI starts or a SalesAgent is created without a backend.
+"""
+import asyncio
 import json
+import sys
+import time
 
-class SalesAgentGUI:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Sales Agent Assistant")
-        self.root.geometry("800x600")
-        self.root.minsize(800, 600)
-        
-        # Configure the Gemini API
-        self.api_key = tk.StringVar()
-        self.configure_api_frame()
-        
-        # Create notebook for tabs
-        self.notebook = ttk.Notebook(root)
-        self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Create tabs
-        self.create_prospect_tab()
-        self.create_email_tab()
-        self.create_followup_tab()
-        self.create_objection_tab()
-        self.create_proposal_tab()
-        
-        # Initialize the sales agent backend
-        self.sales_agent = None
-        self.prospects = {}
-        self.current_prospect = None
-        
-        # Load existing prospects if any
-        self.load_prospects()
-        
-    def configure_api_frame(self):
-        api_frame = ttk.LabelFrame(self.root, text="API Configuration")
-        api_frame.pack(fill=tk.X, padx=10, pady=5)
-        
-        ttk.Label(api_frame, text="Gemini API Key:").grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
-        ttk.Entry(api_frame, textvariable=self.api_key, width=50, show="*").grid(row=0, column=1, padx=5, pady=5, sticky=tk.W)
-        ttk.Button(api_frame, text="Initialize API", command=self.initialize_api).grid(row=0, column=2, padx=5, pady=5)
-        
-    def initialize_api(self):
-        if not self.api_key.get():
-            messagebox.showerror("Error", "Please enter your Gemini API key")
-            return
-            
-        try:
-            genai.configure(api_key=self.api_key.get())
-            self.sales_agent = SalesAgent(api_key=self.api_key.get())
-            messagebox.showinfo("Success", "API initialized successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to initialize API: {str(e)}")
-    
-    def create_prospect_tab(self):
-        prospect_tab = ttk.Frame(self.notebook)
-        self.notebook.add(prospect_tab, text="Prospect Management")
-        
-        # Left frame for list of prospects
-        left_frame = ttk.Frame(prospect_tab)
-        left_frame.pack(side=tk.LEFT, fill=tk.Y, padx=5, pady=5)
-        
-        ttk.Label(left_frame, text="Prospects:").pack(anchor=tk.W)
-        self.prospect_listbox = tk.Listbox(left_frame, width=30, height=20)
-        self.prospect_listbox.pack(fill=tk.Y, expand=True)
-        self.prospect_listbox.bind('<<ListboxSelect>>', self.load_prospect_details)
-        
-        ttk.Button(left_frame, text="New Prospect", command=self.clear_prospect_form).pack(fill=tk.X, pady=5)
-        ttk.Button(left_frame, text="Delete Prospect", command=self.delete_prospect).pack(fill=tk.X)
-        
-        # Right frame for prospect details
-        right_frame = ttk.LabelFrame(prospect_tab, text="Prospect Details")
-        right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        # Prospect form
-        form_frame = ttk.Frame(right_frame)
-        form_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Name
-        ttk.Label(form_frame, text="Name:").grid(row=0, column=0, sticky=tk.W, pady=2)
-        self.prospect_name = tk.StringVar()
-        ttk.Entry(form_frame, textvariable=self.prospect_name, width=40).grid(row=0, column=1, sticky=tk.W, pady=2)
-        
-        # Company
-        ttk.Label(form_frame, text="Company:").grid(row=1, column=0, sticky=tk.W, pady=2)
-        self.prospect_company = tk.StringVar()
-        ttk.Entry(form_frame, textvariable=self.prospect_company, width=40).grid(row=1, column=1, sticky=tk.W, pady=2)
-        
-        # Role
-        ttk.Label(form_frame, text="Role:").grid(row=2, column=0, sticky=tk.W, pady=2)
-        self.prospect_role = tk.StringVar()
-        ttk.Entry(form_frame, textvariable=self.prospect_role, width=40).grid(row=2, column=1, sticky=tk.W, pady=2)
-        
-        # Interests
-        ttk.Label(form_frame, text="Interests:").grid(row=3, column=0, sticky=tk.W, pady=2)
-        self.prospect_interests = tk.StringVar()
-        ttk.Entry(form_frame, textvariable=self.prospect_interests, width=40).grid(row=3, column=1, sticky=tk.W, pady=2)
-        ttk.Label(form_frame, text="(Comma separated)").grid(row=3, column=2, sticky=tk.W, pady=2)
-        
-        # Pain points
-        ttk.Label(form_frame, text="Pain Points:").grid(row=4, column=0, sticky=tk.W, pady=2)
-        self.prospect_pain_points = tk.StringVar()
-        ttk.Entry(form_frame, textvariable=self.prospect_pain_points, width=40).grid(row=4, column=1, sticky=tk.W, pady=2)
-        ttk.Label(form_frame, text="(Comma separated)").grid(row=4, column=2, sticky=tk.W, pady=2)
-        
-        # Notes
-        ttk.Label(form_frame, text="Notes:").grid(row=5, column=0, sticky=tk.NW, pady=2)
-        self.prospect_notes = scrolledtext.ScrolledText(form_frame, width=40, height=5)
-        self.prospect_notes.grid(row=5, column=1, sticky=tk.W, pady=2)
-        
-        # Save button
-        ttk.Button(form_frame, text="Save Prospect", command=self.save_prospect).grid(row=6, column=1, sticky=tk.E, pady=10)
-    
-    def create_email_tab(self):
-        email_tab = ttk.Frame(self.notebook)
-        self.notebook.add(email_tab, text="Email Generator")
-        
-        # Controls frame
-        controls_frame = ttk.Frame(email_tab)
-        controls_frame.pack(fill=tk.X, padx=10, pady=5)
-        
-        ttk.Label(controls_frame, text="Select Prospect:").pack(side=tk.LEFT, padx=5)
-        self.email_prospect_var = tk.StringVar()
-        self.email_prospect_combo = ttk.Combobox(controls_frame, textvariable=self.email_prospect_var, state="readonly")
-        self.email_prospect_combo.pack(side=tk.LEFT, padx=5)
-        
-        ttk.Button(controls_frame, text="Generate Email", command=self.generate_email).pack(side=tk.LEFT, padx=5)
-        ttk.Button(controls_frame, text="Copy to Clipboard", command=self.copy_email).pack(side=tk.LEFT, padx=5)
-        
-        # Email display
-        email_frame = ttk.LabelFrame(email_tab, text="Generated Email")
-        email_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-        
-        self.email_text = scrolledtext.ScrolledText(email_frame, width=80, height=25)
-        self.email_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-    
-    def create_followup_tab(self):
-        followup_tab = ttk.Frame(self.notebook)
-        self.notebook.add(followup_tab, text="Follow-up Strategy")
-        
-        # Controls frame
-        controls_frame = ttk.Frame(followup_tab)
-        controls_frame.pack(fill=tk.X, padx=10, pady=5)
-        
-        ttk.Label(controls_frame, text="Select Prospect:").pack(side=tk.LEFT, padx=5)
-        self.followup_prospect_var = tk.StringVar()
-        self.followup_prospect_combo = ttk.Combobox(controls_frame, textvariable=self.followup_prospect_var, state="readonly")
-        self.followup_prospect_combo.pack(side=tk.LEFT, padx=5)
-        
-        ttk.Label(controls_frame, text="Days Since Last Contact:").pack(side=tk.LEFT, padx=5)
-        self.days_since_contact = tk.StringVar(value="7")
-        ttk.Entry(controls_frame, textvariable=self.days_since_contact, width=5).pack(side=tk.LEFT, padx=5)
-        
-        ttk.Button(controls_frame, text="Generate Strategy", command=self.generate_followup).pack(side=tk.LEFT, padx=5)
-        
-        # Strategy display
-        strategy_frame = ttk.LabelFrame(followup_tab, text="Follow-up Strategy")
-        strategy_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-        
-        self.strategy_text = scrolledtext.ScrolledText(strategy_frame, width=80, height=25)
-        self.strategy_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-    
-    def create_objection_tab(self):
-        objection_tab = ttk.Frame(self.notebook)
-        self.notebook.add(objection_tab, text="Objection Handler")
-        
-        # Controls frame
-        controls_frame = ttk.Frame(objection_tab)
-        controls_frame.pack(fill=tk.X, padx=10, pady=5)
-        
-        ttk.Label(controls_frame, text="Select Prospect:").pack(side=tk.LEFT, padx=5)
-        self.objection_prospect_var = tk.StringVar()
-        self.objection_prospect_combo = ttk.Combobox(controls_frame, textvariable=self.objection_prospect_var, state="readonly")
-        self.objection_prospect_combo.pack(side=tk.LEFT, padx=5)
-        
-        # Objection input
-        objection_input_frame = ttk.LabelFrame(objection_tab, text="Enter Objection")
-        objection_input_frame.pack(fill=tk.X, padx=10, pady=5)
-        
-        self.objection_input = scrolledtext.ScrolledText(objection_input_frame, width=80, height=5)
-        self.objection_input.pack(fill=tk.X, padx=5, pady=5)
-        
-        ttk.Button(objection_input_frame, text="Analyze Objection", command=self.analyze_objection).pack(pady=5)
-        
-        # Response display
-        response_frame = ttk.LabelFrame(objection_tab, text="Response Strategy")
-        response_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-        
-        self.response_text = scrolledtext.ScrolledText(response_frame, width=80, height=15)
-        self.response_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-    
-    def create_proposal_tab(self):
-        proposal_tab = ttk.Frame(self.notebook)
-        self.notebook.add(proposal_tab, text="Proposal Generator")
-        
-        # Controls frame
-        controls_frame = ttk.Frame(proposal_tab)
-        controls_frame.pack(fill=tk.X, padx=10, pady=5)
-        
-        ttk.Label(controls_frame, text="Select Prospect:").pack(side=tk.LEFT, padx=5)
-        self.proposal_prospect_var = tk.StringVar()
-        self.proposal_prospect_combo = ttk.Combobox(controls_frame, textvariable=self.proposal_prospect_var, state="readonly")
-        self.proposal_prospect_combo.pack(side=tk.LEFT, padx=5)
-        
-        ttk.Button(controls_frame, text="Generate Proposal Outline", command=self.generate_proposal).pack(side=tk.LEFT, padx=5)
-        
-        # Proposal display
-        proposal_frame = ttk.LabelFrame(proposal_tab, text="Proposal Outline")
-        proposal_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-        
-        self.proposal_text = scrolledtext.ScrolledText(proposal_frame, width=80, height=25)
-        self.proposal_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-    
-    def update_prospect_combos(self):
-        prospect_names = list(self.prospects.keys())
-        self.email_prospect_combo['values'] = prospect_names
-        self.followup_prospect_combo['values'] = prospect_names
-        self.objection_prospect_combo['values'] = prospect_names
-        self.proposal_prospect_combo['values'] = prospect_names
-        
-        # Update listbox
-        self.prospect_listbox.delete(0, tk.END)
-        for name in prospect_names:
-            self.prospect_listbox.insert(tk.END, name)
-    
-    def clear_prospect_form(self):
-        self.current_prospect = None
-        self.prospect_name.set("")
-        self.prospect_company.set("")
-        self.prospect_role.set("")
-        self.prospect_interests.set("")
-        self.prospect_pain_points.set("")
-        self.prospect_notes.delete(1.0, tk.END)
-    
-    def save_prospect(self):
-        if not self.sales_agent:
-            messagebox.showerror("Error", "Please initialize the API first")
-            return
-            
-        name = self.prospect_name.get()
-        if not name:
-            messagebox.showerror("Error", "Please enter a name for the prospect")
-            return
-            
-        company = self.prospect_company.get()
-        role = self.prospect_role.get()
-        interests = [i.strip() for i in self.prospect_interests.get().split(",") if i.strip()]
-        pain_points = [p.strip() for p in self.prospect_pain_points.get().split(",") if p.strip()]
-        notes = self.prospect_notes.get(1.0, tk.END).strip()
-        
-        # Update the sales agent
-        self.sales_agent.add_prospect_data(
-            name=name,
-            company=company,
-            role=role,
-            interests=interests,
-            pain_points=pain_points
-        )
-        
-        # Save to our dictionary
-        self.prospects[name] = {
-            "name": name,
-            "company": company,
-            "role": role,
-            "interests": interests,
-            "pain_points": pain_points,
-            "notes": notes,
-            "last_contact": None,
-            "interaction_history": []
-        }
-        
-        # Save to file
-        self.save_prospects()
-        
-        # Update UI
-        self.update_prospect_combos()
-        messagebox.showinfo("Success", f"Prospect '{name}' saved successfully")
-    
-    def load_prospect_details(self, event):
-        if not self.prospect_listbox.curselection():
-            return
+from backends import GeminiBackend
+from cache import ResponseCache
+import objections
+import prompts
+import telemetry
+from throttle import ThrottledBackend
+
+# Artifacts generate_all can produce, in the order they are requested
+ARTIFACTS = ("email", "follow_up", "objection", "proposal")
+# Stands for "the agent's own setting" where None is a meaningful argument
+_AGENT_DEFAULT = object()
+
+class _AgentBase:
+    """Configuration and prompt building shared by SalesAgent and AsyncSalesAgent"""
+    def __init__(self, api_key=None, backend=None, cache=None):
+        # Any backends.ModelBackend can stand in for Gemini, e.g. StubBackend for offline runs
+        self.backend = backend or ThrottledBackend(GeminiBackend(api_key))
+        self.cache = cache
+        self.generation_config = None
+        # Token budget per prompt; None uses each template's own (see prompts.py)
+        self.prompt_budget = None
+        # An objections.ObjectionKnowledgeBase answers objections similar to ones seen before
+        self.objections = None
+        # Ask the model to adapt a matched analysis instead of returning it as it is
+        self.refine_objections = False
+        
+    def _cached(self, prompt, config, force):
+        """(cache key, cached text) for a request; both None without a cache"""
+        if self.cache is None:
+            return None, None
+        key = ResponseCache.make_key(self.backend.model_name, prompt, config)
+        if force:
+            return key, None
+        cached = self.cache.get(key)
+        telemetry.increment("cache_lookups_total", result="miss" if cached is None else "hit")
+        return key, cached
+        
+    def _record_sizes(self, prompt, text):
+        model = self.backend.model_name
+        telemetry.observe("prompt_tokens", prompts.estimate_tokens(prompt), model=model)
+        telemetry.observe("response_tokens", prompts.estimate_tokens(text), model=model)
+        
+    def _email_prompt(self, prospect):
+        return prompts.EMAIL.render(self.prompt_budget, name=prospect.name, company=prospect.company,
+                                    role=prospect.role, interests=prospect.interests,
+                                    pain_points=prospect.pain_points)
+        
+    def _follow_up_prompt(self, days_since_contact, prospect):
+        return prompts.FOLLOW_UP.render(self.prompt_budget, days=days_since_contact, name=prospect.name,
+                                        company=prospect.company, role=prospect.role,
+                                        last_contact=prospect.last_contact)
+        
+    def _objection_prompt(self, objection_text, prospect, match=None):
+        if match is not None:
+            return prompts.OBJECTION_REFINE.render(self.prompt_budget, name=prospect.name, company=prospect.company,
+                                                   objection=objection_text, similar=match.objection,
+                                                   analysis=match.analysis)
+        return prompts.OBJECTION.render(self.prompt_budget, name=prospect.name, company=prospect.company,
+                                        objection=objection_text)
+        
+    def _objection_options(self, knowledge_base, refine):
+        """(knowledge base, refine) for one call, falling back to the agent's own settings"""
+        return (self.objections if knowledge_base is _AGENT_DEFAULT else knowledge_base,
+                self.refine_objections if refine is None else refine)
+        
+    def _known_objection(self, objection_text, prospect, force, knowledge_base):
+        """Match from the knowledge base for an objection, or None"""
+        if knowledge_base is None or force:
+            return None
+        return knowledge_base.lookup(objection_text, prospect)
+        
+    def _learn_objection(self, objection_text, prospect, match, analysis, knowledge_base):
+        if knowledge_base is not None and match is None:
+            knowledge_base.add(objection_text, analysis, prospect)
             
-        index = self.prospect_listbox.curselection()[0]
-        name = self.prospect_listbox.get(index)
-        prospect = self.prospects.get(name)
+    def learn_objections(self, prospects):
+        """Add logged objections whose analyses are still in the response cache to the knowledge base
         
-        if prospect:
-            self.current_prospect = name
-            self.prospect_name.set(prospect["name"])
-            self.prospect_company.set(prospect["company"])
-            self.prospect_role.set(prospect["role"])
-            self.prospect_interests.set(", ".join(prospect["interests"]))
-            self.prospect_pain_points.set(", ".join(prospect["pain_points"]))
-            
-            self.prospect_notes.delete(1.0, tk.END)
-            self.prospect_notes.insert(tk.END, prospect["notes"])
+        Returns how many were added. Objections the cache no longer holds are
+        learned the next time they are analysed.
+        """
+        if self.objections is None or self.cache is None:
+            return 0
+        added = 0
+        for prospect in prospects:
+            for objection_text in objections.past_objections(prospect):
+                key = ResponseCache.make_key(self.backend.model_name, self._objection_prompt(objection_text, prospect),
+                                             self.generation_config)
+                analysis = self.cache.peek(key)
+                if analysis and self.objections.add(objection_text, analysis, prospect):
+                    added += 1
+        return added
+        
+    def _proposal_prompt(self, prospect):
+        return prompts.PROPOSAL.render(self.prompt_budget, name=prospect.name, company=prospect.company,
+                                       role=prospect.role, pain_points=prospect.pain_points)
+        
+    def _combined_request(self, prospect, artifacts, days_since_contact, objection_text):
+        """(artifact names, prompt, generation config) for a generate_all call"""
+        names = tuple(name for name in ARTIFACTS if name in artifacts)
+        if "objection" in names and not objection_text:
+            raise ValueError("objection_text is required for the objection artifact")
+        template = prompts.combined_template(names)
+        prompt = template.render(self.prompt_budget, name=prospect.name, company=prospect.company,
+                                 role=prospect.role, interests=prospect.interests,
+                                 pain_points=prospect.pain_points, days=days_since_contact,
+                                 last_contact=prospect.last_contact, objection=objection_text)
+        config = dict(self.generation_config or {}, response_mime_type="application/json",
+                      response_schema=template.schema)
+        return names, prompt, config
+
+class SalesAgent(_AgentBase):
+    """Prompt building and generation for store.Prospect records
     
-    def delete_prospect(self):
-        if not self.prospect_listbox.curselection():
-            messagebox.showerror("Error", "Please select a prospect to delete")
-            return
+    The agent keeps no per-prospect state: every method takes the record it
+    works on, so one agent can serve generations for different prospects on
+    several threads at once.
+    """
+    def _generate(self, prompt, on_chunk=None, force=False, generation_config=None, validate=None):
+        """Send a prompt to the model, passing partial text to on_chunk as it streams in
+        
+        Responses are served from the cache when one is configured, unless force is set.
+        generation_config overrides the agent's own for this call. A fresh response is
+        only cached if validate(text), when given, does not raise.
+        """
+        config = generation_config or self.generation_config
+        key, cached = self._cached(prompt, config, force)
+        if cached is not None:
+            if on_chunk is not None:
+                on_chunk(cached)
+            return cached
+                
+        with telemetry.timer("model_call_seconds", model=self.backend.model_name):
+            if on_chunk is None:
+                text = self.backend.generate(prompt, config)
+            else:
+                parts = []
+                for part in self.backend.stream(prompt, config):
+                    parts.append(part)
+                    on_chunk(part)
+                text = "".join(parts)
+        self._record_sizes(prompt, text)
             
-        index = self.prospect_listbox.curselection()[0]
-        name = self.prospect_listbox.get(index)
+        if validate is not None:
+            validate(text)
+        if key is not None:
+            self.cache.put(key, text)
+        return text
         
-        if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete prospect '{name}'?"):
-            del self.prospects[name]
-            self.save_prospects()
-            self.update_prospect_combos()
-            self.clear_prospect_form()
-    
-    def generate_email(self):
-        if not self.sales_agent:
-            messagebox.showerror("Error", "Please initialize the API first")
-            return
-            
-        prospect_name = self.email_prospect_var.get()
-        if not prospect_name:
-            messagebox.showerror("Error", "Please select a prospect")
-            return
-            
-        prospect = self.prospects.get(prospect_name)
-        if not prospect:
-            messagebox.showerror("Error", "Selected prospect not found")
-            return
-            
-        # Set the prospect in the sales agent
-        self.sales_agent.add_prospect_data(
-            name=prospect["name"],
-            company=prospect["company"],
-            role=prospect["role"],
-            interests=prospect["interests"],
-            pain_points=prospect["pain_points"]
-        )
+    def generate_email(self, prospect, on_chunk=None, force=False):
+        """Generate a personalized email for the prospect"""
+        return self._generate(self._email_prompt(prospect), on_chunk, force)
         
-        # Generate email
-        try:
-            email = self.sales_agent.generate_email()
-            self.email_text.delete(1.0, tk.END)
-            self.email_text.insert(tk.END, email)
-            
-            # Log interaction
-            self.sales_agent.log_interaction("email", "Generated email")
-            self.prospects[prospect_name]["last_contact"] = datetime.now().strftime("%Y-%m-%d")
-            self.prospects[prospect_name]["interaction_history"].append({
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "type": "email",
-                "notes": "Generated email"
-            })
-            self.save_prospects()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate email: {str(e)}")
-    
-    def copy_email(self):
-        email_text = self.email_text.get(1.0, tk.END).strip()
-        if not email_text:
-            messagebox.showerror("Error", "No email to copy")
-            return
-            
-        self.root.clipboard_clear()
-        self.root.clipboard_append(email_text)
-        messagebox.showinfo("Success", "Email copied to clipboard")
-    
-    def generate_followup(self):
-        if not self.sales_agent:
-            messagebox.showerror("Error", "Please initialize the API first")
-            return
-            
-        prospect_name = self.followup_prospect_var.get()
-        if not prospect_name:
-            messagebox.showerror("Error", "Please select a prospect")
-            return
-            
-        prospect = self.prospects.get(prospect_name)
-        if not prospect:
-            messagebox.showerror("Error", "Selected prospect not found")
-            return
-            
+    def suggest_follow_up(self, days_since_contact, prospect, on_chunk=None, force=False):
+        """Suggest a follow-up strategy based on time since last contact"""
+        return self._generate(self._follow_up_prompt(days_since_contact, prospect), on_chunk, force)
+        
+    def analyze_objection(self, objection_text, prospect, on_chunk=None, force=False,
+                          knowledge_base=_AGENT_DEFAULT, refine=None):
+        """Analyze a sales objection and suggest responses
+        
+        With a knowledge base, an objection close enough to one analysed before
+        is answered from that analysis without a model call, or adapted by the
+        model when refine is set. knowledge_base and refine default to
+        self.objections and self.refine_objections; pass them instead of setting
+        those on an agent other threads use. force skips the knowledge base as
+        well as the cache.
+        """
+        knowledge_base, refine = self._objection_options(knowledge_base, refine)
+        match = self._known_objection(objection_text, prospect, force, knowledge_base)
+        if match is not None and not refine:
+            if on_chunk is not None:
+                on_chunk(match.analysis)
+            return match.analysis
+        analysis = self._generate(self._objection_prompt(objection_text, prospect, match), on_chunk, force)
+        self._learn_objection(objection_text, prospect, match, analysis, knowledge_base)
+        return analysis
+        
+    def create_proposal_outline(self, prospect, on_chunk=None, force=False):
+        """Generate a proposal outline tailored to the prospect"""
+        return self._generate(self._proposal_prompt(prospect), on_chunk, force)
+
+    def generate_all(self, prospect, artifacts=("email", "follow_up", "proposal"), days_since_contact=7,
+                     objection_text=None, force=False):
+        """Generate several artifacts for one prospect in a single structured call
+        
+        Returns a dict mapping each requested artifact name (see ARTIFACTS) to the
+        same text the matching single-artifact method would return. Artifacts the
+        structured response is missing, or all of them if it cannot be parsed, are
+        generated one call at a time instead.
+        """
+        names, prompt, config = self._combined_request(prospect, artifacts, days_since_contact, objection_text)
+        check = lambda text: parse_artifacts(text, names)
         try:
-            days = int(self.days_since_contact.get())
+            results = check(self._generate(prompt, force=force, generation_config=config, validate=check))
         except ValueError:
-            messagebox.showerror("Error", "Days since contact must be a number")
-            return
-            
-        # Set the prospect in the sales agent
-        self.sales_agent.add_prospect_data(
-            name=prospect["name"],
-            company=prospect["company"],
-            role=prospect["role"],
-            interests=prospect["interests"],
-            pain_points=prospect["pain_points"]
-        )
-        
-        if prospect["last_contact"]:
-            self.sales_agent.prospect_data["last_contact"] = prospect["last_contact"]
-        
-        # Generate follow-up
-        try:
-            strategy = self.sales_agent.suggest_follow_up(days)
-            self.strategy_text.delete(1.0, tk.END)
-            self.strategy_text.insert(tk.END, strategy)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate follow-up strategy: {str(e)}")
+            results = {}
+        
+        for name in names:
+            if name in results:
+                continue
+            if name == "email":
+                results[name] = self.generate_email(prospect, force=force)
+            elif name == "follow_up":
+                results[name] = self.suggest_follow_up(days_since_contact, prospect, force=force)
+            elif name == "objection":
+                results[name] = self.analyze_objection(objection_text, prospect, force=force)
+            else:
+                results[name] = self.create_proposal_outline(prospect, force=force)
+        return results
+
+class AsyncSalesAgent(_AgentBase):
+    """Coroutine versions of the SalesAgent methods for use on an event loop
     
-    def analyze_objection(self):
-        if not self.sales_agent:
-            messagebox.showerror("Error", "Please initialize the API first")
-            return
-            
-        prospect_name = self.objection_prospect_var.get()
-        if not prospect_name:
-            messagebox.showerror("Error", "Please select a prospect")
-            return
-            
-        prospect = self.prospects.get(prospect_name)
-        if not prospect:
-            messagebox.showerror("Error", "Selected prospect not found")
-            return
-            
-        objection_text = self.objection_input.get(1.0, tk.END).strip()
-        if not objection_text:
-            messagebox.showerror("Error", "Please enter an objection")
-            return
-            
-        # Set the prospect in the sales agent
-        self.sales_agent.add_prospect_data(
-            name=prospect["name"],
-            company=prospect["company"],
-            role=prospect["role"],
-            interests=prospect["interests"],
-            pain_points=prospect["pain_points"]
-        )
-        
-        # Analyze objection
-        try:
-            analysis = self.sales_agent.analyze_objection(objection_text)
-            self.response_text.delete(1.0, tk.END)
-            self.response_text.insert(tk.END, analysis)
-            
-            # Log interaction
-            self.sales_agent.log_interaction("objection", f"Handled objection: {objection_text}")
-            self.prospects[prospect_name]["interaction_history"].append({
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "type": "objection",
-                "notes": f"Handled objection: {objection_text}"
-            })
-            self.save_prospects()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to analyze objection: {str(e)}")
+    Backends with native async support (the stub, Gemini's generate_content_async)
+    wait on the loop itself, so thousands of generations can be in progress on a
+    single thread. At most max_concurrency of them call the backend at once;
+    timeout, per call or for the agent, bounds each backend call but not the
+    wait for a slot. Cancelling the awaiting task cancels the backend call.
     
-    def generate_proposal(self):
-        if not self.sales_agent:
-            messagebox.showerror("Error", "Please initialize the API first")
-            return
-            
-        prospect_name = self.proposal_prospect_var.get()
-        if not prospect_name:
-            messagebox.showerror("Error", "Please select a prospect")
-            return
+    asyncio.gather works over any number of calls, but every pending call holds
+    its task until it finishes; map() keeps only a window of them alive, which
+    keeps memory flat over very large prospect lists.
+    """
+    def __init__(self, api_key=None, backend=None, cache=None, max_concurrency=64, timeout=None):
+        # The response cache and the objection knowledge base are SQLite files; their calls
+        # run on the loop's default executor so a slow disk never stalls other coroutines
+        super().__init__(api_key, backend, cache)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.slots = None
+        
+    async def _generate(self, prompt, on_chunk=None, force=False, generation_config=None, validate=None,
+                        timeout=None):
+        config = generation_config or self.generation_config
+        key, cached = await asyncio.to_thread(self._cached, prompt, config, force)
+        if cached is not None:
+            if on_chunk is not None:
+                on_chunk(cached)
+            return cached
             
-        prospect = self.prospects.get(prospect_name)
-        if not prospect:
-            messagebox.showerror("Error", "Selected prospect not found")
-            return
+        async with self._slots():
+            started = time.perf_counter()
+            text = await asyncio.wait_for(self._call_backend(prompt, config, on_chunk), timeout or self.timeout)
+            telemetry.observe("model_call_seconds", time.perf_counter() - started, model=self.backend.model_name)
+        self._record_sizes(prompt, text)
             
-        # Set the prospect in the sales agent
-        self.sales_agent.add_prospect_data(
-            name=prospect["name"],
-            company=prospect["company"],
-            role=prospect["role"],
-            interests=prospect["interests"],
-            pain_points=prospect["pain_points"]
-        )
-        
-        # Generate proposal
-        try:
-            proposal = self.sales_agent.create_proposal_outline()
-            self.proposal_text.delete(1.0, tk.END)
-            self.proposal_text.insert(tk.END, proposal)
-            
-            # Log interaction
-            self.sales_agent.log_interaction("proposal", "Generated proposal outline")
-            self.prospects[prospect_name]["interaction_history"].append({
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "type": "proposal",
-                "notes": "Generated proposal outline"
-            })
-            self.save_prospects()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate proposal: {str(e)}")
-    
-    def save_prospects(self):
-        try:
-            with open("prospects.json", "w") as f:
-                json.dump(self.prospects, f, indent=4)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save prospects: {str(e)}")
-    
-    def load_prospects(self):
-        try:
-            if os.path.exists("prospects.json"):
-                with open("prospects.json", "r") as f:
-                    self.prospects = json.load(f)
-                self.update_prospect_combos()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load prospects: {str(e)}")
-
-class SalesAgent:
-    def __init__(self, api_key):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
-        self.conversation_history = []
-        self.prospect_data = {}
-        
-    def add_prospect_data(self, name, company, role, interests=None, pain_points=None):
-        """Store information about a sales prospect"""
-        self.prospect_data = {
-            "name": name,
-            "company": company,
-            "role": role,
-            "interests": interests or [],
-            "pain_points": pain_points or [],
-            "last_contact": None,
-            "interaction_history": []
-        }
-        
-    def log_interaction(self, interaction_type, notes):
-        """Record an interaction with the prospect"""
-        interaction = {
-            "date": datetime.now().strftime("%Y-%m-%d"),
-            "type": interaction_type,
-            "notes": notes
-        }
-        self.prospect_data["last_contact"] = datetime.now().strftime("%Y-%m-%d")
-        self.prospect_data["interaction_history"].append(interaction)
-        
-    def generate_email(self):
+        if validate is not None:
+            validate(text)
+        if key is not None:
+            await asyncio.to_thread(self.cache.put, key, text)
+        return text
+        
+    async def _call_backend(self, prompt, config, on_chunk):
+        if on_chunk is None:
+            return await self.backend.generate_async(prompt, config)
+        parts = []
+        async for part in self.backend.stream_async(prompt, config):
+            parts.append(part)
+            on_chunk(part)
+        return "".join(parts)
+        
+    def _slots(self):
+        loop = asyncio.get_running_loop()
+        if self.slots is None or self.slots[0] is not loop:
+            # asyncio primitives belong to one event loop
+            self.slots = (loop, asyncio.Semaphore(self.max_concurrency))
+        return self.slots[1]
+        
+    async def generate_email(self, prospect, on_chunk=None, force=False, timeout=None):
         """Generate a personalized email for the prospect"""
-        if not self.prospect_data:
-            return "Please add prospect data first."
-            
-        prompt = f"""
-        Generate a personalized sales email for the following prospect:
-        Name: {self.prospect_data['name']}
-        Company: {self.prospect_data['company']}
-        Role: {self.prospect_data['role']}
-        Interests: {', '.join(self.prospect_data['interests'])}
-        Pain points: {', '.join(self.prospect_data['pain_points'])}
-        
-        The email should be:
-        1. Professional but conversational
-        2. Brief (100-150 words)
-        3. Reference their pain points and interests
-        4. Include a clear call to action for a meeting
-        5. Avoid generic sales language
-        """
-        
-        response = self.model.generate_content(prompt)
-        return response.text
+        return await self._generate(self._email_prompt(prospect), on_chunk, force, timeout=timeout)
         
-    def suggest_follow_up(self, days_since_contact):
+    async def suggest_follow_up(self, days_since_contact, prospect, on_chunk=None, force=False, timeout=None):
         """Suggest a follow-up strategy based on time since last contact"""
-        prompt = f"""
-        Suggest a follow-up strategy for a prospect who hasn't responded in {days_since_contact} days.
-        Prospect info:
-        Name: {self.prospect_data['name']}
-        Company: {self.prospect_data['company']}
-        Role: {self.prospect_data['role']}
-        Last contact: {self.prospect_data['last_contact'] or 'None'}
-        
-        Provide:
-        1. A suggested follow-up channel (email, call, LinkedIn)
-        2. A brief message template
-        3. Timing recommendation
-        """
-        
-        response = self.model.generate_content(prompt)
-        return response.text
-        
-    def analyze_objection(self, objection_text):
-        """Analyze a sales objection and suggest responses"""
-        prompt = f"""
-        Analyze this sales objection and provide effective responses:
-        
-        Prospect: {self.prospect_data['name']} from {self.prospect_data['company']}
-        Objection: "{objection_text}"
-        
-        Provide:
-        1. Analysis of the underlying concern
-        2. 2-3 effective responses that address the concern
-        3. A follow-up question to better understand their needs
-        """
-        
-        response = self.model.generate_content(prompt)
-        return response.text
-        
-    def create_proposal_outline(self):
+        return await self._generate(self._follow_up_prompt(days_since_contact, prospect), on_chunk, force,
+                                    timeout=timeout)
+        
+    async def analyze_objection(self, objection_text, prospect, on_chunk=None, force=False, timeout=None,
+                                knowledge_base=_AGENT_DEFAULT, refine=None):
+        """Analyze a sales objection and suggest responses, using the knowledge base like SalesAgent does"""
+        knowledge_base, refine = self._objection_options(knowledge_base, refine)
+        match = await asyncio.to_thread(self._known_objection, objection_text, prospect, force, knowledge_base)
+        if match is not None and not refine:
+            if on_chunk is not None:
+                on_chunk(match.analysis)
+            return match.analysis
+        analysis = await self._generate(self._objection_prompt(objection_text, prospect, match), on_chunk, force,
+                                        timeout=timeout)
+        await asyncio.to_thread(self._learn_objection, objection_text, prospect, match, analysis, knowledge_base)
+        return analysis
+        
+    async def create_proposal_outline(self, prospect, on_chunk=None, force=False, timeout=None):
         """Generate a proposal outline tailored to the prospect"""
-        prompt = f"""
-        Create a sales proposal outline for:
+        return await self._generate(self._proposal_prompt(prospect), on_chunk, force, timeout=timeout)
         
-        Prospect: {self.prospect_data['name']}
-        Company: {self.prospect_data['company']}
-        Role: {self.prospect_data['role']}
-        Pain points: {', '.join(self.prospect_data['pain_points'])}
+    async def generate_all(self, prospect, artifacts=("email", "follow_up", "proposal"), days_since_contact=7,
+                           objection_text=None, force=False, timeout=None):
+        """Like SalesAgent.generate_all; fallback calls for missing artifacts run concurrently"""
+        names, prompt, config = self._combined_request(prospect, artifacts, days_since_contact, objection_text)
+        check = lambda text: parse_artifacts(text, names)
+        try:
+            results = check(await self._generate(prompt, force=force, generation_config=config, validate=check,
+                                                 timeout=timeout))
+        except ValueError:
+            results = {}
+            
+        fallbacks = {
+            "email": lambda: self.generate_email(prospect, force=force, timeout=timeout),
+            "follow_up": lambda: self.suggest_follow_up(days_since_contact, prospect, force=force, timeout=timeout),
+            "objection": lambda: self.analyze_objection(objection_text, prospect, force=force, timeout=timeout),
+            "proposal": lambda: self.create_proposal_outline(prospect, force=force, timeout=timeout),
+        }
+        missing = [name for name in names if name not in results]
+        for name, text in zip(missing, await asyncio.gather(*(fallbacks[name]() for name in missing))):
+            results[name] = text
+        return {name: results[name] for name in names}
         
-        Include:
-        1. Executive summary approach
-        2. Key sections to include
-        3. Recommended metrics/ROI to highlight
-        4. Suggested case studies or social proof
+    async def map(self, call, items, window=None):
+        """Yield (item, result, error) for await call(item) over items, in completion order
+        
+        Only window calls (max_concurrency by default) exist at any time, so items
+        may be a lazy iterator of any length.
         """
+        window = window or self.max_concurrency
+        items = iter(items)
+        pending = {}
         
-        response = self.model.generate_content(prompt)
-        return response.text
+        def start(item):
+            pending[asyncio.ensure_future(call(item))] = item
+            
+        try:
+            for item in items:
+                start(item)
+                if len(pending) >= window:
+                    break
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    item = pending.pop(task)
+                    error = task.exception()
+                    yield item, None if error else task.result(), error
+                    next_item = next(items, None)
+                    if next_item is not None:
+                        start(next_item)
+        finally:
+            for task in pending:
+                task.cancel()
+
+def parse_artifacts(text, names):
+    """Non-empty string values for names from a JSON object response; ValueError if it is not one"""
+    text = text.strip()
+    if text.startswith("```"):
+        # Some models wrap JSON in a markdown fence despite the mime type
+        text = text.strip("`").split("\n", 1)[-1]
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("structured response is not a JSON object")
+    return {name: data[name].strip() for name in names if isinstance(data.get(name), str) and data[name].strip()}
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = SalesAgentGUI(root)
-    root.mainloop()
\ No newline at end of file
+    from cli import main
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""Model backends behind SalesAgent
+
+A backend turns a prompt into text, either all at once with generate() or
+piece by piece with stream(), and has coroutine versions of both,
+generate_async() and stream_async(). GeminiBackend talks to the Gemini API;
+StubBackend answers locally with configurable latency and failures so the
+rest of the app can be exercised and benchmarked offline.
+"""
+import asyncio
+from collections import deque
+import hashlib
+import json
+import random
+import threading
+import time
+
+class ModelBackend:
+    """Interface shared by the model backends"""
+    model_name = ""
+
+    def generate(self, prompt, generation_config=None):
+        """Return the full response text for prompt"""
+        raise NotImplementedError
+
+    def stream(self, prompt, generation_config=None):
+        """Yield the response text for prompt in chunks as they arrive"""
+        yield self.generate(prompt, generation_config)
+
+    async def generate_async(self, prompt, generation_config=None):
+        """generate() as a coroutine; backends without native async support run it in a thread"""
+        return await asyncio.to_thread(self.generate, prompt, generation_config)
+
+    async def stream_async(self, prompt, generation_config=None):
+        yield await self.generate_async(prompt, generation_config)
+
+class GeminiBackend(ModelBackend):
+    def __init__(self, api_key, model_name="gemini-2.0-flash"):
+        # Importing the SDK is slow, so only pay for it when Gemini is actually used
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt, generation_config=None):
+        response = self.model.generate_content(prompt, generation_config=generation_config)
+        return response.text
+
+    def stream(self, prompt, generation_config=None):
+        for chunk in self.model.generate_content(prompt, generation_config=generation_config, stream=True):
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks carrying only finish/safety metadata have no text
+                continue
+            yield text
+
+    async def generate_async(self, prompt, generation_config=None):
+        response = await self.model.generate_content_async(prompt, generation_config=generation_config)
+        return response.text
+
+    async def stream_async(self, prompt, generation_config=None):
+        response = await self.model.generate_content_async(prompt, generation_config=generation_config, stream=True)
+        async for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                continue
+            yield text
+
+class StubError(Exception):
+    """Failure injected by StubBackend; code mirrors the HTTP status it imitates"""
+    def __init__(self, code, message):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+class StubBackend(ModelBackend):
+    """Deterministic offline backend with configurable latency and error distributions
+
+    Each call sleeps for latency seconds plus a random extra drawn from
+    latency_distribution: "fixed" (none), "uniform" (0..jitter) or
+    "exponential" (mean jitter). A fraction error_rate of calls fails with a
+    StubError whose code is drawn from error_codes. With quota set, calls
+    beyond quota in any quota_window seconds fail with a 429 the way an
+    exhausted API quota does. When the generation config asks for a JSON
+    response_schema the answer is a JSON object with a string for each of its
+    properties; a fraction malformed_rate of those answers is cut short so it
+    does not parse. Randomness comes from a seeded generator and responses are
+    derived from the prompt, so runs are repeatable.
+    """
+    def __init__(self, latency=0.5, jitter=0.0, latency_distribution="uniform", error_rate=0.0,
+                 error_codes=(500, 503), seed=0, chunks=8, model_name="stub-model", quota=None, quota_window=60.0,
+                 malformed_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.latency_distribution = latency_distribution
+        self.error_rate = error_rate
+        self.error_codes = tuple(error_codes)
+        self.chunks = chunks
+        self.model_name = model_name
+        self.quota = quota
+        self.malformed_rate = malformed_rate
+        self.quota_window = quota_window
+        self.recent = deque()
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def generate(self, prompt, generation_config=None):
+        delay, error = self._draw()
+        time.sleep(delay)
+        if error:
+            raise error
+        return self._answer(prompt, generation_config)
+
+    def stream(self, prompt, generation_config=None):
+        delay, error = self._draw()
+        if error:
+            time.sleep(delay)
+            raise error
+        for pause, chunk in self._chunks(prompt, generation_config, delay):
+            time.sleep(pause)
+            yield chunk
+
+    async def generate_async(self, prompt, generation_config=None):
+        # Sleeps on the event loop, so thousands of calls can wait on one thread
+        delay, error = self._draw()
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return self._answer(prompt, generation_config)
+
+    async def stream_async(self, prompt, generation_config=None):
+        delay, error = self._draw()
+        if error:
+            await asyncio.sleep(delay)
+            raise error
+        for pause, chunk in self._chunks(prompt, generation_config, delay):
+            await asyncio.sleep(pause)
+            yield chunk
+
+    def _chunks(self, prompt, generation_config, delay):
+        """(pause before it, text) for each streamed chunk, spreading delay over the answer"""
+        words = self._answer(prompt, generation_config).split(" ")
+        step = max(1, len(words) // self.chunks)
+        for start in range(0, len(words), step):
+            end = start + step
+            yield delay * step / len(words), " ".join(words[start:end]) + (" " if end < len(words) else "")
+
+    def _draw(self):
+        with self.lock:
+            self.calls += 1
+            if self.latency_distribution == "exponential" and self.jitter:
+                extra = self.random.expovariate(1 / self.jitter)
+            elif self.latency_distribution == "uniform":
+                extra = self.random.uniform(0, self.jitter)
+            else:
+                extra = 0.0
+            error = None
+            if self.quota is not None:
+                now = time.monotonic()
+                while self.recent and self.recent[0] <= now - self.quota_window:
+                    self.recent.popleft()
+                if len(self.recent) >= self.quota:
+                    self.errors += 1
+                    # Rejections are quick and do not use up quota
+                    return 0.0, StubError(429, "quota exceeded")
+                self.recent.append(now)
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.errors += 1
+                error = StubError(self.random.choice(self.error_codes), "injected failure")
+        return self.latency + extra, error
+
+    def _answer(self, prompt, generation_config=None):
+        first_line = next((line.strip() for line in prompt.splitlines() if line.strip()), "")
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        text = f"[{self.model_name} {digest}] Response to: {first_line} ({len(prompt)} prompt chars)"
+        schema = (generation_config or {}).get("response_schema") if isinstance(generation_config, dict) else None
+        if not schema:
+            return text
+        answer = json.dumps({key: f"{text} [{key}]" for key in schema.get("properties", {})})
+        with self.lock:
+            malformed = self.malformed_rate and self.random.random() < self.malformed_rate
+        return answer[:len(answer) // 2] if malformed else answer
@@ -0,0 +1,6 @@
+"""Offline benchmarks; run from the repository root with python -m benchmarks.<name>"""
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of values, or 0.0 when there are none"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
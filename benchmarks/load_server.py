@@ -0,0 +1,100 @@
+"""Load test for server.py against the offline stub backend
+
+Usage:
+    python -m benchmarks.load_server --clients 50 --requests 20 --distinct 10 --latency 0.2
+
+Starts the API server in-process on a throwaway store, then runs --clients
+concurrent keep-alive connections that each send --requests POSTs spread
+over --distinct prospects. With few distinct prospects most requests should
+be coalesced onto an upstream call that is already in flight. Prints a JSON
+report with latency percentiles, throughput and upstream call counts.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from agent import AsyncSalesAgent
+from backends import StubBackend
+from benchmarks import percentile
+from server import ApiServer
+from store import Prospect, SqliteProspectStore
+
+async def post(reader, writer, path, payload):
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        if key.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+async def client(port, requests, names, latencies, failures):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            status = await post(reader, writer, "/proposal", {"prospect": random.choice(names), "no_log": True})
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                failures.append(status)
+    finally:
+        writer.close()
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SqliteProspectStore(os.path.join(tmp, "load.db"))
+        names = [f"Prospect {i}" for i in range(args.distinct)]
+        store.import_prospects(Prospect(name, f"Company {i % 7}", "CTO", ["automation"], ["hiring"])
+                               for i, name in enumerate(names))
+        backend = StubBackend(latency=args.latency)
+        server = ApiServer(AsyncSalesAgent(backend=backend), store, port=0, max_concurrency=args.concurrency)
+        await server.start()
+
+        latencies = []
+        failures = []
+        started = time.perf_counter()
+        await asyncio.gather(*(client(server.port, args.requests, names, latencies, failures) for _ in range(args.clients)))
+        elapsed = time.perf_counter() - started
+
+        await server.close()
+        store.close()
+
+    return {
+        "requests": len(latencies),
+        "failures": len(failures),
+        "elapsed": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "upstream_calls": server.stats["upstream_calls"],
+        "coalesced": server.stats["coalesced"],
+        "model_calls": backend.calls,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the local API server against the stub backend")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--distinct", type=int, default=10, help="number of distinct prospects requested")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub backend latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=4, help="server upstream concurrency")
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Memory held by the desktop app's prospects for books of different sizes
+
+Usage:
+    python -m benchmarks.memory --sizes 10000 100000 --interactions 10
+
+Writes a prospects.json in the original layout, with every interaction
+inline, and imports it into a SQLite and a JSON store. Each layout is then
+loaded in a fresh interpreter and the memory it keeps alive is measured with
+tracemalloc:
+    dict     json.load of prospects.json, what the app originally kept in
+             self.prospects
+    records  Prospect records with their RECENT_HISTORY most recent
+             interactions, as the window kept them before histories were
+             paged from the store
+    compact  what the window keeps now: records without history, plus the
+             follow-up schedule
+The records and compact layouts also count the open store, since the window
+keeps it open; the JSON store holds its profiles in memory. Prints a JSON
+report with MB retained and bytes per prospect.
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+from store import JsonProspectStore, Prospect, SqliteProspectStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAYOUTS = ("dict", "records", "compact")
+KINDS = ("email", "follow_up", "objection", "proposal")
+
+def write_legacy_json(path, count, interactions):
+    prospects = {}
+    for i in range(count):
+        name = f"Prospect {i}"
+        prospects[name] = {
+            "name": name,
+            "company": f"Company {i % 2000}",
+            "role": ("CTO", "VP Sales", "Head of Operations", "Founder")[i % 4],
+            "interests": ["automation", "analytics", "security"][:1 + i % 3],
+            "pain_points": ["hiring", "churn", "reporting"][:1 + i % 3],
+            "notes": f"Met at conference {i % 40}",
+            "last_contact": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            "interaction_history": [{"date": f"2025-{1 + (i + n) % 12:02d}-{1 + n % 28:02d}",
+                                     "type": KINDS[n % len(KINDS)], "notes": f"Generated {KINDS[n % len(KINDS)]}"}
+                                    for n in range(interactions)],
+        }
+    with open(path, "w") as f:
+        json.dump(prospects, f)
+
+def open_path(path):
+    # Not open_store: a fresh .db there would be seeded from ./prospects.json
+    return SqliteProspectStore(path) if path.endswith(".db") else JsonProspectStore(path)
+
+def load(layout, path):
+    """Keep layout loaded from path alive and return the bytes it holds"""
+    from followups import FollowUpScheduler
+    from gui import RECENT_HISTORY
+    gc.collect()
+    tracemalloc.start()
+    if layout == "dict":
+        with open(path) as f:
+            held = json.load(f)
+    elif layout == "records":
+        store = open_path(path)
+        held = (store, store.load_all(history_limit=RECENT_HISTORY))
+    else:
+        store = open_path(path)
+        follow_ups = FollowUpScheduler()
+        prospects = {}
+
+        def pairs():
+            # As the window loads: schedule from each history, then keep the record without it
+            for prospect in store.iter_prospects(history_limit=RECENT_HISTORY):
+                compact = prospects[prospect.name] = prospect.replace(interaction_history=())
+                yield compact, prospect.interaction_history
+
+        follow_ups.build_from(pairs())
+        held = (store, follow_ups, prospects)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"bytes": current, "peak_bytes": peak}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare memory held by prospect layouts")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--interactions", type=int, default=10, help="interactions per prospect")
+    parser.add_argument("--child", nargs=2, metavar=("LAYOUT", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        print(json.dumps(load(*args.child)))
+        return
+
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            legacy = os.path.join(tmp, f"legacy-{size}.json")
+            write_legacy_json(legacy, size, args.interactions)
+            paths = {"dict": [legacy]}
+            paths["records"] = paths["compact"] = []
+            for fmt in ("db", "json"):
+                path = os.path.join(tmp, f"memory-{size}.{fmt}")
+                with open(legacy) as f:
+                    prospects = [Prospect.from_dict(data) for data in json.load(f).values()]
+                store = open_path(path)
+                store.import_prospects(prospects)
+                store.close()
+                del prospects
+                paths["records"].append(path)
+            for layout in LAYOUTS:
+                for path in paths[layout]:
+                    output = subprocess.run([sys.executable, "-m", "benchmarks.memory", "--child", layout, path],
+                                            cwd=ROOT, capture_output=True, text=True, check=True).stdout
+                    result = json.loads(output)
+                    result = {
+                        "prospects": size,
+                        "layout": layout,
+                        "store": os.path.splitext(path)[1][1:] if layout != "dict" else "prospects.json",
+                        "mb": round(result["bytes"] / 2**20, 1),
+                        "peak_mb": round(result["peak_bytes"] / 2**20, 1),
+                        "bytes_per_prospect": result["bytes"] // size,
+                    }
+                    report.append(result)
+                    print(json.dumps(result), file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Desktop app startup time for stores of different sizes
+
+Usage:
+    python -m benchmarks.startup --sizes 1000 10000 100000 --formats db json
+
+Builds a throwaway store per size and format, then measures each startup
+stage in a fresh interpreter so imports are cold:
+    import       import gui, and whether that pulled in the Gemini SDK
+    eager        what the window used to wait for before its first paint:
+                 open the store, load_all, build the search indexes and the
+                 follow-up schedule
+    first_chunk  open the store and read the first gui.LOAD_CHUNK prospects,
+                 which is when the list starts filling in now
+    staged       the whole background load: every chunk plus the indexes
+                 and schedule built on the worker thread
+With a display (DISPLAY set) and --window, also opens the real window and
+reports the time to its first paint and until loading has finished. Prints a
+JSON report with seconds per stage, the best of --repeat runs.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from store import JsonProspectStore, Prospect, SqliteProspectStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ("import", "eager", "first_chunk", "staged")
+
+def make_store(path, count):
+    store = SqliteProspectStore(path) if path.endswith(".db") else JsonProspectStore(path)
+    store.import_prospects(Prospect(
+        name=f"Prospect {i}",
+        company=f"Company {i % 500}",
+        role=("CTO", "VP Sales", "Head of Operations")[i % 3],
+        interests=["automation", "analytics"][:1 + i % 2],
+        pain_points=["hiring", "churn", "reporting"][:1 + i % 3],
+        notes=f"Met at conference {i % 40}",
+        last_contact=f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+        interaction_history=[{"date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", "type": kind, "notes": f"Generated {kind}"}
+                             for kind in ("email", "proposal")],
+    ) for i in range(count))
+    store.close()
+
+def run_stage(stage, path):
+    """Seconds the stage took, run in the current interpreter"""
+    started = time.perf_counter()
+    if stage == "import":
+        import gui
+        return {"seconds": time.perf_counter() - started, "sdk_imported": "google.generativeai" in sys.modules}
+
+    from followups import FollowUpScheduler
+    from gui import LOAD_CHUNK, RECENT_HISTORY
+    from search import PrefixIndex, ProspectSearchIndex
+    from store import open_store
+    started = time.perf_counter()
+    store = open_store(path)
+    if stage == "eager":
+        prospects = list(store.load_all(history_limit=RECENT_HISTORY).values())
+    else:
+        prospects = []
+        for prospect in store.iter_prospects(history_limit=RECENT_HISTORY, batch_size=LOAD_CHUNK):
+            prospects.append(prospect)
+            if stage == "first_chunk" and len(prospects) == LOAD_CHUNK:
+                break
+    if stage != "first_chunk":
+        PrefixIndex().build(prospects)
+        ProspectSearchIndex().build(prospects)
+        FollowUpScheduler().build(prospects)
+    elapsed = time.perf_counter() - started
+    store.close()
+    return {"seconds": elapsed}
+
+def run_window(path):
+    """Seconds to the window's first paint and to the end of loading"""
+    import tkinter as tk
+    from gui import SalesAgentGUI
+    started = time.perf_counter()
+    root = tk.Tk()
+    app = SalesAgentGUI(root, store_path=path)
+    root.update()
+    painted = time.perf_counter() - started
+    while app.loading or app.store is None:
+        root.update()
+        time.sleep(0.001)
+    loaded = time.perf_counter() - started
+    root.destroy()
+    return {"first_paint": painted, "loaded": loaded}
+
+def measure(stage, path, repeat):
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-m", "benchmarks.startup", "--child", stage, path],
+                                cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output)
+        key = "seconds" if "seconds" in result else "loaded"
+        if best is None or result[key] < best[key]:
+            best = result
+    return {key: round(value, 4) if isinstance(value, float) else value for key, value in best.items()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure desktop app startup stages for several store sizes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--formats", nargs="+", choices=("db", "json"), default=["db", "json"])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the fastest is reported")
+    parser.add_argument("--window", action="store_true", help="also time the real window (needs a display)")
+    parser.add_argument("--child", nargs=2, metavar=("STAGE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        stage, path = args.child
+        print(json.dumps(run_window(path) if stage == "window" else run_stage(stage, path)))
+        return
+
+    stages = STAGES + (("window",) if args.window and os.environ.get("DISPLAY") else ())
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            for fmt in args.formats:
+                path = os.path.join(tmp, f"startup-{size}.{fmt}")
+                make_store(path, size)
+                result = {"prospects": size, "format": fmt}
+                for stage in stages:
+                    result[stage] = measure(stage, path, args.repeat)
+                report.append(result)
+                print(json.dumps(result), file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
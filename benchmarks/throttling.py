@@ -0,0 +1,101 @@
+"""Throttling benchmark: bulk load against a stub with a hard quota
+
+Usage:
+    python -m benchmarks.throttling --quota 20 --window 1 --rpm 3000 --bulk 300
+    python -m benchmarks.throttling --error-rate 0.1 --failure-threshold 3
+
+The stub backend lets --quota requests start per --window seconds and answers
+429 to the rest. --workers threads push --bulk requests through it while one
+more thread sends an interactive request every --interactive-every seconds.
+Three setups are compared:
+    raw         no client-side flow control; every 429 is a failed request
+    one-lane    ThrottledBackend with interactive requests queued like bulk ones
+    lanes       ThrottledBackend with interactive requests in their own lane
+The JSON report shows success counts, throughput, interactive latency and the
+throttle's own counters for each setup.
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import StubBackend
+from benchmarks import percentile
+from throttle import BULK, INTERACTIVE, ThrottledBackend
+
+def run(setup, args):
+    stub = StubBackend(latency=args.latency, error_rate=args.error_rate, quota=args.quota,
+                       quota_window=args.window, seed=args.seed)
+    if setup == "raw":
+        bulk = interactive = stub
+    else:
+        shared = ThrottledBackend(stub, requests_per_minute=args.rpm, base_delay=args.base_delay,
+                                  max_retries=args.retries, failure_threshold=args.failure_threshold,
+                                  reset_timeout=args.reset_timeout, priority=BULK, seed=args.seed)
+        bulk = shared
+        interactive = shared.lane(INTERACTIVE if setup == "lanes" else BULK)
+
+    results = {"bulk_ok": 0, "bulk_failed": 0, "interactive_ok": 0, "interactive_failed": 0}
+    lock = threading.Lock()
+    interactive_latencies = []
+    done = threading.Event()
+
+    def call(backend, kind, i):
+        try:
+            backend.generate(f"{kind} request {i}")
+            outcome = "ok"
+        except Exception:
+            outcome = "failed"
+        with lock:
+            results[f"{kind}_{outcome}"] += 1
+
+    def interactive_loop():
+        i = 0
+        while not done.is_set():
+            started = time.perf_counter()
+            call(interactive, "interactive", i)
+            interactive_latencies.append(time.perf_counter() - started)
+            i += 1
+            done.wait(args.interactive_every)
+
+    started = time.perf_counter()
+    user = threading.Thread(target=interactive_loop)
+    user.start()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for i in range(args.bulk):
+            executor.submit(call, bulk, "bulk", i)
+    done.set()
+    user.join()
+    elapsed = time.perf_counter() - started
+
+    report = dict(results, setup=setup, elapsed=round(elapsed, 3),
+                  bulk_per_second=round(results["bulk_ok"] / elapsed, 1),
+                  interactive_p50_ms=round(percentile(interactive_latencies, 0.50) * 1000, 1),
+                  interactive_p95_ms=round(percentile(interactive_latencies, 0.95) * 1000, 1),
+                  backend_calls=stub.calls, backend_errors=stub.errors)
+    if setup != "raw":
+        report["throttle"] = shared.stats()
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ThrottledBackend against a quota-limited stub")
+    parser.add_argument("--quota", type=int, default=20, help="stub requests allowed per window")
+    parser.add_argument("--window", type=float, default=1.0, help="stub quota window in seconds")
+    parser.add_argument("--rpm", type=int, default=3000, help="throttle ceiling in requests per minute")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="extra injected 500/503 errors")
+    parser.add_argument("--bulk", type=int, default=300, help="bulk requests to send")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--interactive-every", type=float, default=0.25)
+    parser.add_argument("--base-delay", type=float, default=0.05, help="first retry backoff in seconds")
+    parser.add_argument("--retries", type=int, default=6)
+    parser.add_argument("--failure-threshold", type=int, default=5)
+    parser.add_argument("--reset-timeout", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--setups", nargs="+", choices=("raw", "one-lane", "lanes"), default=["raw", "one-lane", "lanes"])
+    args = parser.parse_args(argv)
+    print(json.dumps([run(setup, args) for setup in args.setups], indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+class ResponseCache:
+    """Persistent cache of model responses, keyed by model name, prompt and generation config
+
+    Entries live in a small SQLite database. Lookups refresh an entry's access
+    time so eviction drops the least recently used entries first once the cache
+    grows past max_entries or max_bytes. Entries older than ttl seconds are
+    treated as misses and removed.
+
+    A hit does not write to the database: access times are held in memory and
+    written in batches of touch_batch, and always before eviction reads them.
+    The entry count and byte total are kept up to date as entries come and
+    go rather than counted on every put, and recounted whenever expired
+    entries are swept, at most every sweep_interval seconds.
+    """
+    def __init__(self, path="response_cache.db", max_entries=5000, max_bytes=50 * 1024 * 1024, ttl=7 * 24 * 3600,
+                 touch_batch=100, sweep_interval=3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.touch_batch = touch_batch
+        self.sweep_interval = sweep_interval
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        # key -> access time not yet written
+        self.touched = {}
+        self.swept = 0.0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        self.conn.commit()
+        self._recount()
+
+    @staticmethod
+    def make_key(model_name, prompt, config=None):
+        payload = json.dumps([model_name, prompt, config], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached response for key, or None on a miss"""
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT response, created, size FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and self.ttl and now - row[1] > self.ttl:
+                self._delete([(key, row[2])])
+                self.conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.touched[key] = now
+            if len(self.touched) >= self.touch_batch:
+                self._flush_touches()
+                self.conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def peek(self, key):
+        """Like get, but without counting a hit or miss or refreshing the entry"""
+        with self.lock:
+            row = self.conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or (self.ttl and time.time() - row[1] > self.ttl):
+            return None
+        return row[0]
+
+    def put(self, key, response):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self.lock:
+            old = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now)
+            )
+            self.touched.pop(key, None)
+            if old is None:
+                self.count += 1
+                self.bytes += size
+            else:
+                self.bytes += size - old[0]
+            self._evict(now)
+            self.conn.commit()
+
+    def _evict(self, now):
+        if self.ttl and now - self.swept >= self.sweep_interval:
+            self.conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            self.swept = now
+            self._recount()
+        if self.count <= self.max_entries and self.bytes <= self.max_bytes:
+            return
+        # Eviction goes by access time, so pending ones must be in the table first
+        self._flush_touches()
+        if self.count > self.max_entries:
+            self._delete(self.conn.execute("SELECT key, size FROM responses ORDER BY accessed LIMIT ?",
+                                           (self.count - self.max_entries,)).fetchall())
+        if self.bytes > self.max_bytes:
+            stale = []
+            total = self.bytes
+            for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+                if total <= self.max_bytes:
+                    break
+                stale.append((key, size))
+                total -= size
+            self._delete(stale)
+
+    def _delete(self, entries):
+        """Delete (key, size) entries and take them off the running totals"""
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key, _ in entries])
+        for key, size in entries:
+            self.touched.pop(key, None)
+            self.count -= 1
+            self.bytes -= size
+
+    def _flush_touches(self):
+        if self.touched:
+            self.conn.executemany("UPDATE responses SET accessed = ? WHERE key = ?",
+                                  [(accessed, key) for key, accessed in self.touched.items()])
+            self.touched = {}
+
+    def _recount(self):
+        self.count, self.bytes = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+            self.touched = {}
+            self.count = self.bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": self.count, "bytes": self.bytes}
+
+    def close(self):
+        with self.lock:
+            self._flush_touches()
+            self.conn.commit()
+            self.conn.close()
@@ -0,0 +1,179 @@
+"""Batch email generation for a campaign over many prospects
+
+Usage:
+    python campaign.py --output campaign.jsonl --company "Mind Bridge" --rpm 60
+    python campaign.py --output campaign.jsonl --query "role:cto pain_points:hiring until:2025-03-31"
+    python campaign.py --output bench.jsonl --fake --fake-latency 0.2 --concurrency 32
+    python campaign.py --output bench.jsonl --fake --fake-quota 30 --rpm 120
+    python campaign.py --output bench.jsonl --fake --metrics metrics.prom --profile
+
+Results are appended to the output file as JSON lines, one per prospect.
+Re-running with the same output file skips prospects that already have an
+email, so a crashed or interrupted campaign picks up where it stopped.
+Requests go through a throttle.ThrottledBackend in the bulk lane: --rpm is
+its ceiling and it slows down on its own when the API answers 429.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from search import ProspectSearchIndex
+from store import DEFAULT_STORE, open_store
+import telemetry
+
+class RateLimiter:
+    """Space out calls so that at most requests_per_minute start in any minute"""
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def filter_prospects(prospects, company=None, role=None, contacted_before=None, names=None):
+    """Yield prospects matching every filter that is set"""
+    for prospect in prospects:
+        if names and prospect.name not in names:
+            continue
+        if company and prospect.company.lower() != company.lower():
+            continue
+        if role and role.lower() not in prospect.role.lower():
+            continue
+        if contacted_before and (prospect.last_contact or "") >= contacted_before:
+            continue
+        yield prospect
+
+def completed_names(output_path):
+    """Names that already have a generated email in output_path"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A crash can leave a half-written last line behind
+                continue
+            if "email" in record:
+                done.add(record["name"])
+    return done
+
+def run_campaign(agent, prospects, output_path, concurrency=8, requests_per_minute=60, progress=None):
+    """Generate an email for every prospect and append the results to output_path
+
+    At most concurrency requests are in flight and no more than
+    requests_per_minute are started per minute. progress(done, total, record)
+    is called from worker threads after each prospect. Failed prospects are
+    recorded with an "error" key and retried on the next run.
+    """
+    done = completed_names(output_path)
+    pending = [p for p in prospects if p.name not in done]
+    total = len(pending)
+    limiter = RateLimiter(requests_per_minute)
+    write_lock = threading.Lock()
+    summary = {"total": total, "skipped": len(done), "succeeded": 0, "failed": 0}
+    started = time.monotonic()
+
+    def generate(prospect):
+        limiter.wait()
+        record = {"name": prospect.name, "company": prospect.company}
+        try:
+            record["email"] = agent.generate_email(prospect)
+            record["generated_at"] = datetime.now().isoformat(timespec="seconds")
+        except Exception as e:
+            record["error"] = str(e)
+        with write_lock:
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            summary["failed" if "error" in record else "succeeded"] += 1
+            finished = summary["succeeded"] + summary["failed"]
+        if progress:
+            progress(finished, total, record)
+
+    with open(output_path, "a") as out, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # Keep a bounded window of futures so huge prospect lists are not all queued at once
+        in_flight = set()
+        for prospect in pending:
+            if len(in_flight) >= concurrency * 2:
+                _, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            in_flight.add(executor.submit(generate, prospect))
+        wait(in_flight)
+
+    summary["elapsed"] = time.monotonic() - started
+    summary["per_second"] = total / summary["elapsed"] if summary["elapsed"] else 0.0
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate campaign emails for many prospects")
+    parser.add_argument("--prospects", default=DEFAULT_STORE, help="prospect store to read (.db or .json)")
+    parser.add_argument("--output", required=True, help="JSON lines file to append results to")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=int, default=60, help="requests per minute, 0 for unlimited")
+    parser.add_argument("--query", help="only prospects matching this search query (see search.ProspectSearchIndex)")
+    parser.add_argument("--company", help="only prospects at this company")
+    parser.add_argument("--role", help="only prospects whose role contains this text")
+    parser.add_argument("--contacted-before", help="only prospects last contacted before YYYY-MM-DD")
+    parser.add_argument("--api-key", default=os.environ.get("GEMINI_API_KEY"))
+    parser.add_argument("--fake", action="store_true", help="use the offline stub backend")
+    parser.add_argument("--fake-latency", type=float, default=0.5)
+    parser.add_argument("--fake-quota", type=int, help="stub requests allowed per minute before it answers 429")
+    parser.add_argument("--metrics", help="write latency and token metrics here (.json, or .prom for Prometheus text)")
+    parser.add_argument("--profile", action="store_true", help="print a cProfile report of the model calls to stderr")
+    args = parser.parse_args(argv)
+
+    from agent import SalesAgent
+    from backends import GeminiBackend, StubBackend
+    from throttle import BULK, ThrottledBackend
+    if args.fake:
+        backend = StubBackend(latency=args.fake_latency, quota=args.fake_quota)
+    elif args.api_key:
+        backend = GeminiBackend(args.api_key)
+    else:
+        parser.error("--api-key or GEMINI_API_KEY is required unless --fake is given")
+    backend = ThrottledBackend(backend, requests_per_minute=args.rpm, priority=BULK)
+    agent = SalesAgent(backend=backend)
+
+    store = open_store(args.prospects)
+    records = store.load_all(history_limit=0)
+    store.close()
+    if args.query:
+        index = ProspectSearchIndex()
+        index.build(records.values())
+        prospects = [records[name] for name in index.search(args.query)]
+    else:
+        prospects = list(records.values())
+    selected = list(filter_prospects(prospects, args.company, args.role, args.contacted_before))
+
+    def progress(done, total, record):
+        status = "error" if "error" in record else "ok"
+        print(f"\r[{done}/{total}] {record['name']}: {status}", end="", file=sys.stderr, flush=True)
+
+    if args.profile:
+        telemetry.start_profiling()
+    # The throttled backend does the rate limiting, adaptively
+    summary = run_campaign(agent, selected, args.output, args.concurrency, 0, progress)
+    summary["backend"] = backend.stats()
+    print(file=sys.stderr)
+    if args.profile:
+        print(telemetry.stop_profiling(), file=sys.stderr)
+    if args.metrics:
+        telemetry.dump(args.metrics)
+    print(json.dumps(summary))
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""Headless entry point for cron jobs and servers
+
+Usage:
+    python -m agent list [--query QUERY] [--limit N]
+    python -m agent show --prospect NAME [--history N]
+    python -m agent generate-email --prospect NAME [--prospect NAME ...]
+    python -m agent generate-email --query "company:acme role:cto"
+    python -m agent follow-up --prospect NAME [--days N]
+    python -m agent due [--limit N] [--suggest]
+    python -m agent objection --prospect NAME --text "Too expensive"
+    python -m agent proposal --prospect NAME
+
+Every command writes JSON lines to stdout, one object per prospect. Failures
+are reported as {"prospect": ..., "error": ...} lines and a non-zero exit
+status. Without a command the desktop app starts instead.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime
+
+from objections import NOTE_PREFIX
+from store import DEFAULT_STORE, open_store
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--store", default=DEFAULT_STORE, help="prospect store (.db or .json)")
+    common.add_argument("--api-key", default=os.environ.get("GEMINI_API_KEY"))
+    common.add_argument("--fake", action="store_true", help="use the offline stub backend")
+    common.add_argument("--no-cache", action="store_true", help="do not use the response cache")
+    common.add_argument("--force", action="store_true", help="bypass cached responses")
+    common.add_argument("--no-log", action="store_true", help="do not record interactions in the store")
+
+    def targets(command):
+        command.add_argument("--prospect", action="append", default=[], help="prospect name, may be repeated")
+        command.add_argument("--query", help="every prospect matching this search query")
+
+    parser = argparse.ArgumentParser(prog="python -m agent", description="Headless sales agent")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("list", parents=[common], help="list prospects")
+    command.add_argument("--query", default="")
+    command.add_argument("--limit", type=int)
+
+    command = commands.add_parser("show", parents=[common], help="show prospects with their history")
+    targets(command)
+    command.add_argument("--history", type=int, help="only the most recent N interactions")
+
+    command = commands.add_parser("generate-email", parents=[common], help="generate outreach emails")
+    targets(command)
+
+    command = commands.add_parser("follow-up", parents=[common], help="suggest follow-up strategies")
+    targets(command)
+    command.add_argument("--days", type=int, help="days since last contact, derived from the store by default")
+
+    command = commands.add_parser("due", parents=[common], help="list prospects due a follow-up today")
+    command.add_argument("--limit", type=int, help="only the N most overdue")
+    command.add_argument("--suggest", action="store_true", help="also suggest a follow-up strategy for each")
+
+    command = commands.add_parser("objection", parents=[common], help="analyze an objection")
+    targets(command)
+    command.add_argument("--text", required=True)
+
+    command = commands.add_parser("proposal", parents=[common], help="generate proposal outlines")
+    targets(command)
+
+    command = commands.add_parser("import", parents=[common], help="import prospects from a CSV or JSONL file")
+    command.add_argument("path")
+    command.add_argument("--skip-existing", action="store_true", help="leave prospects already in the store unchanged")
+    command.add_argument("--batch-size", type=int, default=1000, help="prospects written per transaction")
+
+    command = commands.add_parser("export", parents=[common], help="export every prospect to a CSV or JSONL file")
+    command.add_argument("path")
+    command.add_argument("--history", action="store_true", help="include interaction history (JSONL only)")
+    return parser
+
+def emit(record):
+    sys.stdout.write(json.dumps(record) + "\n")
+    sys.stdout.flush()
+
+def make_agent(args):
+    from agent import SalesAgent
+    from cache import ResponseCache
+    from objections import ObjectionKnowledgeBase
+    cache = None if args.no_cache else ResponseCache("response_cache.db")
+    if args.fake:
+        from backends import StubBackend
+        agent = SalesAgent(backend=StubBackend(latency=0), cache=cache)
+    elif not args.api_key:
+        raise SystemExit("--api-key or GEMINI_API_KEY is required unless --fake is given")
+    else:
+        agent = SalesAgent(api_key=args.api_key, cache=cache)
+    if cache is not None:
+        # Past analyses are another kind of cached response
+        agent.objections = ObjectionKnowledgeBase("objections.db")
+    return agent
+
+def select(prospects, args):
+    """Resolve --prospect and --query into (name, prospect or None) pairs"""
+    names = list(args.prospect)
+    if args.query:
+        from search import ProspectSearchIndex
+        index = ProspectSearchIndex()
+        index.build(prospects.values())
+        names.extend(name for name in index.search(args.query) if name not in names)
+    return [(name, prospects.get(name)) for name in names]
+
+def days_since(last_contact):
+    if not last_contact:
+        return 7
+    return (date.today() - datetime.strptime(last_contact, "%Y-%m-%d").date()).days
+
+def run_generation(args, store, prospects):
+    agent = make_agent(args)
+    failed = False
+    for name, prospect in select(prospects, args):
+        if prospect is None:
+            emit({"prospect": name, "error": "prospect not found"})
+            failed = True
+            continue
+        try:
+            if args.command == "generate-email":
+                record = {"email": agent.generate_email(prospect, force=args.force)}
+                interaction = ("email", "Generated email", True)
+            elif args.command == "follow-up":
+                days = args.days if args.days is not None else days_since(prospect.last_contact)
+                record = {"days_since_contact": days, "strategy": agent.suggest_follow_up(days, prospect, force=args.force)}
+                interaction = None
+            elif args.command == "objection":
+                record = {"analysis": agent.analyze_objection(args.text, prospect, force=args.force)}
+                interaction = ("objection", NOTE_PREFIX + args.text, False)
+            else:
+                record = {"proposal": agent.create_proposal_outline(prospect, force=args.force)}
+                interaction = ("proposal", "Generated proposal outline", False)
+        except Exception as e:
+            emit({"prospect": name, "error": str(e)})
+            failed = True
+            continue
+        if interaction and not args.no_log:
+            store.record_interaction(name, *interaction)
+        emit(dict({"prospect": name}, **record))
+    return 1 if failed else 0
+
+def run_due(args, store):
+    from followups import FollowUpScheduler
+    prospects = {}
+
+    def pairs():
+        # Every follow-up since the last contact counts, so read whole histories, one page at a time
+        for prospect in store.iter_prospects(history_limit=None):
+            compact = prospects[prospect.name] = prospect.replace(interaction_history=())
+            yield compact, prospect.interaction_history
+
+    scheduler = FollowUpScheduler()
+    scheduler.build_from(pairs())
+    agent = make_agent(args) if args.suggest else None
+    failed = False
+    for name, days, overdue, _ in scheduler.due_today(limit=args.limit):
+        record = {"prospect": name, "days_since_contact": days, "days_overdue": overdue}
+        if agent is not None:
+            try:
+                record["strategy"] = agent.suggest_follow_up(days, prospects[name], force=args.force)
+            except Exception as e:
+                record["error"] = str(e)
+                failed = True
+        emit(record)
+    return 1 if failed else 0
+
+def run_transfer(args, store):
+    import transfer
+    try:
+        if args.command == "import":
+            def progress(done, total, summary):
+                print(f"\r{100 * done // max(total, 1)}% {summary['rows']} rows", end="", file=sys.stderr, flush=True)
+            summary = transfer.import_prospects(store, args.path, args.batch_size,
+                                                "skip" if args.skip_existing else "update", progress)
+            print(file=sys.stderr)
+            emit(summary)
+        else:
+            emit({"exported": transfer.export_prospects(store, args.path, args.history)})
+    except (OSError, ValueError) as e:
+        emit({"error": str(e)})
+        return 1
+    return 0
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        from gui import main as run_gui
+        run_gui()
+        return 0
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command not in ("list", "due", "import", "export") and not args.prospect and not args.query:
+        parser.error("give at least one --prospect or a --query")
+    store = open_store(args.store)
+    try:
+        if args.command == "list":
+            prospects = store.load_all(history_limit=0)
+            if args.query:
+                from search import ProspectSearchIndex
+                index = ProspectSearchIndex()
+                index.build(prospects.values())
+                names = index.search(args.query, args.limit)
+            else:
+                names = list(prospects)[:args.limit]
+            for name in names:
+                emit(prospects[name].to_dict(history=False))
+            return 0
+        if args.command in ("import", "export"):
+            return run_transfer(args, store)
+        if args.command == "due":
+            return run_due(args, store)
+
+        prospects = store.load_all(history_limit=0)
+        if args.command == "show":
+            missing = False
+            for name, prospect in select(prospects, args):
+                if prospect is None:
+                    emit({"prospect": name, "error": "prospect not found"})
+                    missing = True
+                    continue
+                emit(dict(prospect.to_dict(), interaction_history=store.get_history(name, args.history)))
+            return 1 if missing else 0
+        return run_generation(args, store, prospects)
+    finally:
+        store.close()
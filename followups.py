@@ -0,0 +1,292 @@
+"""Follow-up scheduling for every contacted prospect
+
+A prospect's last touch is the later of last_contact and its newest logged
+interaction. Its next follow-up is due a cadence interval after that: the
+first CADENCE[0] days after the last touch, and further apart for each
+"follow_up" interaction logged since last_contact without a reply. Prospects
+never contacted have nothing to follow up and are left out.
+
+FollowUpScheduler keeps prospects that are not due yet in a heap ordered by
+due date and moves them, in that order, onto the end of a sorted due list as
+their day arrives, so the "due today" view is a slice of that list. update()
+after a save and record() after an interaction is logged re-queue one prospect
+in O(log n); entries they replace are skipped lazily when they reach the top
+of the heap. Both keep the touches already scheduled for records held without
+their history.
+
+start() runs a background thread that, every interval seconds, asks the model
+for follow-up strategies for up to batch_size due prospects that do not have
+one yet. It uses the bulk lane of a throttle.ThrottledBackend when there is
+one, so it never holds up requests the rep is waiting on.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from bisect import bisect_left, insort
+from datetime import date
+from functools import lru_cache
+import heapq
+import threading
+
+from agent import SalesAgent
+from throttle import BULK
+
+# Days from the last touch to each successive follow-up
+CADENCE = (3, 7, 14, 30)
+
+@lru_cache(maxsize=4096)
+def _ordinal(value):
+    """Day number of a YYYY-MM-DD string; dates repeat a lot across prospects"""
+    try:
+        return date.fromisoformat(value[:10]).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+def touches(prospect, history=None):
+    """(last touch, follow-ups since last contact, last contact) as day ordinals, or None if never contacted
+
+    history defaults to the prospect's own interaction_history.
+    """
+    history = prospect.interaction_history if history is None else history
+    contact = _ordinal(prospect.last_contact) if prospect.last_contact else None
+    if not history:
+        return None if contact is None else (contact, 0, contact)
+    logged = [(_ordinal(interaction.get("date")), interaction.get("type")) for interaction in history]
+    logged = [(day, kind) for day, kind in logged if day is not None]
+    last_touch = max([day for day, _ in logged] + ([contact] if contact is not None else []), default=None)
+    if last_touch is None:
+        return None
+    # Follow-ups logged since the last real contact push the next one further out
+    attempts = sum(1 for day, kind in logged if kind == "follow_up" and (contact is None or day > contact))
+    return last_touch, attempts, contact
+
+def schedule(prospect, cadence=CADENCE, history=None):
+    """(due day ordinal, last touch ordinal) for a prospect, or None if it was never contacted"""
+    touched = touches(prospect, history)
+    if touched is None:
+        return None
+    last_touch, attempts, _ = touched
+    return last_touch + cadence[min(attempts, len(cadence) - 1)], last_touch
+
+class FollowUpScheduler:
+    """Heap of prospects by next follow-up date with a due set and background suggestions"""
+    def __init__(self, cadence=CADENCE):
+        self.cadence = cadence
+        self.lock = threading.Lock()
+        self.heap = []
+        # name -> [due, last touch, version, prospect, follow-ups since last contact, last contact];
+        # version invalidates older heap entries
+        self.entries = {}
+        # (due, name) for every prospect due by today, most overdue first
+        self.due = []
+        self.today = None
+        self.version = 0
+        # name -> (due, strategy) for suggestions made in the background
+        self.suggestions = {}
+        # The bulk-lane agent made by start(), used by the background thread
+        self.agent = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+        self.counts = {"suggested": 0, "failed": 0}
+
+    def build(self, prospects, today=None):
+        """Replace the schedule with one for prospects, each scheduled from its own history"""
+        self.build_from(((prospect, None) for prospect in prospects), today)
+
+    def build_from(self, pairs, today=None):
+        """Replace the schedule with one for (prospect, history) pairs
+
+        The new schedule is put together without holding the lock, so pairs
+        may be a generator reading the store while the window keeps using the
+        old schedule, and no history outlives its own pair.
+        """
+        fresh = FollowUpScheduler(self.cadence)
+        fresh.today = (today or date.today()).toordinal()
+        for prospect, history in pairs:
+            fresh._add(prospect, push=False, touched=touches(prospect, history))
+        heapq.heapify(fresh.heap)
+        fresh.due.sort()
+        with self.lock:
+            self.entries, self.heap, self.due = fresh.entries, fresh.heap, fresh.due
+            self.today, self.version = fresh.today, fresh.version
+            self.suggestions = {name: suggestion for name, suggestion in self.suggestions.items()
+                                if name in self.entries and self.entries[name][0] == suggestion[0]}
+            self._advance(today)
+
+    def update(self, prospect, history=None):
+        """Reschedule one prospect after it was saved
+
+        history, if given, is scheduled from instead of the prospect's own. A
+        record that carries no history, like those the window keeps, keeps the
+        last touch and follow-up count it was scheduled with; only a newer
+        last_contact moves it.
+        """
+        with self.lock:
+            entry = self.entries.get(prospect.name)
+            if history is None and not prospect.interaction_history and entry is not None:
+                touched = _carried(entry, prospect)
+            else:
+                touched = touches(prospect, history)
+            self._remove(prospect.name)
+            self._add(prospect, push=True, touched=touched)
+            self._advance(None)
+
+    def record(self, prospect, interaction):
+        """Reschedule after interaction was logged; prospect is the record as updated by it"""
+        with self.lock:
+            entry = self.entries.get(prospect.name)
+            touched = _carried(entry, prospect) if entry is not None else touches(prospect, ())
+            day = _ordinal(interaction.get("date"))
+            if day is not None:
+                last_touch, attempts, contact = touched or (day, 0, None)
+                if interaction.get("type") == "follow_up" and (contact is None or day > contact):
+                    attempts += 1
+                touched = max(last_touch, day), attempts, contact
+            self._remove(prospect.name)
+            self._add(prospect, push=True, touched=touched)
+            self._advance(None)
+
+    def remove(self, name):
+        with self.lock:
+            self._remove(name)
+
+    def due_today(self, today=None, limit=None):
+        """[(name, days since last touch, days overdue, has suggestion)] for due prospects, most overdue first"""
+        with self.lock:
+            self._advance(today)
+            return [(name, self.today - self.entries[name][1], self.today - due, self._suggestion(name) is not None)
+                    for due, name in self.due[:limit]]
+
+    def due_count(self, today=None):
+        with self.lock:
+            self._advance(today)
+            return len(self.due)
+
+    def days_since(self, name, today=None):
+        """Days since the prospect's last touch, or None if unknown"""
+        with self.lock:
+            entry = self.entries.get(name)
+            return None if entry is None else (today or date.today()).toordinal() - entry[1]
+
+    def suggestion(self, name):
+        with self.lock:
+            return self._suggestion(name)
+
+    def start(self, agent, interval=3600.0, batch_size=20, max_workers=2):
+        """Prepare follow-up strategies for due prospects every interval seconds in the background"""
+        self.stop()
+        backend = agent.backend.lane(BULK) if hasattr(agent.backend, "lane") else agent.backend
+        # A private agent on the bulk lane sharing the cache, so the rep's own requests hit it too
+        self.agent = SalesAgent(backend=backend, cache=agent.cache)
+        self.agent.generation_config = agent.generation_config
+        self.agent.prompt_budget = agent.prompt_budget
+        self.stop_event = threading.Event()
+        # stop() leaves it set, which would skip the first wait
+        self.wake_event.clear()
+        self.thread = threading.Thread(target=self._run,
+                                       args=(self.agent, interval, batch_size, max_workers, self.stop_event),
+                                       name="follow-ups", daemon=True)
+        self.thread.start()
+
+    def wake(self):
+        """Run the next batch now instead of waiting for the timer"""
+        self.wake_event.set()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+            self.thread = None
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts)
+
+    def run_batch(self, agent, batch_size=20, max_workers=2):
+        """Have agent suggest strategies for up to batch_size due prospects without one; returns how many were made"""
+        with self.lock:
+            self._advance(None)
+            jobs = []
+            for due, name in self.due:
+                if len(jobs) >= batch_size:
+                    break
+                if self._suggestion(name) is None:
+                    jobs.append((name, due, self.today - self.entries[name][1], self.entries[name][3]))
+
+        def suggest(job):
+            name, due, days, prospect = job
+            try:
+                strategy = agent.suggest_follow_up(days, prospect)
+            except Exception:
+                # The rep can still ask for this one by hand; it is retried next batch
+                with self.lock:
+                    self.counts["failed"] += 1
+                return 0
+            with self.lock:
+                self.suggestions[name] = (due, strategy)
+                self.counts["suggested"] += 1
+            return 1
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="follow-up") as executor:
+            return sum(executor.map(suggest, jobs))
+
+    def _run(self, agent, interval, batch_size, max_workers, stop_event):
+        while not stop_event.is_set():
+            self.run_batch(agent, batch_size, max_workers)
+            self.wake_event.wait(interval)
+            self.wake_event.clear()
+
+    def _add(self, prospect, push, touched):
+        if touched is None:
+            return
+        self.version += 1
+        last_touch, attempts, contact = touched
+        due = last_touch + self.cadence[min(attempts, len(self.cadence) - 1)]
+        self.entries[prospect.name] = [due, last_touch, self.version, prospect, attempts, contact]
+        if self.today is not None and due <= self.today:
+            if push:
+                insort(self.due, (due, prospect.name))
+            else:
+                self.due.append((due, prospect.name))
+        elif push:
+            heapq.heappush(self.heap, (due, self.version, prospect.name))
+        else:
+            self.heap.append((due, self.version, prospect.name))
+
+    def _remove(self, name):
+        # Its heap entry, if any, is now stale and will be skipped
+        entry = self.entries.pop(name, None)
+        if entry is not None and self.today is not None and entry[0] <= self.today:
+            del self.due[bisect_left(self.due, (entry[0], name))]
+
+    def _advance(self, today):
+        """Move every prospect due by today from the heap into the due set"""
+        today = (today or date.today()).toordinal()
+        if self.today is not None and today < self.today:
+            # Going back in time: start over from the entries
+            self.heap = [(entry[0], entry[2], name) for name, entry in self.entries.items()]
+            heapq.heapify(self.heap)
+            self.due = []
+        self.today = today
+        while self.heap and self.heap[0][0] <= today:
+            due, version, name = heapq.heappop(self.heap)
+            entry = self.entries.get(name)
+            if entry is not None and entry[2] == version:
+                # Everything already due is due no later than this, so this is an append
+                insort(self.due, (due, name))
+
+    def _suggestion(self, name):
+        suggestion = self.suggestions.get(name)
+        entry = self.entries.get(name)
+        if suggestion is None or entry is None or suggestion[0] != entry[0]:
+            return None
+        return suggestion[1]
+
+def _carried(entry, prospect):
+    """An entry's touches brought up to date with prospect's last_contact"""
+    _, last_touch, _, _, attempts, contact = entry
+    new_contact = _ordinal(prospect.last_contact) if prospect.last_contact else None
+    if new_contact is not None and (contact is None or new_contact > contact):
+        # A new contact answers the follow-ups sent before it
+        return max(last_touch, new_contact), 0, new_contact
+    return last_touch, attempts, contact
@@ -0,0 +1,1388 @@
+import tkinter as tk
+from tkinter import ttk, scrolledtext, messagebox, filedialog
+import tkinter.font as tkfont
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from datetime import datetime
+import queue
+import threading
+import time
+
+from agent import SalesAgent
+from cache import ResponseCache
+from followups import FollowUpScheduler
+from objections import NOTE_PREFIX, ObjectionKnowledgeBase
+from persistence import PersistenceScheduler
+from prefetch import Prefetcher
+from search import PrefixIndex, ProspectSearchIndex
+from store import DEFAULT_STORE, Prospect, open_store
+import telemetry
+import transfer
+
+# Interactions read per prospect to schedule its follow-ups; histories are not kept in memory
+RECENT_HISTORY = 20
+# Dropdowns list at most this many type-ahead matches
+COMBO_LIMIT = 50
+# How often the Stats tab refreshes while it is showing
+STATS_REFRESH_MS = 2000
+# Prospects are handed to the window this many at a time while they load
+LOAD_CHUNK = 2000
+# How often the window checks for failed background saves
+PERSISTENCE_CHECK_MS = 1000
+# How often the follow-up list refreshes while its tab is showing
+DUE_REFRESH_MS = 5000
+# The follow-up list shows at most this many of the most overdue prospects
+DUE_LIMIT = 1000
+# The filtered prospect list is searched this many matches at a time, more as it scrolls
+FILTER_PAGE = 200
+# Seconds between batches of follow-up strategies prepared in the background
+FOLLOW_UP_INTERVAL = 600
+# Seconds a click waits for a prefetch of the same response that is already streaming
+PREFETCH_WAIT = 5.0
+
+class BackgroundTask:
+    """Handle for a call running on the worker pool"""
+    def __init__(self, key, on_success, on_error, on_finish, on_exit=None):
+        self.key = key
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_finish = on_finish
+        self.on_exit = on_exit
+        self.future = None
+        self.cancel_event = threading.Event()
+        
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+        
+    def cancel(self):
+        """Ask the worker to stop; True if it had not started and never will"""
+        self.cancel_event.set()
+        return self.future is not None and self.future.cancel()
+
+class BackgroundRunner:
+    """Run blocking calls on a worker pool and hand the results back to the Tk thread
+    
+    Tk widgets may only be touched from the main thread, so workers never call
+    back directly. They queue callables which the main thread drains from a
+    root.after poll that only runs while tasks are in flight.
+    
+    on_finish runs as soon as a task is done or cancelled, which suits
+    re-enabling a button. A cancelled worker may still be running then, so
+    work that must not overlap it, like reading back what it wrote, goes in
+    on_exit, which runs once the worker has returned.
+    """
+    def __init__(self, root, max_workers=4, poll_ms=16, poll_budget=0.02):
+        self.root = root
+        self.poll_ms = poll_ms
+        # Seconds of callbacks run per poll, so a burst of results cannot freeze the window
+        self.poll_budget = poll_budget
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sales-agent")
+        self.callbacks = queue.Queue()
+        self.active = {}
+        # Tasks whose on_exit has not run yet, cancelled or not
+        self.exiting = set()
+        self.polling = False
+        
+    def submit(self, key, func, on_success, on_error=None, on_finish=None, on_exit=None):
+        """Run func(task) in the background, replacing any task already running under key"""
+        self.cancel(key)
+        task = BackgroundTask(key, on_success, on_error, on_finish, on_exit)
+        if on_exit:
+            self.exiting.add(task)
+        self.active[key] = task
+        task.future = self.executor.submit(self._run, task, func)
+        self._schedule_poll()
+        return task
+        
+    def is_running(self, key):
+        return key in self.active
+        
+    def cancel(self, key):
+        """Cancel the task running under key; its result will be discarded"""
+        task = self.active.pop(key, None)
+        if task:
+            if task.cancel():
+                self.callbacks.put(lambda: self._exited(task))
+            if task.on_finish:
+                task.on_finish()
+                
+    def post(self, task, callback):
+        """Queue callback to run on the Tk thread unless task has been cancelled"""
+        self.callbacks.put(lambda: None if task.cancelled else callback())
+        
+    def shutdown(self):
+        for key in list(self.active):
+            self.cancel(key)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        
+    def _run(self, task, func):
+        try:
+            if task.cancelled:
+                return
+            try:
+                result = func(task)
+            except Exception as e:
+                self.callbacks.put(lambda error=e: self._deliver(task, None, error))
+            else:
+                self.callbacks.put(lambda: self._deliver(task, result, None))
+        finally:
+            self.callbacks.put(lambda: self._exited(task))
+            
+    def _exited(self, task):
+        if task in self.exiting:
+            self.exiting.discard(task)
+            task.on_exit()
+            
+    def _deliver(self, task, result, error):
+        if task.cancelled or self.active.get(task.key) is not task:
+            return
+        del self.active[task.key]
+        try:
+            if error is None:
+                with telemetry.timer("ui_update_seconds", widget=task.key):
+                    task.on_success(result)
+            elif task.on_error:
+                task.on_error(error)
+        finally:
+            if task.on_finish:
+                task.on_finish()
+                
+    def _schedule_poll(self):
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.poll_ms, self._poll)
+            
+    def _poll(self):
+        deadline = time.perf_counter() + self.poll_budget
+        while time.perf_counter() < deadline:
+            try:
+                callback = self.callbacks.get_nowait()
+            except queue.Empty:
+                break
+            callback()
+        if self.active or self.exiting or not self.callbacks.empty():
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self.polling = False
+
+class TextStream:
+    """Append streamed chunks to a text widget, coalescing them into one insert per poll"""
+    def __init__(self, runner, task, widget):
+        self.runner = runner
+        self.task = task
+        self.widget = widget
+        self.lock = threading.Lock()
+        self.pending = []
+        
+    def write(self, text):
+        """Called from the worker thread for every chunk the model returns"""
+        if self.task.cancelled:
+            raise CancelledError()
+        with self.lock:
+            self.pending.append(text)
+            first = len(self.pending) == 1
+        if first:
+            self.runner.post(self.task, self.flush)
+            
+    def flush(self):
+        with self.lock:
+            text = "".join(self.pending)
+            self.pending = []
+        with telemetry.timer("ui_update_seconds", widget="stream"):
+            self.widget.insert(tk.END, text)
+            self.widget.see(tk.END)
+
+class VirtualListbox(ttk.Frame):
+    """Scrollable list that only draws the rows currently in view
+    
+    Rows are kept in a Python list and painted onto a canvas from a small pool
+    of text items, so inserting, renaming or removing one prospect costs a
+    redraw of the visible rows rather than a rebuild of the whole list.
+    Selecting a row fires <<ListboxSelect>> like tk.Listbox. A list given a
+    more callback is filled a page at a time as it is scrolled to the end.
+    """
+    def __init__(self, parent, width=30, height=20):
+        super().__init__(parent)
+        self.font = tkfont.nametofont("TkDefaultFont")
+        self.row_height = self.font.metrics("linespace") + 4
+        self.items = []
+        self.top = 0
+        self.selection = None
+        self.row_ids = []
+        self.redraw_pending = False
+        self.more = None
+        
+        self.canvas = tk.Canvas(self, width=width * self.font.measure("0"), height=height * self.row_height,
+                                background="white", highlightthickness=1, takefocus=True)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.highlight = self.canvas.create_rectangle(0, 0, 0, 0, fill="#0078d7", width=0, state=tk.HIDDEN)
+        
+        self.canvas.bind("<Configure>", lambda event: self.schedule_redraw())
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<MouseWheel>", lambda event: self.scroll_rows(-1 if event.delta > 0 else 1) or "break")
+        self.canvas.bind("<Button-4>", lambda event: self.scroll_rows(-1))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll_rows(1))
+        self.canvas.bind("<Up>", lambda event: self.move_selection(-1))
+        self.canvas.bind("<Down>", lambda event: self.move_selection(1))
+        
+    def set_items(self, items, more=None):
+        """Show items; more(last item) returns the rows after them, or nothing once they have all been shown"""
+        self.items = list(items)
+        self.more = more
+        if self.selection not in self.items:
+            self.selection = None
+        self.schedule_redraw()
+        
+    def append(self, item):
+        self.items.append(item)
+        self.schedule_redraw()
+        
+    def extend(self, items):
+        self.items.extend(items)
+        self.schedule_redraw()
+        
+    def remove(self, item):
+        if item in self.items:
+            self.items.remove(item)
+            if self.selection == item:
+                self.selection = None
+            self.schedule_redraw()
+            
+    def selected(self):
+        return self.selection
+        
+    def select(self, item):
+        self.selection = item
+        index = self.items.index(item)
+        visible = self.visible_rows()
+        if index < self.top or index >= self.top + visible:
+            self.top = max(0, index - visible // 2)
+        self.schedule_redraw()
+        self.event_generate("<<ListboxSelect>>")
+        
+    def visible_rows(self):
+        return max(1, self.canvas.winfo_height() // self.row_height)
+        
+    def on_click(self, event):
+        self.canvas.focus_set()
+        index = self.top + event.y // self.row_height
+        if index < len(self.items):
+            self.select(self.items[index])
+            
+    def move_selection(self, step):
+        if not self.items:
+            return
+        index = self.items.index(self.selection) + step if self.selection in self.items else 0
+        self.select(self.items[min(max(index, 0), len(self.items) - 1)])
+        
+    def scroll_rows(self, rows):
+        self.top += rows
+        self.schedule_redraw()
+        
+    def on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.top = int(float(amount) * len(self.items))
+        elif unit == "pages":
+            self.top += int(amount) * self.visible_rows()
+        else:
+            self.top += int(amount)
+        self.schedule_redraw()
+        
+    def schedule_redraw(self):
+        # Coalesce bursts of updates into one repaint when Tk is next idle
+        if not self.redraw_pending:
+            self.redraw_pending = True
+            self.after_idle(self.redraw)
+            
+    def redraw(self):
+        with telemetry.timer("ui_update_seconds", widget="prospect_list"):
+            self._redraw()
+            
+    def _redraw(self):
+        self.redraw_pending = False
+        visible = self.visible_rows()
+        if self.more and self.top + 2 * visible >= len(self.items):
+            # Within a screen of the last row: fetch the next page before it is needed
+            page = self.more(self.items[-1]) if self.items else []
+            if page:
+                self.items.extend(page)
+            else:
+                self.more = None
+        self.top = min(max(self.top, 0), max(len(self.items) - visible, 0))
+        while len(self.row_ids) < visible + 1:
+            self.row_ids.append(self.canvas.create_text(4, 0, anchor=tk.NW, font=self.font))
+            
+        width = self.canvas.winfo_width()
+        self.canvas.itemconfigure(self.highlight, state=tk.HIDDEN)
+        for row, row_id in enumerate(self.row_ids):
+            index = self.top + row
+            y = row * self.row_height
+            if index >= len(self.items):
+                self.canvas.itemconfigure(row_id, state=tk.HIDDEN)
+                continue
+            item = self.items[index]
+            is_selected = item == self.selection
+            self.canvas.coords(row_id, 4, y + 2)
+            self.canvas.itemconfigure(row_id, text=item, state=tk.NORMAL, fill="white" if is_selected else "black")
+            if is_selected:
+                self.canvas.coords(self.highlight, 0, y, width, y + self.row_height)
+                self.canvas.itemconfigure(self.highlight, state=tk.NORMAL)
+                
+        if self.items:
+            self.scrollbar.set(self.top / len(self.items), min(1.0, (self.top + visible) / len(self.items)))
+        else:
+            self.scrollbar.set(0, 1)
+
+class SalesAgentGUI:
+    def __init__(self, root, store_path=DEFAULT_STORE):
+        self.root = root
+        self.store_path = store_path
+        self.root.title("Sales Agent Assistant")
+        self.root.geometry("800x600")
+        self.root.minsize(800, 600)
+        
+        # Configure the Gemini API
+        self.api_key = tk.StringVar()
+        self.configure_api_frame()
+        
+        # Create notebook for tabs
+        self.notebook = ttk.Notebook(root)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Create tabs
+        self.task_controls = {}
+        self.follow_ups = FollowUpScheduler()
+        self.prefix_index = PrefixIndex()
+        self.search_index = ProspectSearchIndex()
+        self.create_prospect_tab()
+        self.create_email_tab()
+        self.create_followup_tab()
+        self.create_objection_tab()
+        self.create_proposal_tab()
+        self.create_stats_tab()
+        
+        # Initialize the sales agent backend
+        self.sales_agent = None
+        self.prefetcher = None
+        # Opened on the first Initialize API and shared by every agent after it
+        self.response_cache = None
+        self.objection_kb = None
+        self.prospects = {}
+        self.store = None
+        self.persistence = None
+        self.current_prospect = None
+        self.loading = False
+        # Prospects saved, deleted or contacted while the store was still loading,
+        # with the interactions logged for them meanwhile
+        self.loading_edits = {}
+        
+        # Model calls run on worker threads so the window keeps repainting
+        self.runner = BackgroundRunner(root)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Load existing prospects once the window has been drawn; after_idle alone
+        # would run before the first paint
+        self.root.after_idle(lambda: self.root.after(0, self.load_prospects))
+        
+    def on_close(self):
+        if self.persistence and not self.persistence.flush(timeout=10):
+            error = self.persistence.stats()["error"] or "timed out"
+            if not messagebox.askyesno("Unsaved Changes", f"Some changes could not be saved ({error}). Quit anyway?"):
+                return
+        if self.prefetcher:
+            self.prefetcher.shutdown()
+        self.follow_ups.stop()
+        self.runner.shutdown()
+        if self.objection_kb:
+            self.objection_kb.close()
+        if self.response_cache:
+            self.response_cache.close()
+        if self.persistence:
+            self.persistence.close(timeout=2)
+        if self.store:
+            self.store.close()
+        self.root.destroy()
+        
+    def configure_api_frame(self):
+        api_frame = ttk.LabelFrame(self.root, text="API Configuration")
+        api_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(api_frame, text="Gemini API Key:").grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
+        ttk.Entry(api_frame, textvariable=self.api_key, width=50, show="*").grid(row=0, column=1, padx=5, pady=5, sticky=tk.W)
+        ttk.Button(api_frame, text="Initialize API", command=self.initialize_api).grid(row=0, column=2, padx=5, pady=5)
+        
+        self.stream_responses = tk.BooleanVar(value=True)
+        ttk.Checkbutton(api_frame, text="Stream responses", variable=self.stream_responses).grid(row=0, column=3, padx=5, pady=5)
+        
+        self.force_regenerate = tk.BooleanVar(value=False)
+        ttk.Checkbutton(api_frame, text="Force regenerate", variable=self.force_regenerate).grid(row=1, column=3, padx=5, pady=5, sticky=tk.W)
+        
+        # Off by default: prefetching spends API quota on guesses
+        self.prefetch_enabled = tk.BooleanVar(value=False)
+        ttk.Checkbutton(api_frame, text="Prefetch on select", variable=self.prefetch_enabled).grid(row=1, column=2, padx=5, pady=5, sticky=tk.W)
+        self.cache_status = tk.StringVar()
+        ttk.Label(api_frame, textvariable=self.cache_status).grid(row=1, column=1, padx=5, pady=5, sticky=tk.W)
+        self.save_status = tk.StringVar()
+        ttk.Label(api_frame, textvariable=self.save_status, foreground="red").grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
+        
+    def initialize_api(self):
+        if not self.api_key.get():
+            messagebox.showerror("Error", "Please enter your Gemini API key")
+            return
+            
+        # The Gemini SDK is imported by the first agent; that takes a while, so not on the Tk thread
+        api_key = self.api_key.get()
+        
+        def on_success(agent):
+            self.sales_agent = agent
+            if self.prefetcher:
+                self.prefetcher.shutdown()
+            self.prefetcher = Prefetcher(self.sales_agent)
+            self.toggle_follow_ups()
+            if self.objection_kb is None:
+                self.objection_kb = ObjectionKnowledgeBase("objections.db")
+                # Seed it from objections already logged, whose analyses may still be cached
+                agent.objections = self.objection_kb
+                # Histories are not kept in memory, so page them in from the store
+                store = self.store
+                if store:
+                    self.runner.submit("learn_objections", lambda task: agent.learn_objections(store.iter_prospects(history_limit=None)),
+                                       lambda added: None)
+            else:
+                agent.objections = self.objection_kb
+            self.update_cache_status()
+            messagebox.showinfo("Success", "API initialized successfully")
+            
+        if self.response_cache is None:
+            self.response_cache = ResponseCache("response_cache.db")
+        cache = self.response_cache
+        self.runner.submit("initialize_api", lambda task: SalesAgent(api_key=api_key, cache=cache),
+                           on_success, lambda e: messagebox.showerror("Error", f"Failed to initialize API: {str(e)}"))
+    
+    def create_prospect_tab(self):
+        prospect_tab = ttk.Frame(self.notebook)
+        self.notebook.add(prospect_tab, text="Prospect Management")
+        
+        # Left frame for list of prospects
+        left_frame = ttk.Frame(prospect_tab)
+        left_frame.pack(side=tk.LEFT, fill=tk.Y, padx=5, pady=5)
+        
+        ttk.Label(left_frame, text="Prospects:").pack(anchor=tk.W)
+        self.prospect_filter = tk.StringVar()
+        self.prospect_filter.trace_add("write", lambda *args: self.filter_prospect_list())
+        ttk.Entry(left_frame, textvariable=self.prospect_filter).pack(fill=tk.X)
+        ttk.Label(left_frame, text="e.g. company:acme role:cto since:2025-01-01", foreground="gray").pack(anchor=tk.W, pady=(0, 5))
+        self.prospect_listbox = VirtualListbox(left_frame, width=30, height=20)
+        self.prospect_listbox.pack(fill=tk.Y, expand=True)
+        self.prospect_listbox.bind('<<ListboxSelect>>', self.load_prospect_details)
+        
+        ttk.Button(left_frame, text="New Prospect", command=self.clear_prospect_form).pack(fill=tk.X, pady=5)
+        ttk.Button(left_frame, text="Delete Prospect", command=self.delete_prospect).pack(fill=tk.X)
+        
+        # Bulk import and export run on a worker thread with their own progress bar
+        transfer_frame = ttk.Frame(left_frame)
+        transfer_frame.pack(fill=tk.X, pady=(5, 0))
+        self.import_button = ttk.Button(transfer_frame, text="Import...", command=self.import_prospects)
+        self.import_button.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.export_button = ttk.Button(transfer_frame, text="Export...", command=self.export_prospects)
+        self.export_button.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.transfer_cancel = ttk.Button(transfer_frame, text="Cancel", state=tk.DISABLED,
+                                          command=lambda: self.runner.cancel("transfer"))
+        self.transfer_cancel.pack(side=tk.LEFT)
+        self.transfer_progress = ttk.Progressbar(left_frame, mode="determinate", maximum=100)
+        self.transfer_progress.pack(fill=tk.X, pady=(5, 0))
+        self.transfer_status = tk.StringVar()
+        ttk.Label(left_frame, textvariable=self.transfer_status, wraplength=220).pack(anchor=tk.W)
+        
+        # Right frame for prospect details
+        right_frame = ttk.LabelFrame(prospect_tab, text="Prospect Details")
+        right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        # Prospect form
+        form_frame = ttk.Frame(right_frame)
+        form_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Name
+        ttk.Label(form_frame, text="Name:").grid(row=0, column=0, sticky=tk.W, pady=2)
+        self.prospect_name = tk.StringVar()
+        ttk.Entry(form_frame, textvariable=self.prospect_name, width=40).grid(row=0, column=1, sticky=tk.W, pady=2)
+        
+        # Company
+        ttk.Label(form_frame, text="Company:").grid(row=1, column=0, sticky=tk.W, pady=2)
+        self.prospect_company = tk.StringVar()
+        ttk.Entry(form_frame, textvariable=self.prospect_company, width=40).grid(row=1, column=1, sticky=tk.W, pady=2)
+        
+        # Role
+        ttk.Label(form_frame, text="Role:").grid(row=2, column=0, sticky=tk.W, pady=2)
+        self.prospect_role = tk.StringVar()
+        ttk.Entry(form_frame, textvariable=self.prospect_role, width=40).grid(row=2, column=1, sticky=tk.W, pady=2)
+        
+        # Interests
+        ttk.Label(form_frame, text="Interests:").grid(row=3, column=0, sticky=tk.W, pady=2)
+        self.prospect_interests = tk.StringVar()
+        ttk.Entry(form_frame, textvariable=self.prospect_interests, width=40).grid(row=3, column=1, sticky=tk.W, pady=2)
+        ttk.Label(form_frame, text="(Comma separated)").grid(row=3, column=2, sticky=tk.W, pady=2)
+        
+        # Pain points
+        ttk.Label(form_frame, text="Pain Points:").grid(row=4, column=0, sticky=tk.W, pady=2)
+        self.prospect_pain_points = tk.StringVar()
+        ttk.Entry(form_frame, textvariable=self.prospect_pain_points, width=40).grid(row=4, column=1, sticky=tk.W, pady=2)
+        ttk.Label(form_frame, text="(Comma separated)").grid(row=4, column=2, sticky=tk.W, pady=2)
+        
+        # Notes
+        ttk.Label(form_frame, text="Notes:").grid(row=5, column=0, sticky=tk.NW, pady=2)
+        self.prospect_notes = scrolledtext.ScrolledText(form_frame, width=40, height=5)
+        self.prospect_notes.grid(row=5, column=1, sticky=tk.W, pady=2)
+        
+        # Save button
+        ttk.Button(form_frame, text="Save Prospect", command=self.save_prospect).grid(row=6, column=1, sticky=tk.E, pady=10)
+        
+        # Generate several artifacts for the selected prospect in one model call
+        all_frame = ttk.LabelFrame(right_frame, text="Generate for Selected Prospect")
+        all_frame.pack(fill=tk.X, padx=10, pady=5)
+        self.all_artifacts = {}
+        for artifact, label in (("email", "Email"), ("follow_up", "Follow-up"), ("objection", "Objection"), ("proposal", "Proposal")):
+            self.all_artifacts[artifact] = tk.BooleanVar(value=artifact != "objection")
+            ttk.Checkbutton(all_frame, text=label, variable=self.all_artifacts[artifact]).pack(side=tk.LEFT, padx=5)
+        generate_button = ttk.Button(all_frame, text="Generate All", command=self.generate_all)
+        generate_button.pack(side=tk.LEFT, padx=5)
+        self.create_task_status(all_frame, "all", generate_button)
+    
+    def set_transfer_busy(self, busy, status="", cancellable=True):
+        for button in (self.import_button, self.export_button):
+            button.config(state=tk.DISABLED if busy else tk.NORMAL)
+        self.transfer_cancel.config(state=tk.NORMAL if busy and cancellable else tk.DISABLED)
+        self.transfer_status.set(status)
+        if busy:
+            self.transfer_progress.config(value=0)
+            
+    def show_transfer_progress(self, percent, status):
+        self.transfer_progress.config(value=percent)
+        self.transfer_status.set(status)
+        
+    def import_prospects(self):
+        """Stream a CSV or JSONL file into the store on a worker thread, then reload the list"""
+        if not self.store:
+            return
+        path = filedialog.askopenfilename(title="Import prospects",
+                                          filetypes=[("CSV or JSON lines", "*.csv *.jsonl *.ndjson"), ("All files", "*.*")])
+        if not path:
+            return
+            
+        def work(task):
+            def progress(done, total, summary):
+                if task.cancelled:
+                    raise transfer.ImportCancelled()
+                status = f"{summary['rows']} rows read, {summary['created'] + summary['updated']} saved"
+                self.runner.post(task, lambda: self.show_transfer_progress(100 * done / max(total, 1), status))
+            return transfer.import_prospects(self.store, path, on_progress=progress)
+            
+        def on_success(summary):
+            message = (f"{summary['created']} added, {summary['updated']} updated "
+                       f"({summary['interactions_added']} interactions added), {summary['duplicates']} duplicates, "
+                       f"{summary['conflicts']} conflicts, {summary['invalid']} invalid rows")
+            details = "\n".join(f"line {e['line']}: {e['error']}" if "line" in e else e["error"] for e in summary["errors"][:10])
+            messagebox.showinfo("Import", message + ("\n\n" + details if details else ""))
+            
+        def on_error(e):
+            messagebox.showerror("Error", f"Failed to import prospects: {str(e)}")
+            
+        def on_exit():
+            # Batches written before a cancel or an error are kept, so reload either way,
+            # but only once the worker has stopped writing
+            self.set_transfer_busy(False, self.transfer_status.get())
+            self.reload_prospects()
+            
+        self.runner.submit("transfer", work, on_success, on_error,
+                           on_finish=lambda: self.transfer_cancel.config(state=tk.DISABLED), on_exit=on_exit)
+        self.set_transfer_busy(True, "Importing...")
+        
+    def export_prospects(self):
+        if not self.store:
+            return
+        path = filedialog.asksaveasfilename(title="Export prospects", defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("JSON lines with history", "*.jsonl")])
+        if not path:
+            return
+        total = max(len(self.prospects), 1)
+        
+        def work(task):
+            def progress(written):
+                if task.cancelled:
+                    raise CancelledError()
+                self.runner.post(task, lambda: self.show_transfer_progress(100 * written / total, f"{written} exported"))
+            return transfer.export_prospects(self.store, path, history=path.endswith(".jsonl"), on_progress=progress)
+            
+        def on_success(written):
+            self.show_transfer_progress(100, f"Exported {written} prospects")
+            
+        def on_error(e):
+            messagebox.showerror("Error", f"Failed to export prospects: {str(e)}")
+            
+        self.runner.submit("transfer", work, on_success, on_error,
+                           on_finish=lambda: self.transfer_cancel.config(state=tk.DISABLED),
+                           on_exit=lambda: self.set_transfer_busy(False, self.transfer_status.get()))
+        self.set_transfer_busy(True, "Exporting...")
+        
+    def reload_prospects(self):
+        """Reload every prospect from the store on a worker thread and rebuild the list"""
+        def on_success(prospects):
+            self.prospects = prospects
+            self.refresh_prospect_list()
+            self.refresh_due_list()
+            
+        def work(task):
+            # Queued edits must reach the store before it is read back
+            self.persistence.flush()
+            prospects = {}
+            
+            def pairs():
+                # Paged like the first load, so no history is held past its prospect's turn
+                for prospect in self.store.iter_prospects(history_limit=RECENT_HISTORY, batch_size=LOAD_CHUNK):
+                    compact = prospect.replace(interaction_history=())
+                    prospects[compact.name] = compact
+                    yield compact, prospect.interaction_history
+                    
+            self.follow_ups.build_from(pairs())
+            return prospects
+            
+        self.runner.submit("reload", work, on_success,
+                           lambda e: messagebox.showerror("Error", f"Failed to load prospects: {str(e)}"))
+        
+    def create_email_tab(self):
+        email_tab = ttk.Frame(self.notebook)
+        self.notebook.add(email_tab, text="Email Generator")
+        
+        # Controls frame
+        controls_frame = ttk.Frame(email_tab)
+        controls_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(controls_frame, text="Select Prospect:").pack(side=tk.LEFT, padx=5)
+        self.email_prospect_var = tk.StringVar()
+        self.email_prospect_combo = self.create_prospect_combo(controls_frame, self.email_prospect_var)
+        self.email_prospect_combo.pack(side=tk.LEFT, padx=5)
+        
+        generate_button = ttk.Button(controls_frame, text="Generate Email", command=self.generate_email)
+        generate_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls_frame, text="Copy to Clipboard", command=self.copy_email).pack(side=tk.LEFT, padx=5)
+        self.create_task_status(controls_frame, "email", generate_button)
+        
+        # Email display
+        email_frame = ttk.LabelFrame(email_tab, text="Generated Email")
+        email_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        self.email_text = scrolledtext.ScrolledText(email_frame, width=80, height=25)
+        self.email_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+    
+    def create_followup_tab(self):
+        followup_tab = ttk.Frame(self.notebook)
+        self.notebook.add(followup_tab, text="Follow-up Strategy")
+        
+        # Controls frame
+        controls_frame = ttk.Frame(followup_tab)
+        controls_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(controls_frame, text="Select Prospect:").pack(side=tk.LEFT, padx=5)
+        self.followup_prospect_var = tk.StringVar()
+        self.followup_prospect_combo = self.create_prospect_combo(controls_frame, self.followup_prospect_var)
+        self.followup_prospect_combo.pack(side=tk.LEFT, padx=5)
+        self.followup_prospect_combo.bind("<<ComboboxSelected>>", lambda event: self.select_followup_prospect())
+        
+        ttk.Label(controls_frame, text="Days Since Last Contact:").pack(side=tk.LEFT, padx=5)
+        self.days_since_contact = tk.StringVar(value="7")
+        ttk.Entry(controls_frame, textvariable=self.days_since_contact, width=5).pack(side=tk.LEFT, padx=5)
+        
+        generate_button = ttk.Button(controls_frame, text="Generate Strategy", command=self.generate_followup)
+        generate_button.pack(side=tk.LEFT, padx=5)
+        self.create_task_status(controls_frame, "followup", generate_button)
+        
+        # Prospects due a follow-up, most overdue first
+        due_frame = ttk.LabelFrame(followup_tab, text="Due Today")
+        due_frame.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=5)
+        self.due_status = tk.StringVar()
+        ttk.Label(due_frame, textvariable=self.due_status).pack(fill=tk.X, padx=5)
+        # Off by default: preparing strategies spends API quota before anyone asks
+        self.prepare_follow_ups = tk.BooleanVar(value=False)
+        ttk.Checkbutton(due_frame, text="Prepare strategies in background", variable=self.prepare_follow_ups,
+                        command=self.toggle_follow_ups).pack(fill=tk.X, padx=5)
+        self.due_listbox = VirtualListbox(due_frame, width=30)
+        self.due_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.due_listbox.bind("<<ListboxSelect>>", lambda event: self.select_due_prospect())
+        self.due_names = {}
+        self.followup_tab = followup_tab
+        self.due_refresh = None
+        
+        # Strategy display
+        strategy_frame = ttk.LabelFrame(followup_tab, text="Follow-up Strategy")
+        strategy_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        self.strategy_text = scrolledtext.ScrolledText(strategy_frame, width=80, height=25)
+        self.strategy_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+    
+    def create_objection_tab(self):
+        objection_tab = ttk.Frame(self.notebook)
+        self.notebook.add(objection_tab, text="Objection Handler")
+        
+        # Controls frame
+        controls_frame = ttk.Frame(objection_tab)
+        controls_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(controls_frame, text="Select Prospect:").pack(side=tk.LEFT, padx=5)
+        self.objection_prospect_var = tk.StringVar()
+        self.objection_prospect_combo = self.create_prospect_combo(controls_frame, self.objection_prospect_var)
+        self.objection_prospect_combo.pack(side=tk.LEFT, padx=5)
+        
+        # Objection input
+        objection_input_frame = ttk.LabelFrame(objection_tab, text="Enter Objection")
+        objection_input_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        self.objection_input = scrolledtext.ScrolledText(objection_input_frame, width=80, height=5)
+        self.objection_input.pack(fill=tk.X, padx=5, pady=5)
+        
+        buttons_frame = ttk.Frame(objection_input_frame)
+        buttons_frame.pack(pady=5)
+        analyze_button = ttk.Button(buttons_frame, text="Analyze Objection", command=self.analyze_objection)
+        analyze_button.pack(side=tk.LEFT, padx=5)
+        self.create_task_status(buttons_frame, "objection", analyze_button)
+        
+        # Objections like ones analysed before can be answered without a model call
+        self.objection_local = tk.BooleanVar(value=True)
+        ttk.Checkbutton(buttons_frame, text="Reuse similar past analyses", variable=self.objection_local).pack(side=tk.LEFT, padx=5)
+        self.objection_refine = tk.BooleanVar(value=False)
+        ttk.Checkbutton(buttons_frame, text="Refine with model", variable=self.objection_refine).pack(side=tk.LEFT, padx=5)
+        
+        # Response display
+        response_frame = ttk.LabelFrame(objection_tab, text="Response Strategy")
+        response_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        self.response_text = scrolledtext.ScrolledText(response_frame, width=80, height=15)
+        self.response_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+    
+    def create_proposal_tab(self):
+        proposal_tab = ttk.Frame(self.notebook)
+        self.notebook.add(proposal_tab, text="Proposal Generator")
+        
+        # Controls frame
+        controls_frame = ttk.Frame(proposal_tab)
+        controls_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(controls_frame, text="Select Prospect:").pack(side=tk.LEFT, padx=5)
+        self.proposal_prospect_var = tk.StringVar()
+        self.proposal_prospect_combo = self.create_prospect_combo(controls_frame, self.proposal_prospect_var)
+        self.proposal_prospect_combo.pack(side=tk.LEFT, padx=5)
+        
+        generate_button = ttk.Button(controls_frame, text="Generate Proposal Outline", command=self.generate_proposal)
+        generate_button.pack(side=tk.LEFT, padx=5)
+        self.create_task_status(controls_frame, "proposal", generate_button)
+        
+        # Proposal display
+        proposal_frame = ttk.LabelFrame(proposal_tab, text="Proposal Outline")
+        proposal_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        self.proposal_text = scrolledtext.ScrolledText(proposal_frame, width=80, height=25)
+        self.proposal_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+    
+    def create_stats_tab(self):
+        stats_tab = ttk.Frame(self.notebook)
+        self.notebook.add(stats_tab, text="Stats")
+        
+        controls_frame = ttk.Frame(stats_tab)
+        controls_frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Button(controls_frame, text="Refresh", command=self.refresh_stats).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls_frame, text="Reset", command=self.reset_stats).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls_frame, text="Export...", command=self.export_stats).pack(side=tk.LEFT, padx=5)
+        self.profiling = tk.BooleanVar(value=False)
+        ttk.Checkbutton(controls_frame, text="Profile (cProfile)", variable=self.profiling,
+                        command=self.toggle_profiling).pack(side=tk.LEFT, padx=5)
+        
+        self.stats_text = scrolledtext.ScrolledText(stats_tab, width=80, height=25, font="TkFixedFont")
+        self.stats_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.profile_report = ""
+        self.stats_tab = stats_tab
+        self.stats_refresh = None
+        self.notebook.bind("<<NotebookTabChanged>>", lambda event: self.refresh_stats())
+        self.notebook.bind("<<NotebookTabChanged>>", lambda event: self.refresh_due_list(), add="+")
+        
+    def refresh_stats(self):
+        """Redraw the Stats tab, and keep doing so every few seconds while it is the visible tab"""
+        if self.stats_refresh:
+            self.root.after_cancel(self.stats_refresh)
+            self.stats_refresh = None
+        if self.notebook.select() != str(self.stats_tab):
+            return
+        snapshot = telemetry.snapshot()
+        lines = [f"{'operation':<58}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"]
+        for series, stats in snapshot["histograms"].items():
+            # Seconds are shown in milliseconds, token counts as they are
+            scale = 1000 if series.split("{")[0].endswith("_seconds") else 1
+            lines.append(f"{series:<58}{stats['count']:>7}" + "".join(
+                f"{stats[key] * scale:>10.1f}" for key in ("p50", "p95", "p99", "max")))
+        lines.append("")
+        lines.extend(f"{series:<58}{value:>7}" for series, value in snapshot["counters"].items())
+        if self.objection_kb:
+            lines.append("")
+            lines.extend(f"objections_{key:<47}{value}" for key, value in self.objection_kb.stats().items())
+        if self.sales_agent and hasattr(self.sales_agent.backend, "stats"):
+            lines.append("")
+            lines.extend(f"{key:<58}{value}" for key, value in self.sales_agent.backend.stats().items())
+        if self.profile_report:
+            lines.extend(["", self.profile_report])
+        self.stats_text.delete(1.0, tk.END)
+        self.stats_text.insert(tk.END, "Times in milliseconds\n\n" + "\n".join(lines))
+        self.stats_refresh = self.root.after(STATS_REFRESH_MS, self.refresh_stats)
+        
+    def reset_stats(self):
+        telemetry.reset()
+        self.profile_report = ""
+        self.refresh_stats()
+        
+    def export_stats(self):
+        path = filedialog.asksaveasfilename(defaultextension=".json",
+                                            filetypes=[("JSON", "*.json"), ("Prometheus text", "*.prom")])
+        if path:
+            try:
+                telemetry.dump(path)
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to export stats: {str(e)}")
+                
+    def toggle_profiling(self):
+        if self.profiling.get():
+            self.profile_report = ""
+            telemetry.start_profiling()
+        else:
+            self.profile_report = telemetry.stop_profiling()
+        self.refresh_stats()
+        
+    def create_task_status(self, parent, key, action_button):
+        status = tk.StringVar()
+        cancel_button = ttk.Button(parent, text="Cancel", command=lambda: self.runner.cancel(key), state=tk.DISABLED)
+        cancel_button.pack(side=tk.LEFT, padx=5)
+        ttk.Label(parent, textvariable=status).pack(side=tk.LEFT, padx=5)
+        self.task_controls[key] = (action_button, cancel_button, status)
+        
+    def set_busy(self, key, busy):
+        action_button, cancel_button, status = self.task_controls[key]
+        action_button.config(state=tk.DISABLED if busy else tk.NORMAL)
+        cancel_button.config(state=tk.NORMAL if busy else tk.DISABLED)
+        status.set("Generating..." if busy else "")
+        if not busy:
+            self.update_cache_status()
+            
+    def update_cache_status(self):
+        if self.sales_agent and self.sales_agent.cache:
+            stats = self.sales_agent.cache.stats()
+            self.cache_status.set(f"Cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+        
+    def run_task(self, key, func, on_success, error_message, output=None):
+        """Run func(on_chunk, force) on the worker pool while the tab identified by key shows as busy
+        
+        When streaming is enabled, on_chunk appends partial text to the output widget as
+        it arrives; otherwise it is None and func should return the full text at once.
+        force is set when the user asked to bypass the response cache.
+        """
+        stream = self.stream_responses.get() and output is not None
+        force = self.force_regenerate.get()
+        if output is not None:
+            output.delete(1.0, tk.END)
+            
+        def work(task):
+            on_chunk = TextStream(self.runner, task, output).write if stream else None
+            return func(on_chunk, force)
+            
+        def on_error(e):
+            messagebox.showerror("Error", f"{error_message}: {str(e)}")
+            
+        self.runner.submit(key, work, on_success, on_error, on_finish=lambda: self.set_busy(key, False))
+        self.set_busy(key, True)
+        
+    def create_prospect_combo(self, parent, variable):
+        """Editable combobox whose dropdown lists the prospects matching the typed text"""
+        combo = ttk.Combobox(parent, textvariable=variable)
+        combo.configure(postcommand=lambda: combo.configure(values=self.prefix_index.search(variable.get(), COMBO_LIMIT)))
+        return combo
+        
+    @telemetry.timed("ui_update_seconds", widget="search_index")
+    def refresh_prospect_list(self):
+        """Rebuild the search indexes and list after loading every prospect"""
+        self.prefix_index.build(self.prospects.values())
+        self.search_index = ProspectSearchIndex()
+        self.search_index.build(self.prospects.values())
+        self.filter_prospect_list()
+        
+    @telemetry.timed("ui_update_seconds", widget="filter")
+    def filter_prospect_list(self):
+        text = self.prospect_filter.get().strip()
+        if text:
+            page = self.search_index.search(text, limit=FILTER_PAGE, prefix_last=True)
+            more = lambda last: self.search_index.search(text, limit=FILTER_PAGE, prefix_last=True, after=last)
+            self.prospect_listbox.set_items(page, more if len(page) == FILTER_PAGE else None)
+        else:
+            self.prospect_listbox.set_items(self.prospects)
+    
+    def clear_prospect_form(self):
+        self.current_prospect = None
+        self.prospect_name.set("")
+        self.prospect_company.set("")
+        self.prospect_role.set("")
+        self.prospect_interests.set("")
+        self.prospect_pain_points.set("")
+        self.prospect_notes.delete(1.0, tk.END)
+    
+    def save_prospect(self):
+        name = self.prospect_name.get()
+        if not name:
+            messagebox.showerror("Error", "Please enter a name for the prospect")
+            return
+        if not self.persistence:
+            messagebox.showerror("Error", "Prospects are still loading, please try again in a moment")
+            return
+            
+        company = self.prospect_company.get()
+        role = self.prospect_role.get()
+        is_new = name not in self.prospects
+        interests = [i.strip() for i in self.prospect_interests.get().split(",") if i.strip()]
+        pain_points = [p.strip() for p in self.prospect_pain_points.get().split(",") if p.strip()]
+        notes = self.prospect_notes.get(1.0, tk.END).strip()
+        
+        # Save to our dictionary, keeping the history of an existing prospect
+        existing = self.prospects.get(name)
+        self.prospects[name] = Prospect(
+            name, company, role, interests, pain_points, notes,
+            existing.last_contact if existing else None,
+            existing.interaction_history if existing else ()
+        )
+        
+        # Save to the store in the background
+        self.persistence.save(self.prospects[name])
+        if self.loading:
+            self.loading_edits.setdefault(name, [])
+        self.follow_ups.update(self.prospects[name])
+        
+        # Update UI, touching only this prospect's row
+        self.prefix_index.add(name, company)
+        self.search_index.add(self.prospects[name])
+        if self.prospect_filter.get().strip():
+            self.filter_prospect_list()
+        elif is_new:
+            self.prospect_listbox.append(name)
+        messagebox.showinfo("Success", f"Prospect '{name}' saved successfully")
+    
+    def load_prospect_details(self, event):
+        name = self.prospect_listbox.selected()
+        if not name:
+            return
+            
+        prospect = self.prospects.get(name)
+        
+        if self.prefetcher:
+            if prospect and self.prefetch_enabled.get():
+                self.prefetcher.prefetch(prospect)
+            else:
+                self.prefetcher.cancel()
+                
+        if prospect:
+            self.current_prospect = name
+            self.prospect_name.set(prospect.name)
+            self.prospect_company.set(prospect.company)
+            self.prospect_role.set(prospect.role)
+            self.prospect_interests.set(", ".join(prospect.interests))
+            self.prospect_pain_points.set(", ".join(prospect.pain_points))
+            
+            self.prospect_notes.delete(1.0, tk.END)
+            self.prospect_notes.insert(tk.END, prospect.notes)
+    
+    def delete_prospect(self):
+        name = self.prospect_listbox.selected()
+        if not name:
+            messagebox.showerror("Error", "Please select a prospect to delete")
+            return
+        
+        if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete prospect '{name}'?"):
+            del self.prospects[name]
+            self.persistence.delete(name)
+            if self.loading:
+                self.loading_edits.setdefault(name, [])
+            self.follow_ups.remove(name)
+            self.prefix_index.remove(name)
+            self.search_index.remove(name)
+            self.prospect_listbox.remove(name)
+            self.clear_prospect_form()
+    
+    def generate_email(self):
+        if not self.sales_agent:
+            messagebox.showerror("Error", "Please initialize the API first")
+            return
+            
+        prospect_name = self.email_prospect_var.get()
+        if not prospect_name:
+            messagebox.showerror("Error", "Please select a prospect")
+            return
+            
+        prospect = self.prospects.get(prospect_name)
+        if not prospect:
+            messagebox.showerror("Error", "Selected prospect not found")
+            return
+            
+        # Generate email
+        agent = self.sales_agent
+        
+        def show_email(email):
+            self.email_text.delete(1.0, tk.END)
+            self.email_text.insert(tk.END, email)
+            
+            # Log interaction
+            self.record_interaction(prospect_name, "email", "Generated email", update_last_contact=True)
+            
+        self.run_task("email", lambda on_chunk, force: self.after_prefetch(prospect_name, "email", force) or
+                      agent.generate_email(prospect, on_chunk, force), show_email,
+                      "Failed to generate email", output=self.email_text)
+    
+    def copy_email(self):
+        email_text = self.email_text.get(1.0, tk.END).strip()
+        if not email_text:
+            messagebox.showerror("Error", "No email to copy")
+            return
+            
+        self.root.clipboard_clear()
+        self.root.clipboard_append(email_text)
+        messagebox.showinfo("Success", "Email copied to clipboard")
+    
+    def generate_followup(self):
+        if not self.sales_agent:
+            messagebox.showerror("Error", "Please initialize the API first")
+            return
+            
+        prospect_name = self.followup_prospect_var.get()
+        if not prospect_name:
+            messagebox.showerror("Error", "Please select a prospect")
+            return
+            
+        prospect = self.prospects.get(prospect_name)
+        if not prospect:
+            messagebox.showerror("Error", "Selected prospect not found")
+            return
+            
+        try:
+            days = int(self.days_since_contact.get())
+        except ValueError:
+            messagebox.showerror("Error", "Days since contact must be a number")
+            return
+            
+        # Generate follow-up
+        agent = self.sales_agent
+        
+        def show_strategy(strategy):
+            self.strategy_text.delete(1.0, tk.END)
+            self.strategy_text.insert(tk.END, strategy)
+            
+        self.run_task("followup", lambda on_chunk, force: agent.suggest_follow_up(days, prospect, on_chunk, force),
+                      show_strategy, "Failed to generate follow-up strategy", output=self.strategy_text)
+    
+    def refresh_due_list(self):
+        """Redraw the follow-up list, and keep doing so while its tab is showing to pick up prepared strategies"""
+        if self.due_refresh:
+            self.root.after_cancel(self.due_refresh)
+            self.due_refresh = None
+        due = self.follow_ups.due_today(limit=DUE_LIMIT)
+        self.due_names = {}
+        for name, days, overdue, prepared in due:
+            label = f"{'* ' if prepared else ''}{name} ({days}d" + (f", {overdue}d late)" if overdue else ")")
+            self.due_names[label] = name
+        self.due_listbox.set_items(self.due_names)
+        count = self.follow_ups.due_count()
+        self.due_status.set(f"{count} due" + (f", showing {DUE_LIMIT} most overdue" if count > DUE_LIMIT else "")
+                            + (", * = strategy ready" if any(prepared for *_, prepared in due) else ""))
+        if self.notebook.select() == str(self.followup_tab):
+            self.due_refresh = self.root.after(DUE_REFRESH_MS, self.refresh_due_list)
+            
+    def select_due_prospect(self):
+        name = self.due_names.get(self.due_listbox.selected())
+        if not name:
+            return
+        self.followup_prospect_var.set(name)
+        self.select_followup_prospect()
+        
+    def select_followup_prospect(self):
+        """Fill in the days since the prospect was last contacted, and show a strategy prepared for them"""
+        name = self.followup_prospect_var.get()
+        days = self.follow_ups.days_since(name)
+        if days is not None:
+            self.days_since_contact.set(str(days))
+        strategy = self.follow_ups.suggestion(name)
+        if strategy and not self.runner.is_running("followup"):
+            self.strategy_text.delete(1.0, tk.END)
+            self.strategy_text.insert(tk.END, strategy)
+            
+    def toggle_follow_ups(self):
+        """Start or stop preparing strategies for due prospects on the bulk lane"""
+        if self.prepare_follow_ups.get() and self.sales_agent:
+            self.follow_ups.start(self.sales_agent, interval=FOLLOW_UP_INTERVAL)
+        else:
+            self.follow_ups.stop()
+    
+    def analyze_objection(self):
+        if not self.sales_agent:
+            messagebox.showerror("Error", "Please initialize the API first")
+            return
+            
+        prospect_name = self.objection_prospect_var.get()
+        if not prospect_name:
+            messagebox.showerror("Error", "Please select a prospect")
+            return
+            
+        prospect = self.prospects.get(prospect_name)
+        if not prospect:
+            messagebox.showerror("Error", "Selected prospect not found")
+            return
+            
+        objection_text = self.objection_input.get(1.0, tk.END).strip()
+        if not objection_text:
+            messagebox.showerror("Error", "Please enter an objection")
+            return
+            
+        # Analyze objection; the agent is shared with background work, so these are per call
+        agent = self.sales_agent
+        knowledge_base = self.objection_kb if self.objection_local.get() else None
+        refine = self.objection_refine.get()
+        
+        def show_analysis(analysis):
+            self.response_text.delete(1.0, tk.END)
+            self.response_text.insert(tk.END, analysis)
+            
+            # Log interaction
+            self.record_interaction(prospect_name, "objection", NOTE_PREFIX + objection_text)
+            
+        self.run_task("objection", lambda on_chunk, force: agent.analyze_objection(objection_text, prospect, on_chunk, force,
+                                                                                   knowledge_base, refine),
+                      show_analysis, "Failed to analyze objection", output=self.response_text)
+    
+    def generate_proposal(self):
+        if not self.sales_agent:
+            messagebox.showerror("Error", "Please initialize the API first")
+            return
+            
+        prospect_name = self.proposal_prospect_var.get()
+        if not prospect_name:
+            messagebox.showerror("Error", "Please select a prospect")
+            return
+            
+        prospect = self.prospects.get(prospect_name)
+        if not prospect:
+            messagebox.showerror("Error", "Selected prospect not found")
+            return
+            
+        # Generate proposal
+        agent = self.sales_agent
+        
+        def show_proposal(proposal):
+            self.proposal_text.delete(1.0, tk.END)
+            self.proposal_text.insert(tk.END, proposal)
+            
+            # Log interaction
+            self.record_interaction(prospect_name, "proposal", "Generated proposal outline")
+            
+        self.run_task("proposal", lambda on_chunk, force: self.after_prefetch(prospect_name, "proposal", force) or
+                      agent.create_proposal_outline(prospect, on_chunk, force),
+                      show_proposal, "Failed to generate proposal", output=self.proposal_text)
+    
+    def after_prefetch(self, name, artifact, force):
+        """On a worker thread: reuse a prefetch of the same response if it is already streaming, else cancel it"""
+        if self.prefetcher and not force:
+            self.prefetcher.wait_for(name, artifact, timeout=PREFETCH_WAIT)
+    
+    def generate_all(self):
+        """Fill every selected tab for the selected prospect from a single model call"""
+        if not self.sales_agent:
+            messagebox.showerror("Error", "Please initialize the API first")
+            return
+            
+        prospect_name = self.current_prospect
+        prospect = self.prospects.get(prospect_name) if prospect_name else None
+        if not prospect:
+            messagebox.showerror("Error", "Please select a prospect")
+            return
+            
+        artifacts = [artifact for artifact, selected in self.all_artifacts.items() if selected.get()]
+        if not artifacts:
+            messagebox.showerror("Error", "Please choose at least one thing to generate")
+            return
+            
+        objection_text = self.objection_input.get(1.0, tk.END).strip()
+        if "objection" in artifacts and not objection_text:
+            messagebox.showerror("Error", "Please enter an objection on the Objection Handler tab")
+            return
+            
+        try:
+            days = int(self.days_since_contact.get())
+        except ValueError:
+            messagebox.showerror("Error", "Days since contact must be a number")
+            return
+            
+        # artifact -> (tab key, output widget, prospect selector, interaction to log)
+        tabs = {
+            "email": ("email", self.email_text, self.email_prospect_var, ("email", "Generated email", True)),
+            "follow_up": ("followup", self.strategy_text, self.followup_prospect_var, None),
+            "objection": ("objection", self.response_text, self.objection_prospect_var,
+                          ("objection", NOTE_PREFIX + objection_text, False)),
+            "proposal": ("proposal", self.proposal_text, self.proposal_prospect_var,
+                         ("proposal", "Generated proposal outline", False)),
+        }
+        agent = self.sales_agent
+        force = self.force_regenerate.get()
+        
+        def set_tabs_busy(busy):
+            # The tabs only show progress; cancelling goes through the Generate All controls
+            for artifact in artifacts:
+                action_button, _, status = self.task_controls[tabs[artifact][0]]
+                action_button.config(state=tk.DISABLED if busy else tk.NORMAL)
+                status.set("Generating all..." if busy else "")
+                
+        def show_all(results):
+            for artifact, text in results.items():
+                _, output, _, interaction = tabs[artifact]
+                output.delete(1.0, tk.END)
+                output.insert(tk.END, text)
+                if interaction:
+                    self.record_interaction(prospect_name, *interaction)
+                    
+        def on_error(e):
+            messagebox.showerror("Error", f"Failed to generate: {str(e)}")
+            
+        def on_finish():
+            set_tabs_busy(False)
+            self.set_busy("all", False)
+            
+        for artifact in artifacts:
+            _, output, selector, _ = tabs[artifact]
+            output.delete(1.0, tk.END)
+            selector.set(prospect_name)
+        self.runner.submit("all", lambda task: agent.generate_all(prospect, artifacts, days, objection_text, force),
+                           show_all, on_error, on_finish)
+        set_tabs_busy(True)
+        self.set_busy("all", True)
+    
+    def record_interaction(self, name, interaction_type, notes, update_last_contact=False):
+        """Append an interaction to the prospect's history in the store and reschedule its follow-up"""
+        prospect = self.prospects.get(name)
+        if not prospect:
+            return
+        today = datetime.now().strftime("%Y-%m-%d")
+        interaction = {
+            "date": today,
+            "type": interaction_type,
+            "notes": notes
+        }
+        # The record in memory stays without history; only its last_contact changes
+        if update_last_contact:
+            prospect = prospect.replace(last_contact=today)
+            self.prospects[name] = prospect
+            self.search_index.add(prospect)
+        self.persistence.add_interaction(name, interaction, today if update_last_contact else None)
+        if self.loading:
+            self.loading_edits.setdefault(name, []).append(interaction)
+        self.follow_ups.record(prospect, interaction)
+        self.refresh_due_list()
+    
+    def check_persistence(self):
+        """Show failed background saves; they stay queued and are retried"""
+        error = self.persistence.stats()["error"]
+        self.save_status.set(f"Saving failed, will retry: {error}" if error else "")
+        self.root.after(PERSISTENCE_CHECK_MS, self.check_persistence)
+    
+    def load_prospects(self):
+        """Open the store and stream its prospects into the list a chunk at a time on a worker thread
+        
+        The search indexes and follow-up schedule are built on the worker too and
+        swapped in at the end, so the Tk thread never does more than add a chunk
+        to the list. Prospects edited meanwhile are re-applied to what was built.
+        Records are kept without their interaction history, which stays in the
+        store and is read a page at a time when needed.
+        """
+        self.loading = True
+        self.loading_edits = {}
+        self.set_transfer_busy(True, "Loading prospects...", cancellable=False)
+        
+        def work(task):
+            # The first run migrates an existing prospects.json into the store
+            with telemetry.timer("startup_seconds", stage="open_store"):
+                store = open_store(self.store_path)
+            self.runner.post(task, lambda: self.attach_store(store))
+            loaded = []
+            
+            def pairs():
+                for prospect in store.iter_prospects(history_limit=RECENT_HISTORY, batch_size=LOAD_CHUNK):
+                    if task.cancelled:
+                        return
+                    # Only the schedule needs the history; the record kept in memory goes without
+                    compact = prospect.replace(interaction_history=())
+                    loaded.append(compact)
+                    if len(loaded) % LOAD_CHUNK == 0:
+                        self.runner.post(task, lambda chunk=loaded[-LOAD_CHUNK:]: self.add_loaded_prospects(chunk))
+                    yield compact, prospect.interaction_history
+                if len(loaded) % LOAD_CHUNK:
+                    self.runner.post(task, lambda chunk=loaded[-(len(loaded) % LOAD_CHUNK):]: self.add_loaded_prospects(chunk))
+                    
+            with telemetry.timer("startup_seconds", stage="load_prospects"):
+                # Scheduled as they stream in, so no history is held longer than its prospect's turn
+                self.follow_ups.build_from(pairs())
+            if task.cancelled:
+                return None
+            with telemetry.timer("startup_seconds", stage="build_indexes"):
+                prefix_index = PrefixIndex()
+                prefix_index.build(loaded)
+                search_index = ProspectSearchIndex()
+                search_index.build(loaded)
+            return prefix_index, search_index
+            
+        def on_error(e):
+            self.loading = False
+            self.set_transfer_busy(False, "")
+            messagebox.showerror("Error", f"Failed to load prospects: {str(e)}")
+            
+        self.runner.submit("load", work, lambda indexes: self.finish_loading(*indexes), on_error)
+        
+    def attach_store(self, store):
+        self.store = store
+        self.persistence = PersistenceScheduler(store)
+        self.check_persistence()
+        
+    def add_loaded_prospects(self, chunk):
+        # Anything already in memory was saved or deleted by the rep since loading began
+        new = {prospect.name: prospect for prospect in chunk
+               if prospect.name not in self.prospects and prospect.name not in self.loading_edits}
+        self.prospects.update(new)
+        if not self.prospect_filter.get().strip():
+            self.prospect_listbox.extend(new)
+        self.transfer_status.set(f"Loading prospects... {len(self.prospects)}")
+        
+    def finish_loading(self, prefix_index, search_index):
+        # The schedule was built from the store as it was read; replay what happened since
+        for name, interactions in self.loading_edits.items():
+            prospect = self.prospects.get(name)
+            if prospect:
+                prefix_index.add(name, prospect.company)
+                search_index.add(prospect)
+                self.follow_ups.update(prospect)
+                for interaction in interactions:
+                    self.follow_ups.record(prospect, interaction)
+            else:
+                prefix_index.remove(name)
+                search_index.remove(name)
+                self.follow_ups.remove(name)
+        self.prefix_index = prefix_index
+        self.search_index = search_index
+        self.loading = False
+        self.loading_edits = {}
+        self.set_transfer_busy(False, f"{len(self.prospects)} prospects")
+        self.filter_prospect_list()
+        self.refresh_due_list()
+
+def main():
+    root = tk.Tk()
+    app = SalesAgentGUI(root)
+    root.mainloop()
+
+if __name__ == "__main__":
+    main()
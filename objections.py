@@ -0,0 +1,185 @@
+"""Local knowledge base of analysed objections
+
+Reps hear the same few dozen objections over and over, worded a little
+differently each time. ObjectionKnowledgeBase keeps every objection the model
+has analysed together with its analysis, and answers a new objection from the
+closest past one when they are similar enough, without calling the model.
+
+Objections are embedded as hashed n-gram vectors: the words left after
+dropping stop words, pairs of them and their character 3- and 4-grams are
+hashed into DIMENSIONS buckets and the result is L2-normalised, so cosine
+similarity is a sparse dot product. An inverted index from bucket to entries
+means a lookup only touches entries that share at least one feature with the
+query. Everything is pure Python and the vectors are rebuilt from the text on
+open, so the SQLite file only holds text.
+
+Analyses are stored with the prospect's name and company replaced by
+placeholders and filled back in for the prospect being answered.
+"""
+from collections import Counter, defaultdict, namedtuple
+import math
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+import telemetry
+
+DIMENSIONS = 1 << 14
+# Notes prefix the front ends use when they log an analysed objection
+NOTE_PREFIX = "Handled objection: "
+# Relative weight of each kind of feature; whole words say more than letter runs
+FEATURE_WEIGHTS = {"w": 1.0, "b": 1.0, "c": 0.4}
+
+# Negations change what an objection means without changing many n-grams, so
+# they are left out of the vectors and only objections that agree on being
+# negated are compared at all: "we have budget" never matches "we have no budget"
+NEGATIONS = frozenset("no not dont doesnt didnt cant cannot wont never nothing none".split())
+# Words that carry little meaning in an objection
+STOP_WORDS = NEGATIONS | frozenset("""
+    a an and are as at be been but by for from i im is it its me my of on or our so that the their them
+    they this to us was we were what with you your
+""".split())
+
+Match = namedtuple("Match", "similarity objection analysis")
+
+def normalize(text):
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower().replace("'", "")))
+
+def is_negated(text):
+    return any(word in NEGATIONS for word in normalize(text).split())
+
+def vectorize(text):
+    """Sparse unit vector {bucket: weight} for text"""
+    words = normalize(text).split()
+    words = [word for word in words if word not in STOP_WORDS] or words
+    features = Counter(f"w:{word}" for word in words)
+    features.update(f"b:{first} {second}" for first, second in zip(words, words[1:]))
+    for word in words:
+        padded = f" {word} "
+        for n in (3, 4):
+            features.update(f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+    vector = defaultdict(float)
+    for feature, count in features.items():
+        # crc32 rather than hash(), which changes between runs
+        vector[zlib.crc32(feature.encode("utf-8")) % DIMENSIONS] += FEATURE_WEIGHTS[feature[0]] * (1 + math.log(count))
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {bucket: weight / norm for bucket, weight in vector.items()} if norm else {}
+
+def similarity(first, second):
+    if len(first) > len(second):
+        first, second = second, first
+    return sum(weight * second.get(bucket, 0.0) for bucket, weight in first.items())
+
+class ObjectionKnowledgeBase:
+    """Past objections and their analyses with a nearest-neighbour lookup
+
+    lookup() answers when the closest entry's cosine similarity is at least
+    threshold. add() folds an objection into an existing entry when it is at
+    least dedup_threshold similar, so rewordings do not pile up.
+    """
+    def __init__(self, path="objections.db", threshold=0.75, dedup_threshold=0.9):
+        self.threshold = threshold
+        self.dedup_threshold = dedup_threshold
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS objections (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                objection TEXT NOT NULL,
+                analysis TEXT NOT NULL,
+                uses INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+        self.entries = {}
+        # One inverted index for negated objections and one for the rest
+        self.postings = {False: defaultdict(dict), True: defaultdict(dict)}
+        self.hits = 0
+        self.misses = 0
+        for entry_id, objection, analysis, uses in self.conn.execute("SELECT id, objection, analysis, uses FROM objections"):
+            self._index(entry_id, objection, analysis, uses)
+
+    def search(self, text, limit=5):
+        """The limit closest entries as (similarity, id) pairs, best first"""
+        query = vectorize(text)
+        postings = self.postings[is_negated(text)]
+        scores = defaultdict(float)
+        with self.lock:
+            for bucket, weight in query.items():
+                for entry_id, entry_weight in postings.get(bucket, {}).items():
+                    scores[entry_id] += weight * entry_weight
+        return sorted(((score, entry_id) for entry_id, score in scores.items()), reverse=True)[:limit]
+
+    def lookup(self, text, prospect=None):
+        """Match for the closest past objection, or None if nothing is similar enough"""
+        with telemetry.timer("objection_lookup_seconds"):
+            best = self.search(text, 1)
+            if not best or best[0][0] < self.threshold:
+                with self.lock:
+                    self.misses += 1
+                telemetry.increment("objection_lookups_total", result="miss")
+                return None
+            score, entry_id = best[0]
+            with self.lock:
+                entry = self.entries[entry_id]
+                entry[2] += 1
+                self.hits += 1
+                self.conn.execute("UPDATE objections SET uses = uses + 1 WHERE id = ?", (entry_id,))
+                self.conn.commit()
+            telemetry.increment("objection_lookups_total", result="hit")
+            return Match(round(score, 3), entry[0], fill(entry[1], prospect))
+
+    def add(self, text, analysis, prospect=None):
+        """Remember an analysis for text; returns False if a near-identical objection was already known"""
+        text = text.strip()
+        if not text or not analysis.strip():
+            return False
+        best = self.search(text, 1)
+        if best and best[0][0] >= self.dedup_threshold:
+            return False
+        analysis = generalize(analysis, prospect)
+        with self.lock:
+            cursor = self.conn.execute("INSERT INTO objections (objection, analysis, created) VALUES (?, ?, ?)",
+                                       (text, analysis, time.time()))
+            self.conn.commit()
+            self._index(cursor.lastrowid, text, analysis, 0)
+        return True
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _index(self, entry_id, objection, analysis, uses):
+        self.entries[entry_id] = [objection, analysis, uses]
+        postings = self.postings[is_negated(objection)]
+        for bucket, weight in vectorize(objection).items():
+            postings[bucket][entry_id] = weight
+
+def generalize(analysis, prospect):
+    """analysis with the prospect's name and company swapped for placeholders"""
+    if prospect is None:
+        return analysis
+    for value, placeholder in ((prospect.name, "{{name}}"), (prospect.company, "{{company}}")):
+        if value and len(value) > 2:
+            analysis = analysis.replace(value, placeholder)
+    return analysis
+
+def fill(analysis, prospect):
+    if prospect is None:
+        return analysis.replace("{{name}}", "the prospect").replace("{{company}}", "their company")
+    return analysis.replace("{{name}}", prospect.name).replace("{{company}}", prospect.company or "their company")
+
+def past_objections(prospect):
+    """Objection texts logged in a prospect's interaction history"""
+    for interaction in prospect.interaction_history:
+        notes = interaction.get("notes") or ""
+        if interaction.get("type") == "objection" and notes.startswith(NOTE_PREFIX):
+            yield notes[len(NOTE_PREFIX):]
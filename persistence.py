@@ -0,0 +1,187 @@
+"""Debounced background writes to a prospect store
+
+The GUI records every generated email, objection and proposal as soon as it
+is shown. Writing each change to the store on the Tk thread stalls the window
+and, for the JSON store, rewrites the whole profile file per click.
+PersistenceScheduler instead queues changes and writes them from one
+background thread:
+    - a burst of changes is written together once no new change has arrived
+      for debounce seconds, or max_delay seconds after the first of them
+    - repeated saves of the same prospect collapse into one, and consecutive
+      saves or interactions go to the store as a single batch
+    - a failed write keeps its changes queued and is retried after retry_delay
+    - flush() writes everything queued now; close(), also run at interpreter
+      exit, flushes and stops the thread
+The stores themselves write atomically (SQLite transactions, and temp file
+plus os.replace for the JSON profile file), so a crash loses at most the
+changes still queued, never the file.
+"""
+import atexit
+from itertools import groupby
+import threading
+import time
+
+import telemetry
+
+class PersistenceScheduler:
+    """Queue of pending store writes drained by a background thread"""
+    def __init__(self, store, debounce=0.5, max_delay=5.0, retry_delay=5.0):
+        self.store = store
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.retry_delay = retry_delay
+        self.condition = threading.Condition()
+        # (kind, payload) in the order the changes were made
+        self.ops = []
+        # Prospect name -> index in ops of its queued save, for coalescing
+        self.saves = {}
+        self.first_change = None
+        self.last_change = None
+        self.retry_at = None
+        self.flush_requested = False
+        self.writing = False
+        self.closed = False
+        self.attempts = 0
+        self.error = None
+        self.counters = {"changes": 0, "coalesced": 0, "writes": 0, "failures": 0}
+        self.thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def save(self, prospect):
+        """Queue store.save_prospect(prospect), replacing a queued save of the same prospect"""
+        with self.condition:
+            index = self.saves.get(prospect.name)
+            if index is None:
+                self.saves[prospect.name] = len(self.ops)
+                self.ops.append(("save", prospect))
+            else:
+                self.ops[index] = ("save", prospect)
+                self.counters["coalesced"] += 1
+            self._changed()
+
+    def delete(self, name):
+        with self.condition:
+            # A later save must not be merged into one queued before the delete
+            self.saves.pop(name, None)
+            self.ops.append(("delete", name))
+            self._changed()
+
+    def add_interaction(self, name, interaction, last_contact=None):
+        with self.condition:
+            self.ops.append(("interaction", (name, interaction, last_contact)))
+            self._changed()
+
+    @property
+    def pending(self):
+        with self.condition:
+            return len(self.ops) + self.writing
+
+    def flush(self, timeout=None):
+        """Write everything queued so far and wait for it; False if that timed out or failed"""
+        with self.condition:
+            if not self.ops and not self.writing:
+                return self.error is None
+            # A write already under way does not include changes queued after it began
+            target = self.attempts + (2 if self.writing and self.ops else 1)
+            self.flush_requested = True
+            self.condition.notify_all()
+            done = self.condition.wait_for(lambda: self.attempts >= target or not self.thread.is_alive(), timeout)
+            return done and not self.ops and self.error is None
+
+    def close(self, timeout=10.0):
+        """Flush and stop the background thread"""
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join(timeout)
+        atexit.unregister(self.close)
+
+    def stats(self):
+        with self.condition:
+            return dict(self.counters, pending=len(self.ops), error=str(self.error) if self.error else None)
+
+    def _changed(self):
+        now = time.monotonic()
+        if self.first_change is None:
+            self.first_change = now
+        self.last_change = now
+        self.counters["changes"] += 1
+        self.condition.notify_all()
+
+    def _due(self):
+        """Seconds until the queued changes should be written, 0 if now"""
+        if self.flush_requested or self.closed:
+            return 0
+        due = min(self.last_change + self.debounce, self.first_change + self.max_delay)
+        if self.retry_at is not None:
+            due = max(due, self.retry_at)
+        return max(0, due - time.monotonic())
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while True:
+                    if not self.ops:
+                        self.flush_requested = False
+                        if self.closed:
+                            return
+                        self.condition.wait()
+                        continue
+                    delay = self._due()
+                    if not delay:
+                        break
+                    self.condition.wait(delay)
+                ops, self.ops, self.saves = self.ops, [], {}
+                self.first_change = self.last_change = None
+                self.flush_requested = False
+                self.writing = True
+            failed = self._write(ops)
+            with self.condition:
+                self.writing = False
+                self.attempts += 1
+                if failed:
+                    # Put the unwritten changes back in front of anything queued meanwhile
+                    self.ops = failed + self.ops
+                    self.saves = {}
+                    for index, (kind, payload) in enumerate(self.ops):
+                        if kind == "save":
+                            self.saves[payload.name] = index
+                        elif kind == "delete":
+                            self.saves.pop(payload, None)
+                    self.first_change = self.last_change = time.monotonic()
+                    self.retry_at = self.first_change + self.retry_delay
+                else:
+                    self.retry_at = None
+                self.condition.notify_all()
+                if failed and self.closed:
+                    # One last attempt was made; give up rather than block exit
+                    return
+
+    def _write(self, ops):
+        """Apply ops in order, a batch per run of the same kind; returns the ops not written"""
+        done = 0
+        try:
+            with telemetry.timer("persistence_write_seconds"):
+                for kind, group in groupby(ops, key=lambda op: op[0]):
+                    payloads = [payload for _, payload in group]
+                    if kind == "save":
+                        self.store.save_prospects(payloads)
+                    elif kind == "interaction":
+                        self.store.add_interactions(payloads)
+                    else:
+                        for name in payloads:
+                            self.store.delete_prospect(name)
+                    done += len(payloads)
+        except Exception as e:
+            with self.condition:
+                self.error = e
+                self.counters["failures"] += 1
+            return ops[done:]
+        with self.condition:
+            self.error = None
+            self.counters["writes"] += 1
+        telemetry.observe("persistence_batch_size", len(ops))
+        return []
@@ -0,0 +1,151 @@
+"""Speculative generation for the prospect a rep is looking at
+
+Selecting a prospect usually means an email or proposal for them is about to
+be requested. Prefetcher starts those generations in the background as soon
+as the selection changes so the response is already in the cache when the
+button is clicked. Prefetches
+    - go through the bulk lane of a throttle.ThrottledBackend when there is one,
+      so anything the rep actually asks for is served first
+    - spend at most budget model calls per window seconds; cache hits are free
+    - are cancelled, between streamed chunks, as soon as the selection moves on
+    - never hold up a click: one that is not streaming yet is cancelled and the
+      click calls the model itself
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+import time
+
+from agent import SalesAgent
+from backends import ModelBackend
+from throttle import BULK
+
+# Artifact name -> call producing it, matching what the GUI buttons request
+ARTIFACTS = {
+    "email": lambda agent, prospect: agent.generate_email(prospect),
+    "proposal": lambda agent, prospect: agent.create_proposal_outline(prospect),
+}
+
+class PrefetchCancelled(Exception):
+    pass
+
+class PrefetchBudgetExceeded(Exception):
+    pass
+
+class _GuardedBackend(ModelBackend):
+    """Backend that charges the prefetch budget and stops early once the prefetch is cancelled"""
+    def __init__(self, backend, prefetcher):
+        self.backend = backend
+        self.prefetcher = prefetcher
+        self.model_name = backend.model_name
+
+    def generate(self, prompt, generation_config=None):
+        cancelled = self.prefetcher.local.cancelled
+        if cancelled.is_set():
+            raise PrefetchCancelled()
+        self.prefetcher.spend()
+        parts = []
+        for part in self.backend.stream(prompt, generation_config):
+            if cancelled.is_set():
+                raise PrefetchCancelled()
+            # Past the bulk lane's queue now, so a click is better off waiting for the rest
+            self.prefetcher.local.streaming.set()
+            parts.append(part)
+        return "".join(parts)
+
+class Prefetcher:
+    """Warm the response cache for one prospect at a time"""
+    def __init__(self, agent, artifacts=("email", "proposal"), budget=20, window=3600.0, max_workers=1):
+        backend = agent.backend.lane(BULK) if hasattr(agent.backend, "lane") else agent.backend
+        # A private agent sharing the cache, so prefetched responses are what the buttons look up
+        self.agent = SalesAgent(backend=_GuardedBackend(backend, self), cache=agent.cache)
+        self.agent.generation_config = agent.generation_config
+        self.agent.prompt_budget = agent.prompt_budget
+        self.artifacts = artifacts
+        self.budget = budget
+        self.window = window
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.spent = deque()
+        self.current = None
+        self.stats = {"started": 0, "completed": 0, "cancelled": 0, "over_budget": 0, "failed": 0}
+
+    def prefetch(self, prospect):
+        """Cancel whatever is being prefetched and start on prospect"""
+        self.cancel()
+        if self.agent.cache is None:
+            return
+        runs = {}
+        for artifact in self.artifacts:
+            cancelled, streaming = threading.Event(), threading.Event()
+            future = self.executor.submit(self._run, artifact, prospect, cancelled, streaming)
+            runs[artifact] = (future, cancelled, streaming)
+        self.current = (prospect.name, runs)
+
+    def cancel(self):
+        if self.current is None:
+            return
+        for run in self.current[1].values():
+            self._cancel_run(run)
+        self.current = None
+
+    def wait_for(self, name, artifact, timeout=5.0):
+        """Let an in-flight prefetch of artifact for name finish if its response is already streaming
+
+        Call this from a worker thread before generating, so a click that lands
+        while the prefetch is being answered reuses its result instead of paying
+        twice. A prefetch still queued, or still waiting for a bulk lane slot,
+        is cancelled instead so the click goes straight to the model; so is one
+        that has not finished within timeout seconds.
+        """
+        current = self.current
+        if current is None or current[0] != name or artifact not in current[1]:
+            return
+        run = current[1][artifact]
+        future, _, streaming = run
+        if future.done():
+            return
+        if not streaming.is_set() or wait([future], timeout).not_done:
+            self._cancel_run(run)
+
+    def spend(self):
+        """Take one model call from the budget or raise PrefetchBudgetExceeded"""
+        with self.lock:
+            now = time.monotonic()
+            while self.spent and self.spent[0] <= now - self.window:
+                self.spent.popleft()
+            if len(self.spent) >= self.budget:
+                raise PrefetchBudgetExceeded()
+            self.spent.append(now)
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _cancel_run(self, run):
+        future, cancelled, _ = run
+        cancelled.set()
+        future.cancel()
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _run(self, artifact, prospect, cancelled, streaming):
+        if cancelled.is_set():
+            return
+        self._count("started")
+        self.local.cancelled = cancelled
+        self.local.streaming = streaming
+        try:
+            ARTIFACTS[artifact](self.agent, prospect)
+        except PrefetchCancelled:
+            self._count("cancelled")
+        except PrefetchBudgetExceeded:
+            self._count("over_budget")
+        except Exception:
+            # A failed guess costs nothing visible; the real request will report errors
+            self._count("failed")
+        else:
+            self._count("completed")
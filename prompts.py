@@ -0,0 +1,245 @@
+"""Compiled prompt templates with token estimates and budgets
+
+Templates are written as readable indented blocks and compiled once at import:
+indentation and blank padding are stripped, the static instructions are put
+ahead of the prospect data so every call shares the same prefix, and the text
+is split into literal parts and fields so rendering is a single join.
+
+Prompt size is estimated at CHARS_PER_TOKEN characters per token. When a
+rendered prompt would exceed the template's budget, the largest prospect
+fields are shortened (lists lose their tail items, text is cut at a word
+boundary) until it fits. Every template keeps counters of the tokens it sent
+against what the uncompiled template would have sent; template_stats()
+reports them.
+"""
+from string import Formatter
+import threading
+
+CHARS_PER_TOKEN = 4
+DEFAULT_BUDGET = 512
+MIN_FIELD_CHARS = 24
+
+def estimate_tokens(text):
+    """Rough token count; Gemini averages about four characters per token for English"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+def compact(text):
+    """Strip indentation and trailing space from every line and collapse blank runs"""
+    lines = []
+    for line in text.strip().splitlines():
+        line = line.strip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return "\n".join(lines)
+
+def shorten(value, limit):
+    """value cut down to about limit characters, marking what was dropped"""
+    if isinstance(value, (list, tuple)):
+        if len(", ".join(value)) <= limit:
+            return list(value)
+        # Leave room for the "and N more" marker
+        limit -= 16
+        kept = []
+        used = 0
+        for item in value:
+            used += len(item) + 2
+            if kept and used > limit:
+                break
+            kept.append(item)
+        if len(kept) == 1 and len(kept[0]) > limit:
+            kept[0] = shorten(kept[0], limit)
+        dropped = len(value) - len(kept)
+        return kept + [f"and {dropped} more"] if dropped else kept
+    if len(value) <= limit:
+        return value
+    cut = value[:limit].rsplit(" ", 1)[0] or value[:limit]
+    return cut + "..."
+
+class PromptTemplate:
+    """One prompt: static instructions followed by prospect fields
+
+    instructions and data are format strings; fields named in data come from
+    the values passed to render(). Fields listed in fixed are never shortened.
+    """
+    def __init__(self, name, instructions, data, budget=DEFAULT_BUDGET, fixed=("name",)):
+        self.name = name
+        self.budget = budget
+        self.fixed = set(fixed)
+        self.prefix = compact(instructions)
+        self.parts = []
+        self.fields = []
+        for literal, field, _, _ in Formatter().parse("\n" + compact(data)):
+            self.parts.append(literal)
+            if field is not None:
+                self.fields.append(field)
+                self.parts.append(None)
+        # What the old indented f-string spent on fixed text, for savings reports
+        self.raw_chars = len(instructions) + len(data) - sum(len(field) + 2 for field in self.fields)
+        self.lock = threading.Lock()
+        self.counters = {"calls": 0, "tokens": 0, "raw_tokens": 0, "truncated": 0}
+
+    def render(self, budget=None, **values):
+        """Prompt text for values, shortened to fit budget tokens (the template's budget by default)"""
+        budget = budget or self.budget
+        original = values = {field: values[field] for field in self.fields}
+        raw_chars = self.raw_chars + sum(len(self._text(value)) for value in values.values())
+        prompt = self._join(values)
+        values = dict(original)
+        truncated = False
+        fixed = set(self.fixed)
+        limit = budget * CHARS_PER_TOKEN
+        while len(prompt) > limit:
+            shrinkable = [f for f in values if f not in fixed and len(self._text(values[f])) > MIN_FIELD_CHARS]
+            if not shrinkable:
+                break
+            field = max(shrinkable, key=lambda f: len(self._text(values[f])))
+            current = len(self._text(values[field]))
+            # Always cut from the original so list markers count what was really dropped
+            values[field] = shorten(original[field], max(MIN_FIELD_CHARS, current - (len(prompt) - limit)))
+            if len(self._text(values[field])) >= current:
+                # Could not get any shorter; try the next field
+                fixed.add(field)
+                continue
+            truncated = True
+            prompt = self._join(values)
+        with self.lock:
+            self.counters["calls"] += 1
+            self.counters["tokens"] += estimate_tokens(prompt)
+            self.counters["raw_tokens"] += -(-raw_chars // CHARS_PER_TOKEN)
+            self.counters["truncated"] += truncated
+        return prompt
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+        stats["saved_tokens"] = stats["raw_tokens"] - stats["tokens"]
+        stats["saved_percent"] = round(100.0 * stats["saved_tokens"] / stats["raw_tokens"], 1) if stats["raw_tokens"] else 0.0
+        return stats
+
+    def _join(self, values):
+        fields = iter(self.fields)
+        return self.prefix + "".join(part if part is not None else self._text(values[next(fields)]) for part in self.parts)
+
+    @staticmethod
+    def _text(value):
+        if isinstance(value, (list, tuple)):
+            return ", ".join(value)
+        return "None" if value is None else str(value)
+
+EMAIL = PromptTemplate("email", """
+    Generate a personalized sales email for the prospect below.
+    The email should be:
+    1. Professional but conversational
+    2. Brief (100-150 words)
+    3. Reference their pain points and interests
+    4. Include a clear call to action for a meeting
+    5. Avoid generic sales language
+    """, """
+    Name: {name}
+    Company: {company}
+    Role: {role}
+    Interests: {interests}
+    Pain points: {pain_points}
+    """)
+
+FOLLOW_UP = PromptTemplate("follow_up", """
+    Suggest a follow-up strategy for the prospect below, who has not responded since the last contact.
+    Provide:
+    1. A suggested follow-up channel (email, call, LinkedIn)
+    2. A brief message template
+    3. Timing recommendation
+    """, """
+    Days since contact: {days}
+    Name: {name}
+    Company: {company}
+    Role: {role}
+    Last contact: {last_contact}
+    """, fixed=("name", "days", "last_contact"))
+
+OBJECTION = PromptTemplate("objection", """
+    Analyze the sales objection below and provide effective responses.
+    Provide:
+    1. Analysis of the underlying concern
+    2. 2-3 effective responses that address the concern
+    3. A follow-up question to better understand their needs
+    """, """
+    Prospect: {name} from {company}
+    Objection: "{objection}"
+    """)
+
+OBJECTION_REFINE = PromptTemplate("objection_refine", """
+    Below is an analysis written for a similar sales objection from another prospect.
+    Adapt it to this prospect and the exact wording of their objection, keeping its structure:
+    1. Analysis of the underlying concern
+    2. 2-3 effective responses that address the concern
+    3. A follow-up question to better understand their needs
+    """, """
+    Prospect: {name} from {company}
+    Objection: "{objection}"
+    Similar objection: "{similar}"
+    Analysis of the similar objection:
+    {analysis}
+    """, budget=1024, fixed=("name", "objection"))
+
+PROPOSAL = PromptTemplate("proposal", """
+    Create a sales proposal outline for the prospect below.
+    Include:
+    1. Executive summary approach
+    2. Key sections to include
+    3. Recommended metrics/ROI to highlight
+    4. Suggested case studies or social proof
+    """, """
+    Prospect: {name}
+    Company: {company}
+    Role: {role}
+    Pain points: {pain_points}
+    """)
+
+TEMPLATES = {template.name: template for template in (EMAIL, FOLLOW_UP, OBJECTION, OBJECTION_REFINE, PROPOSAL)}
+_templates_lock = threading.Lock()
+
+def combined_template(names):
+    """Template asking for several artifacts in one JSON response, built once per combination
+
+    The instructions of each named template become the description of one
+    key; the data lines are merged, skipping lines whose fields are already
+    present. Its savings are measured against sending each template alone.
+    """
+    name = "+".join(names)
+    with _templates_lock:
+        template = TEMPLATES.get(name)
+        if template is None:
+            parts = [TEMPLATES[part] for part in names]
+            instructions = "\n".join(
+                ["Produce each of the following for the prospect below and answer with a single JSON "
+                 "object with one plain-text string per key:"]
+                + [f"\n{part.name}:\n{part.prefix}" for part in parts])
+            lines, seen = [], set()
+            for part in parts:
+                for line in "".join(_interleave(part)).split("\n"):
+                    fields = {field for _, field, _, _ in Formatter().parse(line) if field}
+                    if line and (not fields or fields - seen):
+                        lines.append(line)
+                        seen |= fields
+            template = PromptTemplate(name, instructions, "\n".join(lines),
+                                      fixed=set().union(*(part.fixed for part in parts)))
+            template.raw_chars = sum(part.raw_chars for part in parts)
+            template.schema = {
+                "type": "OBJECT",
+                "properties": {part.name: {"type": "STRING"} for part in parts},
+                "required": list(names),
+            }
+            TEMPLATES[name] = template
+    return template
+
+def _interleave(template):
+    """A template's data section with its fields back in place as placeholders"""
+    fields = iter(template.fields)
+    for part in template.parts:
+        yield part if part is not None else "{" + next(fields) + "}"
+
+def template_stats():
+    """Token counters per template, including what compiling, combining and budgeting saved"""
+    with _templates_lock:
+        templates = list(TEMPLATES.values())
+    return {template.name: template.stats() for template in templates}
@@ -0,0 +1,267 @@
+from bisect import bisect_left, bisect_right, insort
+import gc
+import heapq
+from itertools import islice
+import re
+
+TOKEN_RE = re.compile(r"\w+")
+
+class PrefixIndex:
+    """Sorted index of lowercase name and company keys for type-ahead lookups
+
+    Every prospect is indexed under its full name, its company and each word
+    of both, so typing a surname or the start of a company name finds it.
+    Adding or removing a prospect touches only its own keys.
+    """
+    def __init__(self):
+        self.keys = []
+        self.entries = {}
+
+    def build(self, prospects):
+        """Index every prospect from scratch with a single sort"""
+        self.entries = {p.name: self._keys_for(p.name, p.company) for p in prospects}
+        self.keys = sorted((key, name) for name, keys in self.entries.items() for key in keys)
+
+    def add(self, name, company=""):
+        self.remove(name)
+        keys = self._keys_for(name, company)
+        for key in keys:
+            insort(self.keys, (key, name))
+        self.entries[name] = keys
+
+    def remove(self, name):
+        for key in self.entries.pop(name, ()):
+            i = bisect_left(self.keys, (key, name))
+            if i < len(self.keys) and self.keys[i] == (key, name):
+                del self.keys[i]
+
+    def search(self, prefix, limit=None):
+        """Names with a key starting with prefix, in key order, without duplicates"""
+        prefix = prefix.strip().lower()
+        results = []
+        seen = set()
+        i = bisect_left(self.keys, (prefix, ""))
+        while i < len(self.keys) and self.keys[i][0].startswith(prefix):
+            name = self.keys[i][1]
+            if name not in seen:
+                seen.add(name)
+                results.append(name)
+                if limit and len(results) >= limit:
+                    break
+            i += 1
+        return results
+
+    def _keys_for(self, name, company):
+        keys = set()
+        for text in (name, company or ""):
+            text = text.strip().lower()
+            if text:
+                keys.add(text)
+                keys.update(text.split())
+        return keys
+
+class ProspectSearchIndex:
+    """Inverted index over prospect records for field-qualified, prefix and date-range queries
+
+    Query syntax, all terms ANDed together:
+        acme                  word in any field
+        acm*                  word prefix in any field
+        company:acme          word in one field (name, company, role, interests, pain_points, notes)
+        pain_points:hir*      prefix within one field
+        since:2025-01-01      last_contact on or after a date
+        until:2025-03-31      last_contact on or before a date (either may repeat)
+
+    Each field keeps token -> set of names postings plus a sorted vocabulary
+    for prefix lookups; last_contact dates are kept in a sorted list for
+    range queries. add() and remove() only touch one prospect's entries.
+    """
+    FIELDS = ("name", "company", "role", "interests", "pain_points", "notes")
+    ANY = "*"
+
+    def __init__(self):
+        self.postings = {field: {} for field in self.FIELDS + (self.ANY,)}
+        self.vocab = {field: [] for field in self.FIELDS + (self.ANY,)}
+        self.docs = {}
+        self.dates = []
+        self.names = []
+
+    def build(self, prospects):
+        """Replace the index with prospects, sorting the vocabularies and dates once at the end
+
+        A name given more than once is indexed as its last record.
+        """
+        self.postings = {field: {} for field in self.FIELDS + (self.ANY,)}
+        self.docs = {}
+        self.dates = []
+        # Bulk adds leave names and dates unsorted, so remove() can't run until the end
+        latest = {prospect.name: prospect for prospect in prospects}
+        # Building creates hundreds of thousands of small sets; collector passes would dominate
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for prospect in latest.values():
+                self.add(prospect, bulk=True)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        for field, postings in self.postings.items():
+            self.vocab[field] = sorted(postings)
+        self.dates.sort()
+        self.names = sorted(self.docs)
+
+    def add(self, prospect, bulk=False):
+        name = prospect.name
+        self.remove(name)
+        fields = {}
+        for field in self.FIELDS:
+            value = getattr(prospect, field) or ""
+            if isinstance(value, (list, tuple)):
+                value = " ".join(value)
+            fields[field] = set(tokenize(value))
+        fields[self.ANY] = set().union(*fields.values())
+        for field, tokens in fields.items():
+            postings = self.postings[field]
+            for token in tokens:
+                names = postings.get(token)
+                if names is None:
+                    names = postings[token] = set()
+                    if not bulk:
+                        insort(self.vocab[field], token)
+                names.add(name)
+        last_contact = prospect.last_contact
+        if last_contact and bulk:
+            self.dates.append((last_contact, name))
+        elif last_contact:
+            insort(self.dates, (last_contact, name))
+        if not bulk:
+            insort(self.names, name)
+        self.docs[name] = (fields, last_contact)
+
+    def remove(self, name):
+        doc = self.docs.pop(name, None)
+        if doc is None:
+            return
+        fields, last_contact = doc
+        del self.names[bisect_left(self.names, name)]
+        for field, tokens in fields.items():
+            for token in tokens:
+                self._unpost(field, token, name)
+        if last_contact:
+            i = bisect_left(self.dates, (last_contact, name))
+            if i < len(self.dates) and self.dates[i] == (last_contact, name):
+                del self.dates[i]
+
+    def search(self, query, limit=None, prefix_last=False, after=None):
+        """Names matching every term of query, sorted by name
+
+        With prefix_last the final plain word is treated as a prefix, which
+        suits search-as-you-type boxes. after skips names up to and including
+        it, so a list can ask for the next page of limit matches.
+
+        No term is materialised as a set: each is a list of postings a name
+        must be in one of, and a date range is a slice of the sorted dates.
+        Matches are collected from the smallest of them, checking the others
+        by lookup, or, for broad queries with a limit, by walking the sorted
+        names until limit of them match.
+        """
+        since = until = None
+        terms = []
+        words = query.split()
+        for i, word in enumerate(words):
+            field, _, value = word.partition(":") if ":" in word else (self.ANY, "", word)
+            # Repeated bounds narrow the range to where they all overlap
+            if field == "since":
+                since = max(since, value) if since else value
+                continue
+            if field == "until":
+                until = min(until, value) if until else value
+                continue
+            if field not in self.postings:
+                # Unknown qualifier: treat the whole term as plain text
+                field, value = self.ANY, word
+            prefix = value.endswith("*") or (prefix_last and i == len(words) - 1)
+            tokens = tokenize(value)
+            for j, token in enumerate(tokens):
+                if prefix and j == len(tokens) - 1:
+                    terms.append(self._prefix_postings(field, token))
+                else:
+                    names = self.postings[field].get(token)
+                    terms.append([names] if names else [])
+        first = bisect_right(self.names, after) if after is not None else 0
+        if not terms and not (since or until):
+            return self.names[first:first + limit] if limit else self.names[first:]
+
+        terms = sorted((sum(map(len, term)), term) for term in terms)
+        span = self._date_span(since, until) if since or until else None
+        smallest = terms[0][0] if terms else len(self.names)
+        dated = span[1] - span[0] if span else len(self.names)
+        if not smallest or not dated:
+            return []
+        total = len(self.names)
+        expected = total * (dated / total)
+        for size, _ in terms:
+            expected *= min(size, total) / total
+        check = [term for _, term in terms]
+        in_span = (lambda name: self._in_dates(self.docs[name][1], since, until)) if span else None
+
+        if limit and limit * total / max(expected, 1) < min(smallest, dated):
+            # Broad match: the first limit names in order turn up long before the smallest term is read
+            results = []
+            for name in islice(self.names, first, None):
+                if all(any(name in names for names in term) for term in check) and (in_span is None or in_span(name)):
+                    results.append(name)
+                    if len(results) >= limit:
+                        break
+            return results
+        if span and dated < smallest:
+            names = {name for _, name in islice(self.dates, span[0], span[1])}
+            in_span = None
+        else:
+            base = check.pop(0)
+            names = base[0] if len(base) == 1 else set().union(*base)
+        # Single postings intersect at C speed; prefix alternatives and the date range are
+        # then checked by lookup against whatever is left
+        singles = [term[0] for term in check if len(term) == 1]
+        if singles:
+            names = names.intersection(*singles)
+        check = [term for term in check if len(term) > 1]
+        if check or in_span or after is not None:
+            names = [name for name in names
+                     if (after is None or name > after)
+                     and all(any(name in names for names in term) for term in check)
+                     and (in_span is None or in_span(name))]
+        if limit:
+            return heapq.nsmallest(limit, names)
+        return sorted(names)
+
+    def _unpost(self, field, token, name):
+        postings = self.postings[field]
+        names = postings.get(token)
+        if names is None:
+            return
+        names.discard(name)
+        if not names:
+            del postings[token]
+            vocab = self.vocab[field]
+            del vocab[bisect_left(vocab, token)]
+
+    def _prefix_postings(self, field, prefix):
+        """Postings of every token in field starting with prefix"""
+        vocab = self.vocab[field]
+        postings = self.postings[field]
+        i = bisect_left(vocab, prefix)
+        j = bisect_left(vocab, prefix + "\uffff", i)
+        return [postings[token] for token in vocab[i:j]]
+
+    def _date_span(self, since, until):
+        """(start, end) of the slice of self.dates within since..until"""
+        start = bisect_left(self.dates, (since, "")) if since else 0
+        end = bisect_left(self.dates, (until + "\uffff", "")) if until else len(self.dates)
+        return start, max(start, end)
+
+    @staticmethod
+    def _in_dates(last_contact, since, until):
+        return bool(last_contact) and (not since or last_contact >= since) and (not until or last_contact < until + "\uffff")
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
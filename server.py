@@ -0,0 +1,318 @@
+"""Local HTTP API shared by several reps on one API quota
+
+Usage:
+    python server.py --port 8765 --concurrency 4
+    python server.py --fake --fake-latency 0.5
+
+Endpoints (JSON in, JSON out):
+    GET  /prospects?query=company:acme&limit=50
+    GET  /prospects/<name>?history=20
+    POST /generate-email   {"prospect": "Jane Doe", "force": false}
+    POST /follow-up        {"prospect": "Jane Doe", "days": 7}
+    POST /objection        {"prospect": "Jane Doe", "text": "Too expensive"}
+    POST /proposal         {"prospect": "Jane Doe"}
+    GET  /stats
+    GET  /metrics              Prometheus text format
+
+Emails, objections and proposals are logged to the prospect's history
+unless the body has "no_log": true; identical requests waiting on one call
+are logged once.
+
+At most --concurrency generations run against the model at once and no
+more than --rpm start per minute (fewer while the API is answering 429).
+Identical requests that arrive while one is already in flight wait for that
+call instead of starting their own. Generations run as coroutines on the
+server's event loop, so waiting on the model ties up no threads. Store reads
+and writes, which block on disk, run on the loop's default executor instead.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from objections import NOTE_PREFIX
+from prompts import template_stats
+from search import ProspectSearchIndex
+from store import DEFAULT_STORE, open_store
+import telemetry
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+               500: "Internal Server Error"}
+# Largest request body accepted; every endpoint takes a few short fields
+MAX_BODY = 1024 * 1024
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class ApiServer:
+    """asyncio HTTP server wrapping an AsyncSalesAgent and a prospect store"""
+    OPERATIONS = {
+        "/generate-email": ("email", "Generated email", True),
+        "/follow-up": (None, None, False),
+        "/objection": ("objection", None, False),
+        "/proposal": ("proposal", "Generated proposal outline", False),
+    }
+
+    def __init__(self, agent, store, host="127.0.0.1", port=8765, max_concurrency=4):
+        self.agent = agent
+        self.store = store
+        self.host = host
+        self.port = port
+        self.upstream = asyncio.Semaphore(max_concurrency)
+        self.in_flight = {}
+        self.stats = {"requests": 0, "upstream_calls": 0, "coalesced": 0, "errors": 0}
+        self.index = ProspectSearchIndex()
+        self.server = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        prospects = await loop.run_in_executor(None, lambda: self.store.load_all(history_limit=0))
+        self.index.build(prospects.values())
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HttpError as e:
+                    # The rest of the stream cannot be trusted to start at a request boundary
+                    writer.write(encode_response(e.status, {"error": str(e)}, keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                self.stats["requests"] += 1
+                started = time.perf_counter()
+                try:
+                    status, payload = 200, await self.dispatch(method, target, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    status, payload = 500, {"error": str(e)}
+                telemetry.observe("http_request_seconds", time.perf_counter() - started,
+                                  path=self.route_label(target), status=status)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(encode_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == "/stats":
+            return await asyncio.to_thread(self.get_stats)
+        if url.path == "/metrics":
+            return telemetry.to_prometheus()
+        if url.path == "/prospects":
+            limit = int_param(params.get("limit"), "limit", 100, minimum=1)
+            names = self.index.search(params.get("query", ""), limit)
+            prospects = await asyncio.to_thread(lambda: [self.store.get_prospect(name, 0) for name in names])
+            return [prospect.to_dict(history=False) for prospect in prospects if prospect]
+        if url.path.startswith("/prospects/"):
+            history = int_param(params.get("history"), "history", None, minimum=0)
+            return (await self.require_prospect(unquote(url.path[len("/prospects/"):]), history)).to_dict()
+        if url.path in self.OPERATIONS:
+            if method != "POST":
+                raise HttpError(405, "use POST")
+            try:
+                request = json.loads(body or b"{}")
+            except ValueError:
+                raise HttpError(400, "request body must be JSON")
+            if not isinstance(request, dict):
+                raise HttpError(400, "request body must be a JSON object")
+            return await self.generate(url.path, request)
+        raise HttpError(404, f"no route for {url.path}")
+
+    async def require_prospect(self, name, history_limit=0):
+        if name is not None and not isinstance(name, str):
+            raise HttpError(400, "prospect must be a string")
+        prospect = await asyncio.to_thread(self.store.get_prospect, name, history_limit) if name else None
+        if prospect is None:
+            raise HttpError(404, f"prospect {name!r} not found")
+        return prospect
+
+    async def generate(self, path, request):
+        prospect = await self.require_prospect(request.get("prospect"))
+        force = bool(request.get("force"))
+        if path == "/generate-email":
+            call = lambda: self.agent.generate_email(prospect, force=force)
+            args = ()
+        elif path == "/follow-up":
+            days = int_param(request.get("days"), "days", 7, minimum=0)
+            call = lambda: self.agent.suggest_follow_up(days, prospect, force=force)
+            args = (days,)
+        elif path == "/objection":
+            text = request.get("text")
+            text = text.strip() if isinstance(text, str) else ""
+            if not text:
+                raise HttpError(400, "text is required")
+            call = lambda: self.agent.analyze_objection(text, prospect, force=force)
+            args = (text,)
+        else:
+            call = lambda: self.agent.create_proposal_outline(prospect, force=force)
+            args = ()
+
+        log = self.OPERATIONS[path][0] is not None and not request.get("no_log")
+        key = (path, prospect.name, args, force, log)
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.call_upstream(call, path, prospect, args if log else None))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self.in_flight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        # Shield so one client disconnecting does not cancel the call others are waiting on
+        result = await asyncio.shield(task)
+        return {"prospect": prospect.name, "result": result}
+
+    async def call_upstream(self, call, path, prospect, log_args=None):
+        """Make one generation and, given log_args, log it once for everyone waiting on it"""
+        async with self.upstream:
+            self.stats["upstream_calls"] += 1
+            result = await call()
+        if log_args is not None:
+            interaction_type, notes, update_last_contact = self.OPERATIONS[path]
+            interaction = await asyncio.to_thread(self.store.record_interaction, prospect.name, interaction_type,
+                                                  notes or NOTE_PREFIX + log_args[0], update_last_contact)
+            if update_last_contact:
+                self.index.add(prospect.replace(last_contact=interaction["date"]))
+        return result
+
+    def get_stats(self):
+        stats = dict(self.stats, in_flight=len(self.in_flight))
+        if getattr(self.agent, "cache", None) is not None:
+            stats["cache"] = self.agent.cache.stats()
+        if hasattr(self.agent.backend, "stats"):
+            stats["backend"] = self.agent.backend.stats()
+        if getattr(self.agent, "objections", None) is not None:
+            stats["objections"] = self.agent.objections.stats()
+        stats["prompts"] = template_stats()
+        stats["telemetry"] = telemetry.snapshot()
+        return stats
+        
+    def route_label(self, target):
+        """Path for metric labels, without prospect names so series stay few"""
+        path = urlsplit(target).path
+        return "/prospects/<name>" if path.startswith("/prospects/") else path
+
+def int_param(value, name, default, minimum=None):
+    """value, from a query string or a JSON body, as an int; HttpError 400 if it is not one"""
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool) or isinstance(value, float) and not value.is_integer():
+        raise HttpError(400, f"{name} must be an integer")
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise HttpError(400, f"{name} must be an integer")
+    if minimum is not None and number < minimum:
+        raise HttpError(400, f"{name} must be at least {minimum}")
+    return number
+
+async def read_request(reader):
+    """Read one HTTP/1.1 request; returns None when the client closed the connection"""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise ConnectionError("malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HttpError(400, "Content-Length must be an integer")
+    if length < 0:
+        raise HttpError(400, "Content-Length must not be negative")
+    if length > MAX_BODY:
+        raise HttpError(413, f"request body is limited to {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+def encode_response(status, payload, keep_alive=True):
+    """HTTP response for payload: strings are sent as plain text, anything else as JSON"""
+    if isinstance(payload, str):
+        body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+    else:
+        body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'Error')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+async def serve(agent, store, host, port, max_concurrency):
+    server = ApiServer(agent, store, host, port, max_concurrency)
+    await server.start()
+    print(f"Serving on http://{host}:{server.port}", file=sys.stderr)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP API for the sales agent")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=4, help="maximum concurrent model calls")
+    parser.add_argument("--rpm", type=int, default=60, help="maximum model requests per minute, 0 for unlimited")
+    parser.add_argument("--store", default=DEFAULT_STORE)
+    parser.add_argument("--api-key", default=os.environ.get("GEMINI_API_KEY"))
+    parser.add_argument("--fake", action="store_true", help="use the offline stub backend")
+    parser.add_argument("--fake-latency", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    from agent import AsyncSalesAgent
+    from backends import GeminiBackend, StubBackend
+    from cache import ResponseCache
+    from objections import ObjectionKnowledgeBase
+    from throttle import ThrottledBackend
+    if args.fake:
+        backend = StubBackend(latency=args.fake_latency)
+    elif args.api_key:
+        backend = GeminiBackend(args.api_key)
+    else:
+        parser.error("--api-key or GEMINI_API_KEY is required unless --fake is given")
+    agent = AsyncSalesAgent(backend=ThrottledBackend(backend, requests_per_minute=args.rpm),
+                            cache=ResponseCache("response_cache.db"))
+    agent.objections = ObjectionKnowledgeBase("objections.db")
+
+    store = open_store(args.store)
+    try:
+        asyncio.run(serve(agent, store, args.host, args.port, args.concurrency))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
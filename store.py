@@ -0,0 +1,727 @@
+"""Prospect storage backends
+
+Usage:
+    python store.py migrate prospects.json prospects.db
+"""
+from array import array
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+import telemetry
+
+DEFAULT_STORE = "prospects.db"
+LEGACY_JSON = "prospects.json"
+PROFILE_FIELDS = ("name", "company", "role", "interests", "pain_points", "notes", "last_contact")
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+class Prospect:
+    """Immutable prospect record shared by the stores, the agent and the front ends
+
+    Fields are those of prospects.json; interests, pain_points and
+    interaction_history are tuples. Since a record never changes, it can be
+    handed to several threads without copying. replace() returns an updated
+    record and to_dict() the JSON layout.
+
+    Companies, roles, dates and list items repeat across a book of prospects,
+    so they are interned: 100k records share a few thousand strings instead of
+    each holding its own copies.
+    """
+    __slots__ = PROFILE_FIELDS + ("interaction_history",)
+
+    def __init__(self, name, company="", role="", interests=(), pain_points=(), notes="", last_contact=None,
+                 interaction_history=()):
+        init = object.__setattr__
+        init(self, "name", name)
+        init(self, "company", _intern(company or ""))
+        init(self, "role", _intern(role or ""))
+        init(self, "interests", tuple(map(_intern, interests or ())))
+        init(self, "pain_points", tuple(map(_intern, pain_points or ())))
+        init(self, "notes", notes or "")
+        init(self, "last_contact", _intern(last_contact))
+        init(self, "interaction_history", tuple(interaction_history or ()))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data[field] for field in cls.__slots__ if field in data})
+
+    def replace(self, **changes):
+        fields = {field: getattr(self, field) for field in self.__slots__}
+        fields.update(changes)
+        return Prospect(**fields)
+
+    def with_interaction(self, interaction, last_contact=None):
+        """Record with interaction appended to its history and, if given, a new last_contact"""
+        return self.replace(interaction_history=self.interaction_history + (interaction,),
+                            last_contact=last_contact or self.last_contact)
+
+    def to_dict(self, history=True):
+        data = {field: getattr(self, field) for field in PROFILE_FIELDS}
+        data["interests"] = list(self.interests)
+        data["pain_points"] = list(self.pain_points)
+        if history:
+            data["interaction_history"] = list(self.interaction_history)
+        return data
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Prospect is immutable; use replace()")
+
+    __delattr__ = __setattr__
+
+    def __reduce__(self):
+        return Prospect, tuple(getattr(self, field) for field in self.__slots__)
+
+    def __eq__(self, other):
+        if not isinstance(other, Prospect):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Prospect(name={self.name!r}, company={self.company!r}, role={self.role!r})"
+
+class ProspectStore:
+    """Interface shared by the prospect storage backends
+
+    Records are Prospect instances in both directions. Every write method
+    persists its change immediately.
+    """
+    def load_all(self, history_limit=None):
+        """Return every prospect keyed by name, with at most history_limit recent interactions each"""
+        raise NotImplementedError
+
+    def get_prospect(self, name, history_limit=None):
+        """Return one prospect like load_all does, or None if there is no such prospect"""
+        raise NotImplementedError
+
+    def get_history(self, name, limit=None):
+        """Return a prospect's interactions, oldest first, or only the most recent limit of them"""
+        raise NotImplementedError
+
+    def save_prospect(self, prospect):
+        """Insert or update a prospect's profile; its interaction history is kept"""
+        raise NotImplementedError
+
+    def save_prospects(self, prospects):
+        """save_prospect for many prospects as one write"""
+        raise NotImplementedError
+
+    def import_prospects(self, prospects):
+        """Write full prospect records, including history and last_contact, as one write"""
+        raise NotImplementedError
+
+    def get_profiles(self, names):
+        """Return {name: prospect without history} for those of names that exist"""
+        raise NotImplementedError
+
+    def iter_prospects(self, history_limit=0, batch_size=500):
+        """Yield every prospect in name order, reading batch_size of them at a time"""
+        raise NotImplementedError
+
+    def delete_prospect(self, name):
+        """Remove a prospect and its interaction history"""
+        raise NotImplementedError
+
+    def add_interaction(self, name, interaction, last_contact=None):
+        """Append an interaction and optionally update the prospect's last_contact date"""
+        raise NotImplementedError
+
+    def add_interactions(self, entries):
+        """add_interaction for many (name, interaction, last_contact) entries as one write"""
+        raise NotImplementedError
+
+    def record_interaction(self, name, interaction_type, notes, update_last_contact=False):
+        """Log an interaction dated today and return it"""
+        today = datetime.now().strftime("%Y-%m-%d")
+        interaction = {"date": today, "type": interaction_type, "notes": notes}
+        self.add_interaction(name, interaction, today if update_last_contact else None)
+        return interaction
+
+    def close(self):
+        pass
+
+class InteractionJournal:
+    """Append-only, line-delimited log of interactions with a per-prospect offset index
+
+    Every interaction is one JSON line, appended and fsync'd. The index maps
+    each prospect to the byte offsets of its lines, so reading one prospect's
+    history seeks straight to them instead of parsing the whole log. The
+    index is saved next to the journal and any lines written after it was
+    saved are re-scanned on open. Deleting a prospect appends a tombstone;
+    compact() rewrites the log without dead lines, grouped by prospect, and
+    starts a new generation; a JournalReader opened on an older one reopens
+    the file before its next read. Offsets are kept in arrays of 64-bit
+    integers rather than lists of int objects, which is a third of the memory
+    for a large journal.
+    """
+    def __init__(self, path, compact_min=1000, index_every=500):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.compact_min = compact_min
+        self.index_every = index_every
+        self.lock = threading.Lock()
+        self.offsets = {}
+        self.last_contact = {}
+        self.dead = 0
+        self.size = 0
+        self.unindexed = 0
+        self.generation = 0
+        self._load_index()
+        self.file = open(path, "ab")
+        self.maybe_compact()
+
+    def append(self, name, interaction, last_contact=None, sync=True):
+        entry = {"prospect": name}
+        entry.update(interaction)
+        if last_contact:
+            entry["last_contact"] = last_contact
+        data = (json.dumps(entry) + "\n").encode("utf-8")
+        with self.lock:
+            self.file.write(data)
+            if sync:
+                self._sync()
+            self._apply(entry, self.size)
+            self.size += len(data)
+            self.unindexed += 1
+            # Batched appends save the index once, on sync(), rather than every index_every lines
+            if sync and self.unindexed >= self.index_every:
+                self._save_index()
+
+    def sync(self):
+        with self.lock:
+            self._sync()
+            if self.unindexed >= self.index_every:
+                self._save_index()
+
+    def delete(self, name):
+        if name in self.offsets:
+            self.append(name, {"deleted": True})
+            self.maybe_compact()
+
+    def history(self, name, limit=None, reader=None):
+        """name's interactions, the limit most recent if given; reader is a JournalReader to reuse"""
+        if reader is None:
+            with JournalReader(self) as reader:
+                return self.history(name, limit, reader)
+        with self.lock:
+            # Offsets and the file they point into must come from the same generation,
+            # and lines appended without a sync are still in the write buffer
+            offsets = self.offsets.get(name)
+            if not offsets or limit == 0:
+                return []
+            offsets = offsets[-limit:] if limit else offsets[:]
+            self.file.flush()
+            f = reader.file_for(self.generation)
+        interactions = []
+        for offset in offsets:
+            f.seek(offset)
+            entry = json.loads(f.readline())
+            del entry["prospect"]
+            entry.pop("last_contact", None)
+            for key in ("date", "type"):
+                if key in entry:
+                    entry[key] = _intern(entry[key])
+            interactions.append(entry)
+        return interactions
+
+    def maybe_compact(self):
+        live = sum(len(offsets) for offsets in self.offsets.values())
+        if self.dead >= self.compact_min and self.dead > live:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the journal keeping only live lines, grouped by prospect"""
+        with self.lock:
+            self._sync()
+            tmp_path = self.path + ".tmp"
+            offsets = {}
+            size = 0
+            with open(self.path, "rb") as src, open(tmp_path, "wb") as dst:
+                for name, lines in self.offsets.items():
+                    offsets[name] = array("q")
+                    for offset in lines:
+                        src.seek(offset)
+                        line = src.readline()
+                        dst.write(line)
+                        offsets[name].append(size)
+                        size += len(line)
+                dst.flush()
+                os.fsync(dst.fileno())
+            self.file.close()
+            os.replace(tmp_path, self.path)
+            self.file = open(self.path, "ab")
+            self.offsets = offsets
+            self.size = size
+            self.dead = 0
+            self.generation += 1
+            self._save_index()
+
+    def close(self):
+        with self.lock:
+            self._sync()
+            self.file.close()
+            self._save_index()
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def _apply(self, entry, offset):
+        name = entry["prospect"]
+        if entry.get("deleted"):
+            self.dead += len(self.offsets.pop(name, [])) + 1
+            self.last_contact.pop(name, None)
+            return
+        self.offsets.setdefault(name, array("q")).append(offset)
+        if entry.get("last_contact"):
+            self.last_contact[name] = entry["last_contact"]
+
+    def _load_index(self):
+        journal_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = None
+        if index and index["size"] <= journal_size:
+            self.offsets = {name: array("q", lines) for name, lines in index["offsets"].items()}
+            self.last_contact = index["last_contact"]
+            self.dead = index["dead"]
+            self.size = index["size"]
+        if self.size < journal_size:
+            self._scan()
+
+    def _scan(self):
+        offset = self.size
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self._apply(json.loads(line), offset)
+                offset += len(line)
+                self.unindexed += 1
+        if offset < os.path.getsize(self.path):
+            # Drop a line torn by a crash mid-append so new lines start clean
+            os.truncate(self.path, offset)
+        self.size = offset
+
+    def _save_index(self):
+        offsets = {name: lines.tolist() for name, lines in self.offsets.items()}
+        index = {"size": self.size, "dead": self.dead, "offsets": offsets, "last_contact": self.last_contact}
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+        self.unindexed = 0
+
+class JournalReader:
+    """Read handle on an InteractionJournal, shared by the history() calls of one scan
+
+    A handle opened before a compaction still sees the old file, whose
+    offsets no longer match, so the file is reopened when the generation
+    changes.
+    """
+    def __init__(self, journal):
+        self.journal = journal
+        self.file = None
+        self.generation = None
+
+    def file_for(self, generation):
+        if self.file is None or generation != self.generation:
+            self.close()
+            self.file = open(self.journal.path, "rb")
+            self.generation = generation
+        return self.file
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class JsonProspectStore(ProspectStore):
+    """Prospect profiles in one JSON file, interactions in an append-only journal beside it
+
+    The profile file is only rewritten when a prospect is saved or deleted;
+    logging an interaction is a single journal append. Rewrites go to a
+    temporary file that replaces the profile file once it is complete, so a
+    crash leaves either the old or the new file, never a truncated one.
+    Profiles are held as Prospect records without history, whose strings are
+    shared, rather than as the dicts parsed from the file.
+    """
+    def __init__(self, path=LEGACY_JSON, journal_path=None):
+        self.path = path
+        self.lock = threading.RLock()
+        profiles = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                profiles = json.load(f)
+        self.journal = InteractionJournal(journal_path or journal_path_for(path))
+        
+        # Older files keep each prospect's history inline; move it to the journal once
+        migrate = any("interaction_history" in profile for profile in profiles.values())
+        if migrate:
+            for name, profile in profiles.items():
+                history = profile.pop("interaction_history", [])
+                if name not in self.journal.offsets:
+                    for interaction in history:
+                        self.journal.append(name, interaction, sync=False)
+            self.journal.sync()
+        self.prospects = {name: Prospect.from_dict(dict(profile, name=name)) for name, profile in profiles.items()}
+        del profiles
+        if migrate:
+            self._write()
+
+    @telemetry.timed("store_seconds", op="load_all", store="json")
+    def load_all(self, history_limit=None):
+        with self.lock:
+            with JournalReader(self.journal) as reader:
+                return {name: self._record(name, self.journal.history(name, history_limit, reader))
+                        for name in self.prospects}
+
+    def get_prospect(self, name, history_limit=None):
+        if name not in self.prospects:
+            return None
+        return self._record(name, self.journal.history(name, history_limit))
+
+    def get_history(self, name, limit=None):
+        return self.journal.history(name, limit)
+
+    @telemetry.timed("store_seconds", op="save_prospect", store="json")
+    def save_prospect(self, prospect):
+        with self.lock:
+            self.prospects[prospect.name] = self._profile(prospect)
+            self._write()
+
+    @telemetry.timed("store_seconds", op="save_prospects", store="json")
+    def save_prospects(self, prospects):
+        with self.lock:
+            for prospect in prospects:
+                self.prospects[prospect.name] = self._profile(prospect)
+            self._write()
+
+    @telemetry.timed("store_seconds", op="import_prospects", store="json")
+    def import_prospects(self, prospects):
+        with self.lock:
+            for prospect in prospects:
+                self.prospects[prospect.name] = prospect.replace(interaction_history=())
+                for interaction in prospect.interaction_history:
+                    self.journal.append(prospect.name, interaction, sync=False)
+            self.journal.sync()
+            self._write()
+
+    def get_profiles(self, names):
+        return {name: self._record(name, ()) for name in names if name in self.prospects}
+
+    def iter_prospects(self, history_limit=0, batch_size=500):
+        # Profiles are in memory already; only histories are read as we go
+        with JournalReader(self.journal) as reader:
+            with self.lock:
+                names = sorted(self.prospects)
+            for name in names:
+                with self.lock:
+                    if name not in self.prospects:
+                        # Deleted since the scan started
+                        continue
+                    profile = self._record(name, ())
+                yield profile.replace(interaction_history=self.journal.history(name, history_limit, reader))
+
+    @telemetry.timed("store_seconds", op="delete_prospect", store="json")
+    def delete_prospect(self, name):
+        with self.lock:
+            self.prospects.pop(name, None)
+            self._write()
+            self.journal.delete(name)
+
+    @telemetry.timed("store_seconds", op="add_interaction", store="json")
+    def add_interaction(self, name, interaction, last_contact=None):
+        if name not in self.prospects:
+            raise KeyError(name)
+        self.journal.append(name, interaction, last_contact)
+
+    @telemetry.timed("store_seconds", op="add_interactions", store="json")
+    def add_interactions(self, entries):
+        for name, interaction, last_contact in entries:
+            if name not in self.prospects:
+                raise KeyError(name)
+            self.journal.append(name, interaction, last_contact, sync=False)
+        self.journal.sync()
+
+    def close(self):
+        self.journal.close()
+
+    def _record(self, name, history):
+        return self.prospects[name].replace(last_contact=self._last_contact(name), interaction_history=history)
+
+    def _last_contact(self, name):
+        dates = [d for d in (self.prospects[name].last_contact, self.journal.last_contact.get(name)) if d]
+        return max(dates) if dates else None
+
+    def _profile(self, prospect):
+        """prospect without history, keeping the last_contact already in the profile file"""
+        existing = self.prospects.get(prospect.name)
+        return prospect.replace(last_contact=existing.last_contact if existing else prospect.last_contact,
+                                interaction_history=())
+
+    def _write(self):
+        tmp_path = self.path + ".tmp"
+        with self.lock, open(tmp_path, "w") as f:
+            json.dump({name: prospect.to_dict(history=False) for name, prospect in self.prospects.items()}, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+class SqliteProspectStore(ProspectStore):
+    """SQLite store in WAL mode with prospects and interactions in separate indexed tables
+
+    Saving a prospect is a single-row upsert and logging an interaction is a
+    single-row insert, so the cost of a write no longer grows with the number
+    of prospects or the length of their histories.
+    """
+    def __init__(self, path=DEFAULT_STORE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS prospects (
+                name TEXT PRIMARY KEY,
+                company TEXT NOT NULL DEFAULT '',
+                role TEXT NOT NULL DEFAULT '',
+                interests TEXT NOT NULL DEFAULT '[]',
+                pain_points TEXT NOT NULL DEFAULT '[]',
+                notes TEXT NOT NULL DEFAULT '',
+                last_contact TEXT
+            );
+            CREATE INDEX IF NOT EXISTS prospects_company ON prospects(company);
+            CREATE INDEX IF NOT EXISTS prospects_last_contact ON prospects(last_contact);
+            CREATE TABLE IF NOT EXISTS interactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                prospect TEXT NOT NULL REFERENCES prospects(name) ON DELETE CASCADE,
+                date TEXT NOT NULL,
+                type TEXT NOT NULL,
+                notes TEXT NOT NULL DEFAULT ''
+            );
+            CREATE INDEX IF NOT EXISTS interactions_prospect ON interactions(prospect, id);
+        """)
+        self.conn.commit()
+
+    def is_empty(self):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM prospects LIMIT 1").fetchone() is None
+
+    @telemetry.timed("store_seconds", op="load_all", store="sqlite")
+    def load_all(self, history_limit=None):
+        profiles = {}
+        histories = {}
+        if history_limit is None:
+            history = "SELECT prospect, date, type, notes FROM interactions ORDER BY id"
+        else:
+            # Only the newest history_limit rows per prospect, still returned oldest first
+            history = f"""
+                SELECT prospect, date, type, notes FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY prospect ORDER BY id DESC) AS recent
+                    FROM interactions
+                ) WHERE recent <= {int(history_limit)} ORDER BY id
+            """
+        with self.lock:
+            for row in self.conn.execute("SELECT name, company, role, interests, pain_points, notes, last_contact FROM prospects"):
+                profiles[row[0]] = row
+                histories[row[0]] = []
+            for name, date, kind, notes in self.conn.execute(history):
+                histories[name].append({"date": _intern(date), "type": _intern(kind), "notes": notes})
+        return {name: self._from_row(row, histories[name]) for name, row in profiles.items()}
+
+    def get_prospect(self, name, history_limit=None):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT name, company, role, interests, pain_points, notes, last_contact FROM prospects WHERE name = ?",
+                (name,)
+            ).fetchone()
+        if row is None:
+            return None
+        return self._from_row(row, self.get_history(name, history_limit))
+
+    def get_history(self, name, limit=None):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT date, type, notes FROM interactions WHERE prospect = ? ORDER BY id DESC LIMIT ?",
+                (name, -1 if limit is None else limit)
+            ).fetchall()
+        return [{"date": _intern(date), "type": _intern(kind), "notes": notes} for date, kind, notes in reversed(rows)]
+
+    @telemetry.timed("store_seconds", op="save_prospect", store="sqlite")
+    def save_prospect(self, prospect):
+        with self.lock, self.conn:
+            self._upsert(prospect)
+
+    @telemetry.timed("store_seconds", op="delete_prospect", store="sqlite")
+    def delete_prospect(self, name):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM prospects WHERE name = ?", (name,))
+
+    @telemetry.timed("store_seconds", op="add_interaction", store="sqlite")
+    def add_interaction(self, name, interaction, last_contact=None):
+        with self.lock, self.conn:
+            self._insert_interaction(name, interaction)
+            if last_contact:
+                self.conn.execute("UPDATE prospects SET last_contact = ? WHERE name = ?", (last_contact, name))
+
+    @telemetry.timed("store_seconds", op="add_interactions", store="sqlite")
+    def add_interactions(self, entries):
+        with self.lock, self.conn:
+            for name, interaction, last_contact in entries:
+                self._insert_interaction(name, interaction)
+                if last_contact:
+                    self.conn.execute("UPDATE prospects SET last_contact = ? WHERE name = ?", (last_contact, name))
+
+    @telemetry.timed("store_seconds", op="import_prospects", store="sqlite")
+    def import_prospects(self, prospects):
+        """Write full prospect records, including history, in a single transaction"""
+        with self.lock, self.conn:
+            for prospect in prospects:
+                self._upsert(prospect, keep_last_contact=False)
+                for interaction in prospect.interaction_history:
+                    self._insert_interaction(prospect.name, interaction)
+
+    @telemetry.timed("store_seconds", op="save_prospects", store="sqlite")
+    def save_prospects(self, prospects):
+        with self.lock, self.conn:
+            for prospect in prospects:
+                self._upsert(prospect)
+
+    def get_profiles(self, names):
+        names = list(names)
+        profiles = {}
+        with self.lock:
+            # Stay well under SQLite's limit on bound parameters
+            for start in range(0, len(names), 500):
+                chunk = names[start:start + 500]
+                rows = self.conn.execute(
+                    "SELECT name, company, role, interests, pain_points, notes, last_contact FROM prospects "
+                    f"WHERE name IN ({','.join('?' * len(chunk))})", chunk)
+                profiles.update((row[0], self._from_row(row, ())) for row in rows)
+        return profiles
+
+    def iter_prospects(self, history_limit=0, batch_size=500):
+        # Keyset pagination: each page is a short query, so the lock is never held for long
+        after = ""
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT name, company, role, interests, pain_points, notes, last_contact FROM prospects "
+                    "WHERE name > ? ORDER BY name LIMIT ?", (after, batch_size)).fetchall()
+                histories = {row[0]: [] for row in rows}
+                if rows and history_limit != 0:
+                    for name, date, kind, notes in self.conn.execute(
+                            "SELECT prospect, date, type, notes FROM interactions "
+                            f"WHERE prospect IN ({','.join('?' * len(rows))}) ORDER BY id", list(histories)):
+                        histories[name].append({"date": _intern(date), "type": _intern(kind), "notes": notes})
+            for row in rows:
+                history = histories[row[0]]
+                yield self._from_row(row, history[-history_limit:] if history_limit else history)
+            if len(rows) < batch_size:
+                return
+            after = rows[-1][0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _upsert(self, prospect, keep_last_contact=True):
+        # On update the stored last_contact wins unless we are importing full records
+        last_contact = "COALESCE(prospects.last_contact, excluded.last_contact)" if keep_last_contact else "excluded.last_contact"
+        self.conn.execute(f"""
+            INSERT INTO prospects (name, company, role, interests, pain_points, notes, last_contact)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                company = excluded.company,
+                role = excluded.role,
+                interests = excluded.interests,
+                pain_points = excluded.pain_points,
+                notes = excluded.notes,
+                last_contact = {last_contact}
+        """, (
+            prospect.name,
+            prospect.company,
+            prospect.role,
+            json.dumps(prospect.interests),
+            json.dumps(prospect.pain_points),
+            prospect.notes,
+            prospect.last_contact
+        ))
+
+    def _insert_interaction(self, name, interaction):
+        self.conn.execute(
+            "INSERT INTO interactions (prospect, date, type, notes) VALUES (?, ?, ?, ?)",
+            (name, interaction["date"], interaction["type"], interaction.get("notes", ""))
+        )
+
+    def _from_row(self, row, history):
+        name, company, role, interests, pain_points, notes, last_contact = row
+        return Prospect(name, company, role, json.loads(interests), json.loads(pain_points), notes, last_contact, history)
+
+def journal_path_for(json_path):
+    return os.path.splitext(json_path)[0] + ".interactions.jsonl"
+
+def migrate_json(json_path, store):
+    """Copy every prospect from a prospects.json file into store; returns the number copied
+
+    Histories are taken from the file itself (older layout) and from its
+    interaction journal if one exists. Neither file is modified.
+    """
+    with open(json_path, "r") as f:
+        prospects = json.load(f)
+    if os.path.exists(journal_path_for(json_path)):
+        journal = InteractionJournal(journal_path_for(json_path))
+        for name, prospect in prospects.items():
+            prospect.setdefault("interaction_history", []).extend(journal.history(name))
+            last_contact = journal.last_contact.get(name)
+            if last_contact and last_contact > (prospect.get("last_contact") or ""):
+                prospect["last_contact"] = last_contact
+        journal.close()
+    store.import_prospects(Prospect.from_dict(prospect) for prospect in prospects.values())
+    return len(prospects)
+
+def open_store(path=DEFAULT_STORE, legacy_json=LEGACY_JSON):
+    """Open the store at path, choosing the backend from its extension
+
+    A new SQLite store is seeded from legacy_json the first time it is opened.
+    """
+    if path.endswith(".json"):
+        return JsonProspectStore(path)
+    store = SqliteProspectStore(path)
+    if legacy_json and os.path.exists(legacy_json) and store.is_empty():
+        migrate_json(legacy_json, store)
+    return store
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 3 or argv[0] != "migrate":
+        print(__doc__.strip(), file=sys.stderr)
+        return 2
+    store = SqliteProspectStore(argv[2])
+    if not store.is_empty():
+        print(f"{argv[2]} already contains prospects; not migrating", file=sys.stderr)
+        return 1
+    count = migrate_json(argv[1], store)
+    store.close()
+    print(f"Migrated {count} prospects from {argv[1]} to {argv[2]}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""In-process latency and size metrics
+
+Usage:
+    import telemetry
+    with telemetry.timer("store_seconds", op="load_all"):
+        ...
+    telemetry.observe("prompt_tokens", 312, template="email")
+    telemetry.increment("cache_lookups_total", result="hit")
+    print(telemetry.to_prometheus())
+
+Every metric is a name plus optional string labels. Observations go into
+fixed-bucket histograms (seconds for names ending in _seconds, tokens for
+names ending in _tokens), so recording is a dict lookup and a bisect no
+matter how many calls are made, and percentiles are estimated from the
+buckets. snapshot() and to_json() report count, sum, mean, max and p50/p95/p99
+per series; to_prometheus() writes the text exposition format.
+
+The profiler is off until start_profiling() is called. While it is on, each
+outermost timer() on any thread also runs under cProfile; stop_profiling()
+merges what the threads collected and returns the report.
+"""
+from bisect import bisect_left
+import cProfile
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+
+# Upper bounds of the histogram buckets; anything larger lands in +Inf
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000)
+
+def buckets_for(name):
+    if name.endswith("_seconds"):
+        return SECONDS_BUCKETS
+    if name.endswith("_tokens"):
+        return TOKEN_BUCKETS
+    return COUNT_BUCKETS
+
+class Histogram:
+    """Counts of observations per bucket plus their sum, min and max"""
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def quantile(self, fraction):
+        """Estimate by linear interpolation inside the bucket holding the fraction-th observation"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = self.bounds[i - 1] if i else min(self.min, self.bounds[0])
+                high = self.bounds[i] if i < len(self.bounds) else self.max
+                low, high = max(low, self.min), min(high, self.max)
+                return low + (high - low) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "max": round(self.max, 6) if self.count else 0.0,
+            "p50": round(self.quantile(0.50), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "p99": round(self.quantile(0.99), 6),
+        }
+
+class Profiler:
+    """cProfile that can be switched on and off while the application runs
+
+    cProfile only sees the thread that enabled it, so each thread profiles its
+    own timed operations. Finished profiles are folded into one running
+    pstats.Stats every merge_every operations, so a long profiling session
+    holds one merged table rather than a profile per operation.
+    """
+    def __init__(self, merge_every=50):
+        self.active = False
+        self.merge_every = merge_every
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.profiles = []
+        self.merged = None
+        self.stats = None
+
+    def start(self):
+        with self.lock:
+            self.profiles = []
+            self.merged = None
+            self.active = True
+
+    def stop(self, sort="cumulative", limit=30):
+        """Stop profiling and return the merged report as text"""
+        with self.lock:
+            self.active = False
+            self.stats = self._merge(self.merged, self.profiles)
+            self.profiles, self.merged = [], None
+        return self.report(sort, limit)
+
+    def report(self, sort="cumulative", limit=30):
+        if self.stats is None:
+            return "No profile collected; only operations timed while profiling was on are profiled.\n"
+        out = io.StringIO()
+        self.stats.stream = out
+        self.stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def enter(self):
+        """Profiler started for the calling thread's outermost timed operation, or None"""
+        if not self.active or getattr(self.local, "profile", None) is not None:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler already owns this thread
+            return None
+        self.local.profile = profile
+        return profile
+
+    def exit(self, profile):
+        profile.disable()
+        self.local.profile = None
+        with self.lock:
+            self.profiles.append(profile)
+            if len(self.profiles) >= self.merge_every:
+                self.merged = self._merge(self.merged, self.profiles)
+                self.profiles = []
+
+    @staticmethod
+    def _merge(stats, profiles):
+        for profile in profiles:
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        return stats
+
+class Telemetry:
+    """Histograms and counters keyed by metric name and labels"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.profiler = Profiler()
+        self.started = time.time()
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets_for(name))
+            histogram.observe(value)
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def timer(self, name, **labels):
+        return _Timer(self, name, labels)
+
+    def timed(self, name, **labels):
+        """Decorator recording the duration of every call under name"""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.counters = {}
+            self.started = time.time()
+
+    def snapshot(self):
+        """{"histograms": {series: stats}, "counters": {series: value}} for every series recorded"""
+        with self.lock:
+            histograms = {_series(name, labels): histogram.snapshot()
+                          for (name, labels), histogram in sorted(self.histograms.items())}
+            counters = {_series(name, labels): value for (name, labels), value in sorted(self.counters.items())}
+        return {"uptime_seconds": round(time.time() - self.started, 1), "histograms": histograms,
+                "counters": counters, "profiling": self.profiler.active}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        lines = []
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+            typed = set()
+            for (name, labels), histogram in histograms:
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.bounds + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{_series(name + '_bucket', labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{_series(name + '_sum', labels)} {histogram.sum:.6f}")
+                lines.append(f"{_series(name + '_count', labels)} {histogram.count}")
+            for (name, labels), value in counters:
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{_series(name, labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Write metrics to path, as Prometheus text if it ends in .prom or .txt, otherwise JSON"""
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        with open(path, "w") as f:
+            f.write(text)
+
+class _Timer:
+    """Context manager timing its block into a histogram, profiling it while the profiler is on"""
+    __slots__ = ("telemetry", "name", "labels", "started", "profile")
+
+    def __init__(self, telemetry, name, labels):
+        self.telemetry = telemetry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.profile = self.telemetry.profiler.enter()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.telemetry.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        if self.profile is not None:
+            self.telemetry.profiler.exit(self.profile)
+        return False
+
+def _series(name, labels):
+    if not labels:
+        return name
+    pairs = (f'{key}="{_escape(value)}"' for key, value in labels)
+    return name + "{" + ",".join(pairs) + "}"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# The process-wide registry; the module functions below record into it
+TELEMETRY = Telemetry()
+observe = TELEMETRY.observe
+increment = TELEMETRY.increment
+timer = TELEMETRY.timer
+timed = TELEMETRY.timed
+snapshot = TELEMETRY.snapshot
+to_json = TELEMETRY.to_json
+to_prometheus = TELEMETRY.to_prometheus
+dump = TELEMETRY.dump
+reset = TELEMETRY.reset
+start_profiling = TELEMETRY.profiler.start
+stop_profiling = TELEMETRY.profiler.stop
@@ -0,0 +1,138 @@
+from datetime import date, timedelta
+
+from agent import SalesAgent
+from backends import StubBackend
+from followups import CADENCE, FollowUpScheduler, schedule
+from store import Prospect
+
+TODAY = date(2025, 6, 20)
+
+def day(offset, today=TODAY):
+    """ISO date offset days before today"""
+    return (today - timedelta(days=offset)).isoformat()
+
+def logged(offset, kind="email"):
+    return {"date": day(offset), "type": kind, "notes": ""}
+
+def prospect(name, last_contact=None, history=()):
+    return Prospect(name=name, last_contact=last_contact, interaction_history=history)
+
+def test_schedule_starts_from_the_last_touch():
+    assert schedule(prospect("A")) is None
+    due, last_touch = schedule(prospect("A", day(10)))
+    assert last_touch == TODAY.toordinal() - 10
+    assert due == last_touch + CADENCE[0]
+    # An interaction logged after last_contact is the last touch
+    due, last_touch = schedule(prospect("A", day(10), [logged(4)]))
+    assert last_touch == TODAY.toordinal() - 4
+
+def test_unanswered_follow_ups_stretch_the_cadence():
+    history = [logged(9, "follow_up"), logged(6, "follow_up")]
+    due, last_touch = schedule(prospect("A", day(10), history))
+    assert due == last_touch + CADENCE[2]
+    # Follow-ups before the last real contact no longer count
+    due, last_touch = schedule(prospect("A", day(5), history))
+    assert due == last_touch + CADENCE[0]
+    many = [logged(20 - i, "follow_up") for i in range(10)]
+    due, last_touch = schedule(prospect("A", day(30), many))
+    assert due == last_touch + CADENCE[-1]
+
+def test_history_can_be_passed_separately():
+    compact = prospect("A")
+    assert schedule(compact) is None
+    due, last_touch = schedule(compact, history=[logged(2)])
+    assert last_touch == TODAY.toordinal() - 2
+
+def test_due_today_lists_most_overdue_first():
+    scheduler = FollowUpScheduler()
+    scheduler.build([prospect("recent", day(1)), prospect("old", day(30)), prospect("older", day(40)),
+                     prospect("never")], TODAY)
+    due = scheduler.due_today(TODAY)
+    assert [name for name, *_ in due] == ["older", "old"]
+    assert due[0][1:3] == (40, 40 - CADENCE[0])
+    assert scheduler.due_count(TODAY) == 2
+    assert scheduler.due_today(TODAY, limit=1)[0][0] == "older"
+    assert scheduler.days_since("recent", TODAY) == 1
+    assert scheduler.days_since("never", TODAY) is None
+
+def test_prospects_become_due_as_days_pass():
+    scheduler = FollowUpScheduler()
+    scheduler.build([prospect("A", day(1)), prospect("B", day(0))], TODAY)
+    assert scheduler.due_count(TODAY) == 0
+    assert [name for name, *_ in scheduler.due_today(TODAY + timedelta(days=2))] == ["A"]
+    assert [name for name, *_ in scheduler.due_today(TODAY + timedelta(days=3))] == ["A", "B"]
+    # Going back in time rebuilds the due list from the entries
+    assert scheduler.due_count(TODAY) == 0
+
+def test_update_and_remove_requeue_one_prospect():
+    scheduler = FollowUpScheduler()
+    scheduler.build([prospect("A", day(30)), prospect("B", day(20))], TODAY)
+    scheduler.due_count(TODAY)
+    scheduler.update(prospect("A", day(0), [logged(0)]))
+    scheduler.remove("B")
+    assert scheduler.due_count(TODAY) == 0
+    scheduler.update(prospect("C", day(10)))
+    assert [name for name, *_ in scheduler.due_today(TODAY)] == ["C"]
+
+def test_run_batch_suggests_for_due_prospects_once():
+    # Batches run against the real date
+    today = date.today()
+    scheduler = FollowUpScheduler()
+    scheduler.build([prospect(f"P{i}", day(10 + i, today)) for i in range(5)] + [prospect("fresh", day(0, today))])
+    agent = SalesAgent(backend=StubBackend(latency=0))
+    assert scheduler.run_batch(agent, batch_size=3) == 3
+    assert scheduler.run_batch(agent, batch_size=10) == 2
+    assert scheduler.run_batch(agent, batch_size=10) == 0
+    assert scheduler.suggestion("P4")
+    assert scheduler.suggestion("fresh") is None
+    assert scheduler.stats() == {"suggested": 5, "failed": 0}
+    # A new due date makes the old suggestion stale
+    scheduler.update(prospect("P4", day(5, today)))
+    assert scheduler.suggestion("P4") is None
+
+def test_restart_waits_for_the_interval_again():
+    scheduler = FollowUpScheduler()
+    agent = SalesAgent(backend=StubBackend(latency=0))
+    scheduler.start(agent, interval=60)
+    scheduler.stop()
+    scheduler.start(agent, interval=60)
+    try:
+        assert not scheduler.wake_event.is_set()
+        assert scheduler.thread.is_alive()
+    finally:
+        scheduler.stop()
+
+def test_history_less_save_keeps_the_scheduled_touches():
+    history = [logged(2), logged(1, "follow_up")]
+    scheduler = FollowUpScheduler()
+    scheduler.build_from([(prospect("A"), history)], TODAY)
+    entry = scheduler.entries["A"][:2]
+    # The window saves a record without history after a profile edit
+    scheduler.update(prospect("A"))
+    assert scheduler.entries["A"][:2] == entry
+    assert scheduler.days_since("A", TODAY) == 1
+    # A newer last_contact answers the follow-up and restarts the cadence
+    scheduler.update(prospect("A", day(0)))
+    due, last_touch = scheduler.entries["A"][:2]
+    assert (due, last_touch) == (TODAY.toordinal() + CADENCE[0], TODAY.toordinal())
+
+def test_record_advances_a_history_less_entry():
+    scheduler = FollowUpScheduler()
+    scheduler.build_from([(prospect("A", day(10)), [logged(8, "follow_up")])], TODAY)
+    scheduler.record(prospect("A", day(10)), logged(3, "follow_up"))
+    expected = schedule(prospect("A", day(10), [logged(8, "follow_up"), logged(3, "follow_up")]))
+    assert tuple(scheduler.entries["A"][:2]) == expected
+    # Logging for a prospect never contacted before starts its schedule
+    scheduler.record(prospect("B"), logged(0))
+    assert scheduler.days_since("B", TODAY) == 0
+
+def test_build_from_matches_per_prospect_updates():
+    pairs = [(prospect(f"P{i}", day(i % 40)), [logged(i % 30), logged(i % 20, "follow_up")]) for i in range(200)]
+    built = FollowUpScheduler()
+    built.build_from(iter(pairs), TODAY)
+    updated = FollowUpScheduler()
+    for record, history in pairs:
+        updated.update(record, history)
+    assert built.due_today(TODAY) == updated.due_today(TODAY)
+    assert {name: entry[:2] for name, entry in built.entries.items()} == \
+        {name: entry[:2] for name, entry in updated.entries.items()}
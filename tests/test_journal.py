@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+
+from store import InteractionJournal, JournalReader, JsonProspectStore, Prospect
+
+def interaction(notes, date="2025-01-01", kind="email"):
+    return {"date": date, "type": kind, "notes": notes}
+
+def notes(history):
+    return [entry["notes"] for entry in history]
+
+def test_history_and_limit(tmp_path):
+    journal = InteractionJournal(str(tmp_path / "j.jsonl"))
+    for i in range(5):
+        journal.append("a", interaction(f"a{i}"))
+    journal.append("b", interaction("b0"), last_contact="2025-02-01")
+    assert notes(journal.history("a")) == ["a0", "a1", "a2", "a3", "a4"]
+    assert notes(journal.history("a", 2)) == ["a3", "a4"]
+    assert journal.history("a", 0) == []
+    assert journal.history("missing") == []
+    assert journal.last_contact == {"b": "2025-02-01"}
+    journal.close()
+
+def test_reopen_uses_index_and_scans_lines_after_it(tmp_path):
+    path = str(tmp_path / "j.jsonl")
+    journal = InteractionJournal(path)
+    journal.append("a", interaction("a0"))
+    journal.close()
+    # Appended by a process that never saved the index
+    with open(path, "ab") as f:
+        f.write((json.dumps(dict(interaction("a1"), prospect="a")) + "\n").encode("utf-8"))
+    journal = InteractionJournal(path)
+    assert notes(journal.history("a")) == ["a0", "a1"]
+    journal.close()
+
+def test_torn_last_line_is_dropped_on_open(tmp_path):
+    path = str(tmp_path / "j.jsonl")
+    journal = InteractionJournal(path)
+    journal.append("a", interaction("a0"))
+    journal.file.close()
+    with open(path, "ab") as f:
+        f.write(b'{"prospect": "a", "date": "2025-01-0')
+
+    journal = InteractionJournal(path)
+    assert notes(journal.history("a")) == ["a0"]
+    journal.append("a", interaction("a1"))
+    journal.close()
+    journal = InteractionJournal(path)
+    assert notes(journal.history("a")) == ["a0", "a1"]
+    journal.close()
+
+def test_delete_then_compact_keeps_only_live_lines(tmp_path):
+    path = str(tmp_path / "j.jsonl")
+    journal = InteractionJournal(path, compact_min=10**6)
+    for i in range(20):
+        journal.append("dead", interaction(f"d{i}"))
+        journal.append("live", interaction(f"l{i}"))
+    journal.delete("dead")
+    size = os.path.getsize(path)
+    journal.compact()
+    assert os.path.getsize(path) < size
+    assert journal.dead == 0
+    assert journal.history("dead") == []
+    assert notes(journal.history("live", 3)) == ["l17", "l18", "l19"]
+    journal.close()
+    journal = InteractionJournal(path)
+    assert notes(journal.history("live")) == [f"l{i}" for i in range(20)]
+    journal.close()
+
+def test_compacts_itself_once_mostly_dead(tmp_path):
+    journal = InteractionJournal(str(tmp_path / "j.jsonl"), compact_min=5)
+    for i in range(10):
+        journal.append("dead", interaction(f"d{i}"))
+    journal.append("live", interaction("l0"))
+    journal.delete("dead")
+    assert journal.dead == 0
+    assert notes(journal.history("live")) == ["l0"]
+    journal.close()
+
+def test_reader_reopens_after_compaction(tmp_path):
+    journal = InteractionJournal(str(tmp_path / "j.jsonl"), compact_min=10**6)
+    for i in range(10):
+        journal.append("dead", interaction(f"d{i}"))
+        journal.append("live", interaction(f"l{i}"))
+    with JournalReader(journal) as reader:
+        assert notes(journal.history("live", 1, reader)) == ["l9"]
+        journal.delete("dead")
+        journal.compact()
+        assert notes(journal.history("live", 2, reader)) == ["l8", "l9"]
+    journal.close()
+
+def test_unsynced_appends_are_readable_while_written(tmp_path):
+    journal = InteractionJournal(str(tmp_path / "j.jsonl"))
+    errors = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                journal.history("a", 5)
+            except Exception as e:
+                errors.append(e)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for i in range(5000):
+            journal.append("a", interaction(f"a{i}"), sync=False)
+    finally:
+        done.set()
+        reader.join()
+    journal.sync()
+    assert errors == []
+    assert len(journal.history("a")) == 5000
+    journal.close()
+
+def test_json_store_keeps_interactions_in_the_journal(tmp_path):
+    path = str(tmp_path / "prospects.json")
+    store = JsonProspectStore(path)
+    store.import_prospects([Prospect(name=f"P{i}", company="Acme", interaction_history=[interaction(f"n{i}")])
+                            for i in range(3)])
+    store.add_interaction("P1", interaction("later", date="2025-03-01"), last_contact="2025-03-01")
+    store.close()
+
+    store = JsonProspectStore(path)
+    assert notes(store.get_history("P1")) == ["n1", "later"]
+    assert store.get_prospect("P1").last_contact == "2025-03-01"
+    scan = store.iter_prospects(history_limit=None)
+    assert next(scan).name == "P0"
+    store.delete_prospect("P1")
+    assert [prospect.name for prospect in scan] == ["P2"]
+    store.close()
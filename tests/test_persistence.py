@@ -0,0 +1,99 @@
+import threading
+import time
+
+from persistence import PersistenceScheduler
+from store import Prospect
+
+class RecordingStore:
+    """Store double that records the batches it is given and can be made to fail"""
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+        self.written = threading.Event()
+
+    def _call(self, kind, payload):
+        if self.fail:
+            raise OSError("disk full")
+        self.calls.append((kind, payload))
+        self.written.set()
+
+    def save_prospects(self, prospects):
+        self._call("save", [prospect.name for prospect in prospects])
+
+    def add_interactions(self, entries):
+        self._call("interaction", [name for name, _, _ in entries])
+
+    def delete_prospect(self, name):
+        self._call("delete", name)
+
+def prospect(name, notes=""):
+    return Prospect(name=name, notes=notes)
+
+def test_burst_is_written_once_after_debounce():
+    store = RecordingStore()
+    scheduler = PersistenceScheduler(store, debounce=0.05, max_delay=5.0)
+    try:
+        for i in range(5):
+            scheduler.save(prospect("A", notes=str(i)))
+        scheduler.save(prospect("B"))
+        assert store.calls == []
+        assert store.written.wait(2)
+        time.sleep(0.1)
+        assert store.calls == [("save", ["A", "B"])]
+        stats = scheduler.stats()
+        assert stats["coalesced"] == 4
+        assert stats["writes"] == 1
+        assert stats["pending"] == 0
+    finally:
+        scheduler.close()
+
+def test_max_delay_bounds_a_steady_stream_of_changes():
+    store = RecordingStore()
+    scheduler = PersistenceScheduler(store, debounce=0.2, max_delay=0.3)
+    try:
+        started = time.monotonic()
+        while not store.written.is_set() and time.monotonic() - started < 2:
+            scheduler.add_interaction("A", {"type": "email"})
+            time.sleep(0.02)
+        assert store.written.is_set()
+        assert time.monotonic() - started < 1
+    finally:
+        scheduler.close()
+
+def test_flush_writes_in_order_and_keeps_saves_apart_across_a_delete():
+    store = RecordingStore()
+    scheduler = PersistenceScheduler(store, debounce=60, max_delay=60)
+    try:
+        scheduler.save(prospect("A"))
+        scheduler.add_interaction("A", {"type": "email"})
+        scheduler.delete("A")
+        scheduler.save(prospect("A", notes="new"))
+        assert scheduler.flush(timeout=2)
+        assert store.calls == [("save", ["A"]), ("interaction", ["A"]), ("delete", "A"), ("save", ["A"])]
+        assert scheduler.pending == 0
+    finally:
+        scheduler.close()
+
+def test_failed_write_is_kept_and_retried():
+    store = RecordingStore()
+    store.fail = True
+    scheduler = PersistenceScheduler(store, debounce=0.01, max_delay=0.01, retry_delay=0.05)
+    try:
+        scheduler.save(prospect("A"))
+        assert not scheduler.flush(timeout=2)
+        assert scheduler.stats()["failures"] >= 1
+        assert scheduler.stats()["error"] == "disk full"
+        scheduler.save(prospect("B"))
+        store.fail = False
+        assert scheduler.flush(timeout=2)
+        assert store.calls == [("save", ["A", "B"])]
+        assert scheduler.stats()["error"] is None
+    finally:
+        scheduler.close()
+
+def test_close_flushes_what_is_queued():
+    store = RecordingStore()
+    scheduler = PersistenceScheduler(store, debounce=60, max_delay=60)
+    scheduler.add_interaction("A", {"type": "email"})
+    scheduler.close()
+    assert store.calls == [("interaction", ["A"])]
@@ -0,0 +1,62 @@
+from search import ProspectSearchIndex
+from store import Prospect
+
+def prospect(name, company="", last_contact=None):
+    return Prospect(name=name, company=company, last_contact=last_contact)
+
+def test_build_replaces_the_index():
+    index = ProspectSearchIndex()
+    index.build([prospect("Ann", "Acme"), prospect("Bob", "Globex")])
+    index.build([prospect("Cy", "Initech")])
+    assert index.search("") == ["Cy"]
+    assert index.search("acme") == []
+    index.add(prospect("Ann", "Acme"))
+    assert index.search("acme") == ["Ann"]
+
+def test_build_keeps_the_last_of_a_repeated_name():
+    index = ProspectSearchIndex()
+    index.build([prospect("Ann", "Acme", "2025-01-01"), prospect("Bob", "Acme"), prospect("Ann", "Globex", "2025-02-01")])
+    assert index.search("") == ["Ann", "Bob"]
+    assert index.search("acme") == ["Bob"]
+    assert index.search("globex since:2025-02-01") == ["Ann"]
+    assert index.search("since:2025-01-01 until:2025-01-31") == []
+    index.remove("Ann")
+    assert index.search("") == ["Bob"]
+
+def people():
+    index = ProspectSearchIndex()
+    index.build([prospect(f"P{i:02d}", ("Acme", "Acorn", "Globex")[i % 3], f"2025-{1 + i % 12:02d}-15")
+                 for i in range(30)])
+    return index
+
+def test_date_ranges():
+    index = people()
+    march = index.search("since:2025-03-01 until:2025-03-31")
+    assert march == ["P02", "P14", "P26"]
+    assert index.search("globex since:2025-03-01 until:2025-03-31") == march
+    assert index.search("acme since:2025-03-01 until:2025-03-31") == []
+    assert index.search("until:2025-01-31") == ["P00", "P12", "P24"]
+
+def test_repeated_bounds_intersect():
+    index = people()
+    assert (index.search("since:2025-01-01 since:2025-03-01 until:2025-12-31 until:2025-03-31")
+            == index.search("since:2025-03-01 until:2025-03-31"))
+    assert index.search("until:2025-03-31 since:2025-04-01") == []
+
+def test_prefixes():
+    index = people()
+    assert index.search("company:ac*") == [f"P{i:02d}" for i in range(30) if i % 3 != 2]
+    assert index.search("acme ac*") == [f"P{i:02d}" for i in range(0, 30, 3)]
+    assert index.search("glob", prefix_last=True) == [f"P{i:02d}" for i in range(2, 30, 3)]
+    assert index.search("glob") == []
+
+def test_paging_with_after():
+    index = people()
+    for query in ("", "ac*", "since:2025-02-01"):
+        everything = index.search(query)
+        pages = []
+        page = index.search(query, limit=4)
+        while page:
+            pages.extend(page)
+            page = index.search(query, limit=4, after=page[-1])
+        assert pages == everything
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+from agent import AsyncSalesAgent
+from backends import StubBackend
+from server import ApiServer
+from store import Prospect, SqliteProspectStore
+
+def run_server(tmp_path, scenario, latency=0.0):
+    """Run scenario(server) against an ApiServer on a throwaway store with one prospect"""
+    store = SqliteProspectStore(str(tmp_path / "prospects.db"))
+    store.import_prospects([Prospect(name="Jane Doe", company="Acme", role="CTO")])
+
+    async def main():
+        server = ApiServer(AsyncSalesAgent(backend=StubBackend(latency=latency)), store, port=0)
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.close()
+
+    try:
+        return asyncio.run(main())
+    finally:
+        store.close()
+
+async def send(server, raw):
+    """Send raw request bytes on a fresh connection; returns (status, JSON body) of the response"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    writer.write(raw)
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), 5)
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+def request(method, path, payload=None, headers=""):
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nConnection: close\r\nContent-Length: {len(body)}\r\n{headers}\r\n"
+    return head.encode("latin-1") + body
+
+def test_bad_content_length_gets_400_and_the_connection_closes(tmp_path):
+    async def scenario(server):
+        results = []
+        for length in ("abc", "-5"):
+            raw = f"POST /proposal HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode("latin-1")
+            results.append(await send(server, raw))
+        too_big = f"POST /proposal HTTP/1.1\r\nContent-Length: {10 ** 9}\r\n\r\n".encode("latin-1")
+        results.append(await send(server, too_big))
+        return results
+
+    (status1, body1), (status2, _), (status3, _) = run_server(tmp_path, scenario)
+    assert (status1, status2, status3) == (400, 400, 413)
+    assert "Content-Length" in body1["error"]
+
+def test_bad_parameters_get_400(tmp_path):
+    async def scenario(server):
+        return [status for status, _ in [
+            await send(server, request("GET", "/prospects?limit=abc")),
+            await send(server, request("GET", "/prospects/Jane%20Doe?history=-1")),
+            await send(server, request("POST", "/follow-up", {"prospect": "Jane Doe", "days": "soon"})),
+            await send(server, request("POST", "/proposal", ["Jane Doe"])),
+            await send(server, request("POST", "/proposal", {"prospect": 5})),
+        ]]
+
+    assert run_server(tmp_path, scenario) == [400] * 5
+
+def test_prospect_routes(tmp_path):
+    async def scenario(server):
+        return (await send(server, request("GET", "/prospects?query=company:acme")),
+                await send(server, request("GET", "/prospects/Nobody")))
+
+    (status, prospects), (missing, _) = run_server(tmp_path, scenario)
+    assert status == 200
+    assert [prospect["name"] for prospect in prospects] == ["Jane Doe"]
+    assert missing == 404
+
+def test_coalesced_requests_are_logged_once(tmp_path):
+    async def scenario(server):
+        payload = {"prospect": "Jane Doe", "text": "Too expensive"}
+        responses = await asyncio.gather(*[send(server, request("POST", "/objection", payload)) for _ in range(3)])
+        quiet = await send(server, request("POST", "/objection", dict(payload, no_log=True, force=True)))
+        return responses, quiet, server.stats, server.store.get_history("Jane Doe")
+
+    responses, quiet, stats, history = run_server(tmp_path, scenario, latency=0.2)
+    assert [status for status, _ in responses] == [200] * 3
+    assert quiet[0] == 200
+    assert stats["upstream_calls"] == 2
+    assert stats["coalesced"] == 2
+    assert [entry["type"] for entry in history] == ["objection"]
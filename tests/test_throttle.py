@@ -0,0 +1,141 @@
+import threading
+import time
+
+import pytest
+
+from backends import ModelBackend, StubError
+from throttle import BULK, INTERACTIVE, AdaptiveRateLimiter, CircuitBreaker, CircuitOpenError, ThrottledBackend
+
+class ScriptedBackend(ModelBackend):
+    """Backend that raises the queued errors in turn, then answers"""
+    model_name = "scripted"
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def generate(self, prompt, generation_config=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+def throttled(backend, **kwargs):
+    options = dict(requests_per_minute=0, base_delay=0.001, max_delay=0.001, seed=0)
+    options.update(kwargs)
+    return ThrottledBackend(backend, **options)
+
+def test_breaker_opens_probes_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == "half-open"
+    # Only one probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+def test_failed_probe_reopens_and_released_probe_allows_another():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+def test_retries_server_errors_then_succeeds():
+    backend = ScriptedBackend(StubError(503, "unavailable"), StubError(500, "boom"))
+    wrapped = throttled(backend)
+    assert wrapped.generate("prompt") == "ok"
+    assert backend.calls == 3
+    stats = wrapped.stats()
+    assert (stats["retries"], stats["failures"], stats["circuit"]) == (2, 2, "closed")
+
+def test_client_errors_are_not_retried_and_do_not_trip_the_breaker():
+    backend = ScriptedBackend(*[StubError(400, "bad request") for _ in range(5)])
+    wrapped = throttled(backend, failure_threshold=2)
+    for _ in range(5):
+        with pytest.raises(StubError):
+            wrapped.generate("prompt")
+    assert backend.calls == 5
+    assert wrapped.breaker.state == "closed"
+
+def test_breaker_opens_after_repeated_server_errors():
+    backend = ScriptedBackend(*[StubError(503, "unavailable") for _ in range(10)])
+    wrapped = throttled(backend, max_retries=0, failure_threshold=3, reset_timeout=60)
+    for _ in range(3):
+        with pytest.raises(StubError):
+            wrapped.generate("prompt")
+    with pytest.raises(CircuitOpenError):
+        wrapped.generate("prompt")
+    assert backend.calls == 3
+    assert wrapped.stats()["rejected"] == 1
+
+def test_errors_without_a_status_leave_the_breaker_alone():
+    backend = ScriptedBackend(StubError(503, "unavailable"), ValueError("bug"), StubError(503, "unavailable"))
+    wrapped = throttled(backend, max_retries=0, failure_threshold=2, reset_timeout=60)
+    for error in (StubError, ValueError):
+        with pytest.raises(error):
+            wrapped.generate("prompt")
+    assert wrapped.breaker.failures == 1
+    with pytest.raises(StubError):
+        wrapped.generate("prompt")
+    assert wrapped.breaker.state == "open"
+
+def test_throttling_slows_the_limiter_and_success_recovers_it():
+    limiter = AdaptiveRateLimiter(600, cooldown=0)
+    limiter.throttled(time.monotonic())
+    assert limiter.rpm == 300
+    limiter.succeeded()
+    assert limiter.rpm == 310
+    backend = ScriptedBackend(StubError(429, "slow down"))
+    wrapped = throttled(backend, requests_per_minute=6000)
+    wrapped.limiter.cooldown = 0
+    assert wrapped.generate("prompt") == "ok"
+    stats = wrapped.stats()
+    assert stats["throttled"] == 1
+    assert stats["circuit"] == "closed"
+    assert stats["requests_per_minute"] < 6000
+
+def test_throttling_between_server_errors_does_not_reset_the_breaker():
+    backend = ScriptedBackend(StubError(503, "unavailable"), StubError(429, "slow down"), StubError(503, "unavailable"))
+    wrapped = throttled(backend, failure_threshold=2, requests_per_minute=6000)
+    wrapped.limiter.cooldown = 0
+    with pytest.raises(CircuitOpenError):
+        wrapped.generate("prompt")
+    assert backend.calls == 3
+    assert wrapped.stats()["circuit"] == "open"
+
+def test_interactive_lane_goes_ahead_of_queued_bulk_work():
+    backend = ThrottledBackend(ScriptedBackend(), requests_per_minute=600)
+    backend.limiter.burst = 1
+    backend.limiter.tokens = 0
+    order = []
+
+    def call(lane, name):
+        lane.generate("prompt")
+        order.append(name)
+
+    bulk_lane = backend.lane(BULK)
+    interactive_lane = backend.lane(INTERACTIVE)
+    threads = [threading.Thread(target=call, args=(bulk_lane, f"bulk{i}")) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=call, args=(interactive_lane, "interactive"))
+    interactive.start()
+    for thread in threads + [interactive]:
+        thread.join(5)
+    assert order[0] == "interactive"
+    # Lanes share one set of counters
+    assert backend.stats()["calls"] == 3
+    assert set(backend.stats()["queue_wait_seconds"]) >= {"interactive", "bulk"}
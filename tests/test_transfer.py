@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from store import JsonProspectStore, Prospect, SqliteProspectStore
+from transfer import import_prospects
+
+def write_jsonl(path, rows):
+    with open(path, "w") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+    return str(path)
+
+@pytest.fixture(params=["db", "json"])
+def store(request, tmp_path):
+    path = str(tmp_path / f"prospects.{request.param}")
+    store = SqliteProspectStore(path) if request.param == "db" else JsonProspectStore(path)
+    yield store
+    store.close()
+
+ROW = {"name": "Jane Doe", "company": "Acme", "role": "CTO",
+       "interaction_history": [{"date": "2025-01-02", "type": "email", "notes": "intro"},
+                               {"date": "2025-02-03", "type": "follow_up", "notes": "nudge"}]}
+
+def test_existing_prospect_gets_the_rows_new_interactions(store, tmp_path):
+    store.import_prospects([Prospect(name="Jane Doe", company="Acme",
+                                     interaction_history=[{"date": "2025-01-02", "type": "email", "notes": "intro"}])])
+    path = write_jsonl(tmp_path / "in.jsonl", [dict(ROW, role="VP")])
+    summary = import_prospects(store, path)
+    assert (summary["updated"], summary["interactions_added"]) == (1, 1)
+    prospect = store.get_prospect("Jane Doe")
+    assert prospect.role == "VP"
+    assert [interaction["notes"] for interaction in prospect.interaction_history] == ["intro", "nudge"]
+    # The same file again adds nothing
+    assert import_prospects(store, path)["interactions_added"] == 0
+    assert len(store.get_history("Jane Doe")) == 2
+
+def test_new_prospect_keeps_the_rows_history(store, tmp_path):
+    summary = import_prospects(store, write_jsonl(tmp_path / "in.jsonl", [ROW]))
+    assert (summary["created"], summary["interactions_added"]) == (1, 0)
+    assert len(store.get_history("Jane Doe")) == 2
+
+def test_names_match_the_store_as_they_match_each_other(store, tmp_path):
+    store.import_prospects([Prospect(name="Jane Doe", company="Acme")])
+    path = write_jsonl(tmp_path / "in.jsonl", [{"name": "jane doe", "company": "acme", "role": "VP"},
+                                               {"name": "JANE DOE", "company": "Acme"},
+                                               {"name": "John Roe", "company": "Acme"}])
+    summary = import_prospects(store, path)
+    assert (summary["created"], summary["updated"], summary["duplicates"]) == (1, 1, 1)
+    assert sorted(prospect.name for prospect in store.iter_prospects()) == ["Jane Doe", "John Roe"]
+    assert store.get_prospect("Jane Doe").role == "VP"
@@ -0,0 +1,345 @@
+"""Client-side flow control around a model backend
+
+ThrottledBackend wraps any backends.ModelBackend with:
+    - an adaptive token bucket that halves its rate on every 429 and
+      creeps back up towards the configured ceiling on success
+    - retries with full-jitter exponential backoff for throttling and
+      transient server errors
+    - a circuit breaker that fails fast while the service keeps erroring
+    - priority lanes, so interactive requests take the next free token
+      ahead of queued bulk work
+
+One ThrottledBackend is meant to be shared by everything in a process that
+spends the same API quota; lane() hands out views onto it with a different
+priority.
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from backends import ModelBackend
+
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+THROTTLED = 429
+RETRYABLE_STATUSES = {THROTTLED, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Raised without calling the backend while the circuit breaker is open"""
+
+def error_status(error):
+    """HTTP-like status of a backend error, or None if it is not a service error
+
+    StubError and the google.api_core exceptions raised by the Gemini SDK both
+    carry the status in a code attribute.
+    """
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return int(code)
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return 503
+    return None
+
+class AdaptiveRateLimiter:
+    """Token bucket whose rate backs off multiplicatively on 429s and recovers additively
+
+    The rate starts at requests_per_minute, which is also its ceiling, and is
+    never pushed below min_requests_per_minute. Each success adds recovery
+    requests per minute back (a sixtieth of the ceiling by default). 429s for
+    requests sent before the last slowdown, or within cooldown seconds of it,
+    do not slow down again, so a burst of concurrent rejections does not
+    collapse the rate. Waiters are served strictly by
+    priority (lower first), then in arrival order. A requests_per_minute of 0
+    disables limiting.
+    """
+    def __init__(self, requests_per_minute=60, burst=None, min_requests_per_minute=6, backoff=0.5, recovery=None,
+                 cooldown=1.0):
+        self.max_rpm = requests_per_minute
+        self.rpm = requests_per_minute
+        self.min_rpm = min(min_requests_per_minute, requests_per_minute) if requests_per_minute else 0
+        self.backoff = backoff
+        self.recovery = recovery or requests_per_minute / 60.0
+        self.cooldown = cooldown
+        self.burst = burst or max(1, requests_per_minute // 60)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.slowed_at = 0.0
+        self.waiters = []
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.async_lock = None
+
+    def acquire(self, priority=INTERACTIVE):
+        """Block until a token is available for this caller; returns the seconds waited"""
+        if not self.max_rpm:
+            return 0.0
+        started = time.monotonic()
+        with self.condition:
+            ticket = (priority, next(self.sequence))
+            heapq.heappush(self.waiters, ticket)
+            try:
+                while True:
+                    self._refill()
+                    if self.waiters[0] == ticket:
+                        if self.tokens >= 1:
+                            self.tokens -= 1
+                            heapq.heappop(self.waiters)
+                            return time.monotonic() - started
+                        self.condition.wait((1 - self.tokens) * 60.0 / self.rpm)
+                    else:
+                        self.condition.wait()
+            finally:
+                if ticket in self.waiters:
+                    self.waiters.remove(ticket)
+                    heapq.heapify(self.waiters)
+                # Whoever is now at the head may be able to proceed
+                self.condition.notify_all()
+
+    async def acquire_async(self, priority=INTERACTIVE):
+        """acquire() for coroutines: sleeps on the event loop instead of blocking the thread
+
+        Coroutines queue behind each other in arrival order and give way to
+        threads already waiting at the same or a higher priority.
+        """
+        if not self.max_rpm:
+            return 0.0
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        if self.async_lock is None or self.async_lock[0] is not loop:
+            # asyncio locks belong to one event loop
+            self.async_lock = (loop, asyncio.Lock())
+        async with self.async_lock[1]:
+            while True:
+                delay = self._try_acquire(priority)
+                if not delay:
+                    return time.monotonic() - started
+                await asyncio.sleep(delay)
+
+    def _try_acquire(self, priority):
+        """Take a token if one is free; otherwise return roughly how long to wait for one"""
+        with self.condition:
+            self._refill()
+            interval = 60.0 / self.rpm
+            if self.waiters and self.waiters[0][0] <= priority:
+                return interval
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) * interval
+
+    def throttled(self, sent_at):
+        """The service answered 429 to a request sent at sent_at (time.monotonic): slow down"""
+        if not self.max_rpm:
+            return
+        with self.condition:
+            if sent_at < self.slowed_at or time.monotonic() - self.slowed_at < self.cooldown:
+                return
+            self._refill()
+            self.slowed_at = time.monotonic()
+            self.rpm = max(self.min_rpm, self.rpm * self.backoff)
+            # Drop any saved-up burst
+            self.tokens = min(self.tokens, 0.0)
+
+    def succeeded(self):
+        if not self.max_rpm:
+            return
+        with self.condition:
+            self._refill()
+            self.rpm = min(self.max_rpm, self.rpm + self.recovery)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rpm / 60.0)
+        self.updated = now
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failures and stays open for reset_timeout seconds
+
+    Once the timeout has passed a single probe call is let through; its
+    outcome closes the circuit again or re-opens it for another timeout. A
+    probe that fails without reaching the service is released, and the next
+    call probes instead.
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            if self.probing or time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0 or self.probing:
+                raise CircuitOpenError(
+                    f"model backend unavailable after repeated failures, retry in {max(remaining, 0):.0f}s")
+            self.probing = True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def release(self):
+        """End a call whose outcome says nothing about the service, leaving the state as it was"""
+        with self.lock:
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+class ThrottledBackend(ModelBackend):
+    """Rate-limited, retrying, circuit-broken view of another backend"""
+    def __init__(self, backend, requests_per_minute=60, max_retries=4, base_delay=0.5, max_delay=20.0,
+                 failure_threshold=5, reset_timeout=30.0, priority=INTERACTIVE, seed=None):
+        self.backend = backend
+        self.model_name = backend.model_name
+        self.limiter = AdaptiveRateLimiter(requests_per_minute)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.priority = priority
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {"calls": 0, "attempts": 0, "retries": 0, "throttled": 0, "failures": 0, "rejected": 0}
+        self.queue_wait = {name: 0.0 for name in PRIORITY_NAMES.values()}
+
+    def lane(self, priority):
+        """View sharing this backend's limiter, breaker and stats that queues at another priority"""
+        view = object.__new__(ThrottledBackend)
+        view.__dict__.update(self.__dict__)
+        view.priority = priority
+        return view
+
+    def generate(self, prompt, generation_config=None):
+        return self._call(lambda: self.backend.generate(prompt, generation_config))
+
+    def stream(self, prompt, generation_config=None):
+        # Only the wait for the first chunk is retried; once text has reached
+        # the caller a failure has to surface rather than repeat output
+        def first_chunk():
+            chunks = iter(self.backend.stream(prompt, generation_config))
+            return next(chunks, None), chunks
+        first, chunks = self._call(first_chunk)
+        if first is None:
+            return
+        yield first
+        yield from chunks
+
+    async def generate_async(self, prompt, generation_config=None):
+        return await self._call_async(lambda: self.backend.generate_async(prompt, generation_config))
+
+    async def stream_async(self, prompt, generation_config=None):
+        async def first_chunk():
+            chunks = self.backend.stream_async(prompt, generation_config).__aiter__()
+            try:
+                return await chunks.__anext__(), chunks
+            except StopAsyncIteration:
+                return None, None
+        first, chunks = await self._call_async(first_chunk)
+        if first is None:
+            return
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats["queue_wait_seconds"] = {name: round(value, 3) for name, value in self.queue_wait.items()}
+        stats["requests_per_minute"] = round(self.limiter.rpm, 1)
+        stats["circuit"] = self.breaker.state
+        return stats
+
+    def _count(self, key, amount=1):
+        with self.lock:
+            self.counters[key] += amount
+
+    def _call(self, call):
+        self._count("calls")
+        attempt = 0
+        while True:
+            self._before_attempt(self.limiter.acquire(self.priority))
+            sent_at = time.monotonic()
+            try:
+                result = call()
+            except Exception as e:
+                time.sleep(self._after_failure(e, sent_at, attempt))
+                attempt += 1
+                continue
+            self._after_success()
+            return result
+
+    async def _call_async(self, call):
+        self._count("calls")
+        attempt = 0
+        while True:
+            self._before_attempt(await self.limiter.acquire_async(self.priority))
+            sent_at = time.monotonic()
+            try:
+                result = await call()
+            except Exception as e:
+                await asyncio.sleep(self._after_failure(e, sent_at, attempt))
+                attempt += 1
+                continue
+            self._after_success()
+            return result
+
+    def _before_attempt(self, waited):
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self._count("rejected")
+            raise
+        with self.lock:
+            self.counters["attempts"] += 1
+            self.queue_wait[PRIORITY_NAMES.get(self.priority, "bulk")] += waited
+
+    def _after_failure(self, error, sent_at, attempt):
+        """Account for a failed attempt; returns the backoff before the next one or re-raises error"""
+        status = error_status(error)
+        if status == THROTTLED:
+            self._count("throttled")
+            self.limiter.throttled(sent_at)
+            # The limiter handles throttling; counting it as health would reset the failure streak
+            self.breaker.release()
+        elif status in RETRYABLE_STATUSES:
+            self._count("failures")
+            self.breaker.record_failure()
+        elif status is not None:
+            # The service answered, even if only to refuse; do not let it trip the breaker
+            self.breaker.record_success()
+        else:
+            # Not a service error (a bug, a bad prompt): no evidence either way
+            self.breaker.release()
+        if status not in RETRYABLE_STATUSES or attempt >= self.max_retries:
+            raise error
+        self._count("retries")
+        return self.random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt + 1)))
+
+    def _after_success(self):
+        self.limiter.succeeded()
+        self.breaker.record_success()
@@ -0,0 +1,233 @@
+"""Streaming prospect import and export for CSV and JSON lines files
+
+Usage:
+    python -m agent import crm_export.csv
+    python -m agent export prospects.jsonl --history
+
+Both directions work a batch at a time. Imports read the file as a stream,
+validate every row and write batch_size prospects per store transaction;
+what they hold grows only with the number of distinct names, in the file
+and in the store. Rows are deduplicated by name, compared case-insensitively
+both within the file and against the store, so "jane doe" updates a stored
+"Jane Doe" under the stored spelling:
+    - a name seen earlier in the same file is skipped as a duplicate
+    - a name already in the store at the same company updates that prospect's
+      profile (or is skipped with on_existing="skip"); its history is kept and
+      the row's interactions it does not already have are appended to it
+    - a name already in the store at a different company is reported as a
+      conflict and skipped, rather than overwriting someone else
+CSV headers are matched case-insensitively against the profile fields, and
+list fields are split on ";" (or "," when a cell has no ";").
+"""
+import csv
+import json
+import os
+from datetime import datetime
+
+from store import PROFILE_FIELDS, Prospect
+
+LIST_FIELDS = ("interests", "pain_points")
+MAX_FIELD_CHARS = 10000
+# How many invalid rows are described in the summary; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+class ImportCancelled(Exception):
+    pass
+
+def file_format(path):
+    """"csv" or "jsonl" from the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"unsupported file type {extension!r}; use .csv or .jsonl")
+
+class _LineReader:
+    """Decoded lines of a file opened in binary mode, counting the bytes consumed for progress"""
+    def __init__(self, f):
+        self.f = f
+        self.bytes_read = 0
+
+    def __iter__(self):
+        first = True
+        for line in self.f:
+            self.bytes_read += len(line)
+            # utf-8-sig drops the byte order mark spreadsheet exports often start with
+            yield line.decode("utf-8-sig" if first else "utf-8")
+            first = False
+
+def read_rows(lines, fmt):
+    """Yield (line number, raw dict) for each record; JSON syntax errors become ValueError rows"""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        if reader.fieldnames:
+            reader.fieldnames = [header.strip().lower().replace(" ", "_") for header in reader.fieldnames]
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            row = ValueError(f"invalid JSON: {e}")
+        yield number, row
+
+def parse_record(row):
+    """Prospect built from an imported row, or ValueError describing what is wrong with it"""
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        raise ValueError("record is not an object")
+    name = str(row.get("name") or "").strip()
+    if not name:
+        raise ValueError("name is required")
+    values = {"name": name}
+    for field in PROFILE_FIELDS[1:]:
+        value = row.get(field)
+        if field in LIST_FIELDS:
+            values[field] = _split(value)
+            continue
+        value = "" if value is None else str(value).strip()
+        if len(value) > MAX_FIELD_CHARS:
+            raise ValueError(f"{field} is longer than {MAX_FIELD_CHARS} characters")
+        values[field] = value
+    last_contact = values.pop("last_contact")[:10] or None
+    if last_contact:
+        try:
+            datetime.strptime(last_contact, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"last_contact {last_contact!r} is not a YYYY-MM-DD date")
+    history = row.get("interaction_history") or ()
+    if not isinstance(history, (list, tuple)) or not all(isinstance(i, dict) and i.get("date") and i.get("type") for i in history):
+        raise ValueError("interaction_history must be a list of objects with a date and a type")
+    return Prospect(last_contact=last_contact, interaction_history=history, **values)
+
+def _split(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if str(item).strip()]
+    value = str(value)
+    separator = ";" if ";" in value else ","
+    return [item.strip() for item in value.split(separator) if item.strip()]
+
+def import_prospects(store, path, batch_size=1000, on_existing="update", on_progress=None):
+    """Stream the prospects in a CSV or JSONL file into store and return a summary dict
+
+    on_progress(bytes_read, total_bytes, summary) is called after every batch;
+    raising ImportCancelled from it stops the import after that batch, keeping
+    what was already written.
+    """
+    fmt = file_format(path)
+    total = os.path.getsize(path)
+    summary = {"rows": 0, "created": 0, "updated": 0, "interactions_added": 0, "duplicates": 0, "conflicts": 0,
+               "invalid": 0, "errors": []}
+    # Case-folded name -> name as stored, so rows match the store the same way they match each other
+    stored = {prospect.name.casefold(): prospect.name for prospect in store.iter_prospects(history_limit=0)}
+    seen = set()
+    batch = {}
+
+    def flush(lines):
+        existing = store.get_profiles(batch)
+        created, updated = [], []
+        for name, prospect in batch.items():
+            current = existing.get(name)
+            if current is None:
+                created.append(prospect)
+            elif current.company.casefold() != prospect.company.casefold():
+                summary["conflicts"] += 1
+                _report(summary, None, f"{name!r} already exists at {current.company!r}")
+            elif on_existing == "skip":
+                summary["duplicates"] += 1
+            else:
+                updated.append(prospect)
+        if created:
+            store.import_prospects(created)
+        if updated:
+            store.save_prospects(updated)
+            added = [(prospect.name, interaction, None) for prospect in updated
+                     for interaction in _new_interactions(store, prospect)]
+            if added:
+                store.add_interactions(added)
+            summary["interactions_added"] += len(added)
+        summary["created"] += len(created)
+        summary["updated"] += len(updated)
+        batch.clear()
+        if on_progress is not None:
+            on_progress(lines.bytes_read, total, summary)
+
+    with open(path, "rb") as f:
+        lines = _LineReader(f)
+        for number, row in read_rows(lines, fmt):
+            summary["rows"] += 1
+            try:
+                prospect = parse_record(row)
+            except ValueError as e:
+                summary["invalid"] += 1
+                _report(summary, number, str(e))
+                continue
+            key = prospect.name.casefold()
+            if key in seen:
+                summary["duplicates"] += 1
+                continue
+            seen.add(key)
+            name = stored.get(key, prospect.name)
+            batch[name] = prospect if name == prospect.name else prospect.replace(name=name)
+            if len(batch) >= batch_size:
+                flush(lines)
+        flush(lines)
+    return summary
+
+def _new_interactions(store, prospect):
+    """The imported interactions of an existing prospect that its stored history lacks
+
+    Re-importing the same file therefore adds nothing.
+    """
+    if not prospect.interaction_history:
+        return []
+    key = lambda interaction: (interaction.get("date"), interaction.get("type"), interaction.get("notes") or "")
+    stored = {key(interaction) for interaction in store.get_history(prospect.name)}
+    new = []
+    for interaction in prospect.interaction_history:
+        if key(interaction) not in stored:
+            stored.add(key(interaction))
+            new.append(interaction)
+    return new
+
+def _report(summary, line, message):
+    if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+        summary["errors"].append({"line": line, "error": message} if line else {"error": message})
+
+def export_prospects(store, path, history=False, batch_size=500, on_progress=None):
+    """Write every prospect in store to a CSV or JSONL file and return how many were written
+
+    Only JSONL carries interaction history (with history=True). The file is
+    written beside path and moved into place once complete.
+    """
+    fmt = file_format(path)
+    written = 0
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8", newline="") as f:
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(PROFILE_FIELDS)
+            for prospect in store.iter_prospects(history_limit=None if history else 0, batch_size=batch_size):
+                if fmt == "csv":
+                    values = ((field, getattr(prospect, field)) for field in PROFILE_FIELDS)
+                    writer.writerow(["; ".join(value) if field in LIST_FIELDS else value or "" for field, value in values])
+                else:
+                    f.write(json.dumps(prospect.to_dict(history=history)) + "\n")
+                written += 1
+                if on_progress is not None and written % batch_size == 0:
+                    on_progress(written)
+        os.replace(temp_path, path)
+    except BaseException:
+        # Leave any earlier export at path untouched
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return written